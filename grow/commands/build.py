@@ -16,11 +16,28 @@ import os
 @click.option('--clear_cache',
               default=False, is_flag=True,
               help='Clear the pod cache before building.')
-def build(pod_path, out_dir, preprocess, clear_cache):
+@click.option('--workers', type=int, default=None,
+              help='Number of processes to use when rendering the pod.'
+                   ' Defaults to rendering in a single process.')
+@click.option('--incremental', default=False, is_flag=True,
+              help='Only render the routes whose inputs changed since the'
+                   ' last build to the same output directory.')
+@click.option('--render_cache/--no-render_cache', default=False,
+              help='Whether to reuse pages rendered by previous builds when'
+                   ' their recorded inputs have not changed. Pages reading'
+                   ' files outside of their recorded inputs, such as from'
+                   ' extensions, may be stale.')
+@click.option('--cache_stats', default=False, is_flag=True,
+              help='Display the statistics of the in-memory caches after'
+                   ' building. Caches of worker processes are not included.')
+def build(pod_path, out_dir, preprocess, clear_cache, workers, incremental,
+          render_cache, cache_stats):
     """Generates static files and dumps them to a local destination."""
     root = os.path.abspath(os.path.join(os.getcwd(), pod_path))
     out_dir = out_dir or os.path.join(root, 'build')
     pod = pods.Pod(root, storage=storage.FileStorage)
+    if render_cache:
+        pod.enable(pod.FEATURE_RENDER_CACHE)
     if clear_cache:
         pod.podcache.reset(force=True)
     if preprocess:
@@ -28,7 +45,8 @@ def build(pod_path, out_dir, preprocess, clear_cache):
     try:
         config = local_destination.Config(out_dir=out_dir)
         destination = local_destination.LocalDestination(config)
-        paths_to_contents = destination.dump(pod)
+        paths_to_contents = destination.dump_iter(
+            pod, workers=workers, incremental=incremental and not clear_cache)
         repo = utils.get_git_repo(pod.root)
         stats_obj = stats.Stats(pod, paths_to_contents=paths_to_contents)
         destination.deploy(paths_to_contents, stats=stats_obj, repo=repo, confirm=False,
@@ -36,3 +54,5 @@ def build(pod_path, out_dir, preprocess, clear_cache):
         pod.podcache.write()
     except pods.Error as e:
         raise click.ClickException(str(e))
+    if cache_stats:
+        click.echo(utils.format_memoize_stats())
@@ -21,9 +21,18 @@ import os
 @click.option('--auth',
               help='(deprecated) --auth must now be specified'
                    ' before deploy. Usage: grow --auth=user@example.com deploy')
+@click.option('--workers', type=int, default=None,
+              help='Number of processes to use when rendering the pod.'
+                   ' Defaults to rendering in a single process.')
+@click.option('--timings', type=click.Path(dir_okay=False, writable=True),
+              help='Path to a CSV file to which the time taken to write or'
+                   ' delete each file is written.')
+@click.option('--cache_stats', default=False, is_flag=True,
+              help='Display the statistics of the in-memory caches after'
+                   ' deploying. Caches of worker processes are not included.')
 @click.pass_context
 def deploy(context, deployment_name, pod_path, preprocess, confirm, test,
-           test_only, auth):
+           test_only, auth, workers, timings, cache_stats):
     """Deploys a pod to a destination."""
     if auth:
         text = ('--auth must now be specified before deploy. Usage:'
@@ -43,12 +52,21 @@ def deploy(context, deployment_name, pod_path, preprocess, confirm, test,
         if test_only:
             deployment.test()
             return
-        paths_to_contents = deployment.dump(pod)
+        paths_to_contents = deployment.dump_iter(pod, workers=workers)
         repo = utils.get_git_repo(pod.root)
         stats_obj = stats.Stats(pod, paths_to_contents=paths_to_contents)
-        deployment.deploy(paths_to_contents, stats=stats_obj, repo=repo,
-                          confirm=confirm, test=test)
+        try:
+            deployment.deploy(paths_to_contents, stats=stats_obj, repo=repo,
+                              confirm=confirm, test=test)
+        finally:
+            if timings and deployment.scheduler:
+                with open(timings, 'wb') as fp:
+                    deployment.scheduler.write_timings(fp)
+        pod.podcache.write_file_index()
+        pod.podcache.write_fingerprints()
     except base.Error as e:
         raise click.ClickException(str(e))
     except pods.Error as e:
         raise click.ClickException(str(e))
+    if cache_stats:
+        click.echo(utils.format_memoize_stats())
@@ -2,6 +2,7 @@
 
 import os
 import click
+from grow.common import utils
 from grow.pods import env
 from grow.pods import pods
 from grow.pods import storage
@@ -28,8 +29,14 @@ from grow.server import manager
               help='Whether to inject the Grow UI Tools.')
 @click.option('--deployment', default=None,
               help='Name of the deployment to use.')
+@click.option('--page_cache/--no-page_cache', is_flag=True, default=True,
+              help='Whether to serve rendered pages from memory until their'
+                   ' inputs change.')
+@click.option('--cache_stats', default=False, is_flag=True,
+              help='Display the statistics of the in-memory caches when the'
+                   ' server is stopped.')
 def run(host, port, https, debug, browser, update_check, preprocess, ui,
-        pod_path, deployment):
+        pod_path, deployment, page_cache, cache_stats):
     """Starts a development server for a single pod."""
     root = os.path.abspath(os.path.join(os.getcwd(), pod_path))
     scheme = 'https' if https else 'http'
@@ -42,9 +49,14 @@ def run(host, port, https, debug, browser, update_check, preprocess, ui,
         pod.set_env(deployment_obj.config.env)
     if not ui:
         pod.disable(pod.FEATURE_UI)
+    if page_cache:
+        pod.enable(pod.FEATURE_PAGE_CACHE)
     try:
         manager.start(pod, host=host, port=port, open_browser=browser,
                       debug=debug, preprocess=preprocess,
                       update_check=update_check)
     except pods.Error as e:
         raise click.ClickException(str(e))
+    finally:
+        if cache_stats:
+            click.echo(utils.format_memoize_stats())
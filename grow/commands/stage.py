@@ -33,10 +33,12 @@ def stage(context, pod_path, remote, preprocess, subdomain, api_key):
         if preprocess:
             pod.preprocess()
         repo = utils.get_git_repo(pod.root)
-        paths_to_contents = deployment.dump(pod)
+        paths_to_contents = deployment.dump_iter(pod)
         stats_obj = stats.Stats(pod, paths_to_contents=paths_to_contents)
         deployment.deploy(paths_to_contents, stats=stats_obj, repo=repo,
                           confirm=False, test=False)
+        pod.podcache.write_file_index()
+        pod.podcache.write_fingerprints()
     except base.Error as e:
         raise click.ClickException(str(e))
     except pods.Error as e:
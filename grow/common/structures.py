@@ -74,7 +74,10 @@ class SortedCollection(object):
     def __init__(self, iterable=(), key=None):
         self._given_key = key
         key = (lambda x: x) if key is None else key
-        decorated = sorted((key(item), item) for item in iterable)
+        # Sort on the keys alone, so that items with equal keys keep their
+        # order and are never compared themselves.
+        decorated = sorted(((key(item), item) for item in iterable),
+                           key=lambda pair: pair[0])
         self._keys = [k for k, item in decorated]
         self._items = [item for k, item in decorated]
         self._key = key
@@ -95,7 +98,11 @@ class SortedCollection(object):
         self.__init__([], self._key)
 
     def copy(self):
-        return self.__class__(self, self._key)
+        # The items are already sorted, so they are copied without sorting.
+        other = self.__class__(key=self._given_key)
+        other._keys = list(self._keys)
+        other._items = list(self._items)
+        return other
 
     def __len__(self):
         return len(self._items)
@@ -1,8 +1,10 @@
 """Common grow utility functions."""
 
+import collections
 import csv as csv_lib
 import functools
 import gettext
+import hashlib
 import imp
 import json
 import logging
@@ -15,6 +17,7 @@ import urllib
 import yaml
 import bs4
 import html2text
+import texttable
 import translitcodec  # pylint: disable=unused-import
 from grow.pods import errors
 
@@ -134,32 +137,200 @@ def validate_name(name):
 
 
 class memoize(object):
+    """Memoizes the results of a function in a bounded LRU cache.
+
+    Cached values are keyed by the arguments of the call; calls with
+    unhashable arguments are not cached. String arguments longer than
+    `MAX_KEY_LENGTH` are keyed by their digest, so that large contents are
+    not kept by the cache. String arguments are indexed as tags, so that
+    values computed for a pod path can be invalidated without scanning the
+    whole cache.
+
+    Caches belong to the decorated functions, so they are shared by every pod
+    of the process. The values of methods and of functions taking a pod are
+    keyed by their instance or pod, and can be invalidated for one of them
+    only. Every cache is registered so that its hit, miss and eviction
+    counters, which are totals for the process, can be reported by
+    `get_memoize_stats`.
+    """
+
+    DEFAULT_MAX_SIZE = 4096
+    MAX_KEY_LENGTH = 256
+    _caches = []
 
-    def __init__(self, func):
+    def __init__(self, func, max_size=None):
         self.func = func
-        self.cache = {}
+        self.max_size = max_size or self.DEFAULT_MAX_SIZE
+        self.name = '{}.{}'.format(func.__module__, func.__name__)
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._reset()
+        memoize._caches.append(self)
+
+    @classmethod
+    def sized(cls, max_size):
+        """Returns a decorator memoizing up to `max_size` values."""
+        return lambda func: cls(func, max_size=max_size)
+
+    @staticmethod
+    def _digest(value):
+        if isinstance(value, unicode):
+            value = value.encode('utf-8')
+        if isinstance(value, str):
+            return hashlib.sha1(value).hexdigest()
+        return value
+
+    @classmethod
+    def _get_key_arg(cls, value):
+        if isinstance(value, basestring) and len(value) > cls.MAX_KEY_LENGTH:
+            return cls._digest(value)
+        return value
+
+    @classmethod
+    def _get_key(cls, args, kwargs):
+        args = tuple([cls._get_key_arg(arg) for arg in args])
+        if kwargs:
+            return args, frozenset(
+                (name, cls._get_key_arg(value))
+                for name, value in kwargs.iteritems())
+        return args, None
+
+    @staticmethod
+    def _get_tags(key):
+        args, kwargs = key
+        tags = [arg for arg in args if isinstance(arg, basestring)]
+        if kwargs:
+            tags += [value for _, value in kwargs
+                     if isinstance(value, basestring)]
+        return tags
 
     def __call__(self, *args, **kwargs):
-        key = (args, frozenset(kwargs.items()))
+        key = self._get_key(args, kwargs)
         try:
-            return self.cache[key]
-        except KeyError:
-            value = self.func(*args, **kwargs)
-            self.cache[key] = value
+            with self._lock:
+                value = self.cache.pop(key)
+                self.cache[key] = value
+                self.hits += 1
             return value
+        except KeyError:
+            pass
         except TypeError:
             return self.func(*args, **kwargs)
+        value = self.func(*args, **kwargs)
+        with self._lock:
+            self.misses += 1
+            self._add(key, value)
+        return value
 
     def __repr__(self):
         return self.func.__doc__
 
+    def _add(self, key, value):
+        if key in self.cache:
+            self._remove(key)
+        self.cache[key] = value
+        for tag in self._get_tags(key):
+            self._tags.setdefault(tag, set()).add(key)
+        while len(self.cache) > self.max_size:
+            self._remove(next(iter(self.cache)))
+            self.evictions += 1
+
+    def _remove(self, key):
+        self.cache.pop(key)
+        for tag in self._get_tags(key):
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+
+    def invalidate(self, *args, **kwargs):
+        """Removes the cached value for the arguments, if any."""
+        key = self._get_key(args, kwargs)
+        with self._lock:
+            try:
+                if key in self.cache:
+                    self._remove(key)
+            except TypeError:
+                pass
+
+    def invalidate_first_arg(self, value):
+        """Removes the cached values for calls made with the first argument."""
+        value = self._get_key_arg(value)
+        with self._lock:
+            if isinstance(value, basestring):
+                keys = list(self._tags.get(value, ()))
+            else:
+                keys = list(self.cache)
+            for key in keys:
+                if key[0] and key[0][0] == value:
+                    self._remove(key)
+
+    def invalidate_tag(self, tag, owner=None):
+        """Removes the cached values for calls made with a string argument.
+
+        When an owner, such as a pod, is given, only the values of calls that
+        were also made with the owner as an argument are removed.
+        """
+        with self._lock:
+            for key in list(self._tags.get(tag, ())):
+                if owner is None or self._has_arg(key, owner):
+                    self._remove(key)
+
+    @staticmethod
+    def _has_arg(key, value):
+        args, kwargs = key
+        if any(arg is value for arg in args):
+            return True
+        return bool(kwargs) and any(
+            arg is value for _, arg in kwargs)
+
+    def get_stats(self):
+        """Returns the size and counters of the cache."""
+        return {
+            'evictions': self.evictions,
+            'hits': self.hits,
+            'max_size': self.max_size,
+            'misses': self.misses,
+            'name': self.name,
+            'size': len(self.cache),
+        }
+
     def __get__(self, obj, objtype):
         fn = functools.partial(self.__call__, obj)
         fn.reset = self._reset
         return fn
 
     def _reset(self):
-        self.cache = {}
+        self.cache = collections.OrderedDict()
+        self._tags = {}
+
+
+def get_memoize_stats():
+    """Returns the statistics of every memoized function, by name."""
+    return sorted((cache.get_stats() for cache in memoize._caches),
+                  key=lambda stats: stats['name'])
+
+
+def format_memoize_stats():
+    """Returns a table of the statistics of every memoized function."""
+    table = texttable.Texttable(max_width=0)
+    table.set_deco(texttable.Texttable.HEADER)
+    table.set_cols_align(['l', 'r', 'r', 'r', 'r', 'r'])
+    rows = [['Cache', 'Size', 'Max size', 'Hits', 'Misses', 'Evictions']]
+    for item in get_memoize_stats():
+        rows.append([item['name'], item['size'], item['max_size'],
+                     item['hits'], item['misses'], item['evictions']])
+    table.add_rows(rows)
+    return table.draw()
+
+
+def invalidate_memoized(tag, owner=None):
+    """Removes the values memoized for a tag from every cache."""
+    for cache in memoize._caches:
+        cache.invalidate_tag(tag, owner=owner)
 
 
 class cached_property(property):
@@ -199,6 +370,23 @@ class cached_property(property):
         return value
 
 
+class memoize_content(memoize):
+    """Memoizes a function of content strings, keyed by their digest.
+
+    The first argument is replaced by its digest in the cache keys, however
+    short, so that contents are not kept as keys and tags of the cache.
+    """
+
+    @classmethod
+    def _get_key(cls, args, kwargs):
+        if args:
+            args = (cls._digest(args[0]),) + tuple(args[1:])
+        return super(memoize_content, cls)._get_key(args, kwargs)
+
+    def invalidate_first_arg(self, value):
+        super(memoize_content, self).invalidate_first_arg(self._digest(value))
+
+
 class memoize_tag(memoize):
 
     def __call__(self, *args, **kwargs):
@@ -212,68 +400,106 @@ def every_two(l):
     return zip(l[::2], l[1::2])
 
 
-def make_yaml_loader(pod, doc=None):
-    class YamlLoader(yaml_Loader):
-
-        def _construct_func(self, node, func):
-            if isinstance(node, yaml.SequenceNode):
-                items = []
-                for i, each in enumerate(node.value):
-                    items.append(func(node.value[i].value))
-                return items
-            return func(node.value)
-
-        def construct_csv(self, node):
-            return self._construct_func(node, pod.read_csv)
-
-        def construct_doc(self, node):
-            locale = doc._locale_kwarg if doc else None
-            pod_path = doc.pod_path if doc else None
-            def func(path):
-                doc = pod.get_doc(path, locale=locale)
-                pod.podcache.dependency_graph.add(pod_path, doc.pod_path)
-                return doc
-            return self._construct_func(node, func)
+class YamlLoader(yaml_Loader):
+    """Loader with the constructors of grow.
 
-        def construct_gettext(self, node):
-            return self._construct_func(node, gettext.gettext)
-
-        def construct_json(self, node):
-            return self._construct_func(node, pod.read_json)
+    The class is created once; the pod and the document or file being parsed
+    are the state of each loader. Files referenced by constructors are
+    recorded as dependencies of the document, or of the file being parsed when
+    there is no document.
+    """
 
-        def construct_static(self, node):
-            locale = doc._locale_kwarg if doc else None
-            func = lambda path: pod.get_static(path, locale=locale)
-            return self._construct_func(node, func)
+    def __init__(self, stream, pod=None, doc=None, pod_path=None):
+        super(YamlLoader, self).__init__(stream)
+        self.pod = pod
+        self.doc = doc
+        self.source = doc.pod_path if doc else pod_path
+
+    @property
+    def locale(self):
+        return self.doc._locale_kwarg if self.doc else None
+
+    def _construct_func(self, node, func):
+        if isinstance(node, yaml.SequenceNode):
+            items = []
+            for i, each in enumerate(node.value):
+                items.append(func(node.value[i].value))
+            return items
+        return func(node.value)
+
+    def _construct_data_func(self, node, func):
+        def _func(path):
+            if self.source:
+                self.pod.podcache.dependency_graph.add(
+                    self.source, '/{}'.format(path.lstrip('/')))
+            return func(path)
+        return self._construct_func(node, _func)
+
+    def construct_csv(self, node):
+        return self._construct_data_func(node, self.pod.read_csv)
+
+    def construct_doc(self, node):
+        def func(path):
+            doc = self.pod.get_doc(path, locale=self.locale)
+            if self.source:
+                self.pod.podcache.dependency_graph.add(self.source, doc.pod_path)
+            return doc
+        return self._construct_func(node, func)
+
+    def construct_gettext(self, node):
+        return self._construct_func(node, gettext.gettext)
+
+    def construct_json(self, node):
+        return self._construct_data_func(node, self.pod.read_json)
+
+    def construct_static(self, node):
+        func = lambda path: self.pod.get_static(path, locale=self.locale)
+        return self._construct_data_func(node, func)
+
+    def construct_url(self, node):
+        func = lambda path: self.pod.get_url(path, locale=self.locale)
+        return self._construct_func(node, func)
+
+    def construct_yaml(self, node):
+        return self._construct_data_func(node, self.pod.read_yaml)
+
+
+YamlLoader.add_constructor(u'!_', YamlLoader.construct_gettext)
+YamlLoader.add_constructor(u'!g.csv', YamlLoader.construct_csv)
+YamlLoader.add_constructor(u'!g.doc', YamlLoader.construct_doc)
+YamlLoader.add_constructor(u'!g.json', YamlLoader.construct_json)
+YamlLoader.add_constructor(u'!g.static', YamlLoader.construct_static)
+YamlLoader.add_constructor(u'!g.url', YamlLoader.construct_url)
+YamlLoader.add_constructor(u'!g.yaml', YamlLoader.construct_yaml)
+
+
+def make_yaml_loader(pod, doc=None, pod_path=None):
+    """Returns a loader class for `yaml.load` bound to a pod and document.
+
+    Only a thin subclass of `YamlLoader` is created; the constructors are
+    registered once, on `YamlLoader`.
+    """
 
-        def construct_url(self, node):
-            locale = doc._locale_kwarg if doc else None
-            func = lambda path: pod.get_url(path, locale=locale)
-            return self._construct_func(node, func)
+    class BoundYamlLoader(YamlLoader):
 
-        def construct_yaml(self, node):
-            return self._construct_func(node, pod.read_yaml)
+        def __init__(self, stream):
+            super(BoundYamlLoader, self).__init__(
+                stream, pod=pod, doc=doc, pod_path=pod_path)
 
-    YamlLoader.add_constructor(u'!_', YamlLoader.construct_gettext)
-    YamlLoader.add_constructor(u'!g.csv', YamlLoader.construct_csv)
-    YamlLoader.add_constructor(u'!g.doc', YamlLoader.construct_doc)
-    YamlLoader.add_constructor(u'!g.json', YamlLoader.construct_json)
-    YamlLoader.add_constructor(u'!g.static', YamlLoader.construct_static)
-    YamlLoader.add_constructor(u'!g.url', YamlLoader.construct_url)
-    YamlLoader.add_constructor(u'!g.yaml', YamlLoader.construct_yaml)
-    return YamlLoader
+    return BoundYamlLoader
 
 
 def load_yaml(*args, **kwargs):
     pod = kwargs.pop('pod', None)
     doc = kwargs.pop('doc', None)
-    loader = make_yaml_loader(pod, doc=doc)
+    pod_path = kwargs.pop('pod_path', None)
+    loader = functools.partial(YamlLoader, pod=pod, doc=doc, pod_path=pod_path)
     return yaml.load(*args, Loader=loader, **kwargs) or {}
 
 
-@memoize
-def parse_yaml(content, pod=None):
-    return load_yaml(content, pod=pod)
+@memoize_content.sized(1024)
+def parse_yaml(content, pod=None, pod_path=None):
+    return load_yaml(content, pod=pod, pod_path=pod_path)
 
 
 def dump_yaml(obj):
@@ -3,6 +3,7 @@
 import unittest
 import mock
 import semantic_version
+import yaml
 from grow.testing import testing
 from grow.common.sdk_utils import get_this_version, LatestVersionCheckError
 from grow.pods import errors
@@ -119,6 +120,142 @@ class UtilsTestCase(unittest.TestCase):
         ]
         self.assertEqual(expected_docs, result['docs'])
 
+    def test_memoize_invalidate(self):
+        calls = []
+
+        @utils.memoize
+        def func(value, suffix=''):
+            calls.append(value)
+            return value + suffix
+
+        func('a')
+        func('a', suffix='b')
+        func('b')
+        func.invalidate('a')
+        func('a')
+        func('a', suffix='b')
+        self.assertEqual(['a', 'a', 'b', 'a'], calls)
+        func.invalidate_first_arg('a')
+        func('a', suffix='b')
+        func('b')
+        self.assertEqual(['a', 'a', 'b', 'a', 'a'], calls)
+
+    def test_memoize_lru(self):
+        calls = []
+
+        @utils.memoize.sized(2)
+        def func(value, suffix=''):
+            calls.append(value)
+            return value + suffix
+
+        func('a')
+        func('b')
+        func('a')
+        func('c')  # Evicts 'b', the least recently used value.
+        func('a')
+        func('b')
+        self.assertEqual(['a', 'b', 'c', 'b'], calls)
+        stats = func.get_stats()
+        self.assertEqual(2, stats['hits'])
+        self.assertEqual(4, stats['misses'])
+        self.assertEqual(2, stats['evictions'])
+        self.assertEqual(2, stats['size'])
+        self.assertIn(stats, utils.get_memoize_stats())
+
+    def test_memoize_invalidate_tag(self):
+        calls = []
+
+        @utils.memoize
+        def func(value, suffix=''):
+            calls.append(value)
+            return value + suffix
+
+        func('a', suffix='/path')
+        func('b', suffix='/other')
+        utils.invalidate_memoized('/path')
+        func('a', suffix='/path')
+        func('b', suffix='/other')
+        self.assertEqual(['a', 'b', 'a'], calls)
+
+    def test_memoize_long_args(self):
+        calls = []
+
+        @utils.memoize
+        def func(value, suffix=''):
+            calls.append(value)
+            return value + suffix
+
+        content = 'a' * (utils.memoize.MAX_KEY_LENGTH + 1)
+        func(content)
+        func(content)
+        func('b', suffix=content)
+        func('b', suffix=content)
+        self.assertEqual([content, 'b'], calls)
+        # Long strings are not kept as keys or tags.
+        self.assertNotIn(content, func._tags)
+        self.assertNotIn(content, [key[0][0] for key in func.cache])
+        func.invalidate_first_arg(content)
+        func(content)
+        self.assertEqual([content, 'b', content], calls)
+
+    def test_memoize_invalidate_owner(self):
+        calls = []
+        owner = object()
+        other_owner = object()
+
+        @utils.memoize
+        def func(path, _pod=None):
+            calls.append(path)
+            return path
+
+        func('/path', _pod=owner)
+        func('/path', _pod=other_owner)
+        utils.invalidate_memoized('/path', owner=owner)
+        func('/path', _pod=owner)
+        func('/path', _pod=other_owner)
+        self.assertEqual(['/path', '/path', '/path'], calls)
+
+    def test_memoize_content(self):
+        calls = []
+
+        @utils.memoize_content
+        def func(content, pod_path=None):
+            calls.append(content)
+            return content
+
+        content = 'foo: bar\n' * 1000
+        func(content, pod_path='/data/foo.yaml')
+        func(str(content), pod_path='/data/foo.yaml')
+        self.assertEqual(1, len(calls))
+        # Contents are not kept as keys or tags.
+        self.assertNotIn(content, func._tags)
+        self.assertNotIn(content, [key[0][0] for key in func.cache])
+        func.invalidate_tag('/data/foo.yaml')
+        func(content, pod_path='/data/foo.yaml')
+        func.invalidate_first_arg(content)
+        func(content, pod_path='/data/foo.yaml')
+        self.assertEqual(3, len(calls))
+
+    def test_load_yaml(self):
+        pod = testing.create_test_pod()
+        content = pod.read_file('/data/constructors.yaml')
+        doc = pod.get_doc('/content/pages/home.yaml', locale='de')
+        with mock.patch.object(
+                utils.YamlLoader, 'add_constructor') as add_constructor:
+            result = utils.load_yaml(content, pod=pod, doc=doc)
+            self.assertFalse(add_constructor.called)
+        self.assertEqual(doc, result['doc'])
+        self.assertEqual({}, utils.load_yaml(''))
+
+        # Loaders bound to a pod can still be made for `yaml.load`.
+        with mock.patch.object(
+                utils.YamlLoader, 'add_constructor') as add_constructor:
+            loader = utils.make_yaml_loader(pod, doc=doc)
+            result = yaml.load(content, Loader=loader)
+            self.assertFalse(add_constructor.called)
+        self.assertTrue(issubclass(loader, utils.YamlLoader))
+        self.assertEqual(doc, result['doc'])
+
     def test_process_google_comments(self):
         # Google comment link.
         raw = '<div><a id="cmnt" href="https://grow.io/">Link</a></div>'
@@ -1,11 +1,11 @@
 from . import base
+from . import cloud_uploads
 from grow.common import utils as common_utils
 from boto.s3 import connection
 from boto.s3 import key
 from grow.pods import env
 from protorpc import messages
 import boto
-import cStringIO
 import logging
 import os
 import mimetypes
@@ -20,18 +20,42 @@ class Config(messages.Message):
     redirect_trailing_slashes = messages.BooleanField(6, default=True)
     index_document = messages.StringField(7, default='index.html')
     error_document = messages.StringField(8, default='404.html')
+    multipart_threshold = messages.IntegerField(
+        9, default=cloud_uploads.DEFAULT_MULTIPART_THRESHOLD)
+    part_size = messages.IntegerField(
+        10, default=cloud_uploads.DEFAULT_PART_SIZE)
+    max_connections = messages.IntegerField(
+        11, default=cloud_uploads.DEFAULT_MAX_CONNECTIONS)
 
 
 
 class AmazonS3Destination(base.BaseDestination):
     KIND = 's3'
     Config = Config
+    supports_static_content = True
 
     def __str__(self):
         return 's3://{}'.format(self.config.bucket)
 
     @common_utils.cached_property
     def bucket(self):
+        return self._connect()
+
+    @property
+    def max_workers(self):
+        return self.config.max_connections
+
+    @common_utils.cached_property
+    def bucket_pool(self):
+        return cloud_uploads.BucketPool(
+            self._connect, max_size=self.config.max_connections)
+
+    @common_utils.cached_property
+    def upload_manifest(self):
+        return cloud_uploads.UploadManifest(
+            self.pod, 's3-{}'.format(self.config.bucket))
+
+    def _connect(self):
         boto_connection = boto.connect_s3(
             self.config.access_key, self.config.access_secret,
             calling_format=connection.OrdinaryCallingFormat())
@@ -44,11 +68,11 @@ class AmazonS3Destination(base.BaseDestination):
                 return boto_connection.create_bucket(self.config.bucket)
             raise
 
-    def dump(self, pod):
-        pod.set_env(self.get_env())
-        return pod.dump(
-            suffix=self.config.index_document,
-            append_slashes=self.config.redirect_trailing_slashes)
+    def _get_dump_options(self):
+        return {
+            'suffix': self.config.index_document,
+            'append_slashes': self.config.redirect_trailing_slashes,
+        }
 
     def prelaunch(self, dry_run=False):
         if dry_run:
@@ -63,35 +87,46 @@ class AmazonS3Destination(base.BaseDestination):
         return self.write_file(path, content, policy='private')
 
     def read_file(self, path):
-        file_key = key.Key(self.bucket)
-        file_key.key = path
-        try:
-            return file_key.get_contents_as_string()
-        except boto.exception.S3ResponseError, e:
-            if e.status != 404:
-                raise
-            raise IOError('File not found: {}'.format(path))
+        with self.bucket_pool.bucket() as bucket:
+            file_key = key.Key(bucket)
+            file_key.key = path
+            try:
+                return cloud_uploads.retry(file_key.get_contents_as_string)
+            except boto.exception.S3ResponseError, e:
+                if e.status != 404:
+                    raise
+                raise IOError('File not found: {}'.format(path))
 
     def delete_file(self, path):
-        bucket_key = key.Key(self.bucket)
-        bucket_key.key = path.lstrip('/')
-        self.bucket.delete_key(bucket_key)
+        with self.bucket_pool.bucket() as bucket:
+            bucket_key = key.Key(bucket)
+            bucket_key.key = path.lstrip('/')
+            cloud_uploads.retry(bucket.delete_key, bucket_key)
 
     def write_file(self, path, content, policy='public-read'):
         path = path.lstrip('/')
         path = path if path != '' else self.config.index_document
         if isinstance(content, unicode):
             content = content.encode('utf-8')
-        bucket_key = key.Key(self.bucket)
-        bucket_key.key = path
-        fp = cStringIO.StringIO()
-        fp.write(content)
         mimetype = mimetypes.guess_type(path)[0]
         # TODO: Allow configurable headers.
         headers = {
             'Cache-Control': 'no-cache',
             'Content-Type': mimetype if mimetype else 'text/html',
         }
-        fp.seek(0)
-        bucket_key.set_contents_from_file(fp, headers=headers, replace=True, policy=policy)
-        fp.close()
+        with self.bucket_pool.bucket() as bucket:
+            if cloud_uploads.get_size(content) >= self.config.multipart_threshold:
+                url = 's3://{}/{}'.format(self.config.bucket, path)
+                cloud_uploads.upload_multipart(
+                    bucket, path, content, self.upload_manifest, url,
+                    headers=headers, policy=policy,
+                    part_size=self.config.part_size)
+                return
+            bucket_key = key.Key(bucket)
+            bucket_key.key = path
+            with cloud_uploads.open_content(content) as fp:
+                def _upload():
+                    fp.seek(0)
+                    bucket_key.set_contents_from_file(
+                        fp, headers=headers, replace=True, policy=policy)
+                cloud_uploads.retry(_upload)
@@ -11,12 +11,16 @@ Grow implements features such as "password protection" and geolocation.
 
 The deployment process generally works like this:
 
-  (1) A pod is exported, creating a dictionary mapping file paths to content.
+  (1) A pod is exported, creating a stream of file paths and content (or a
+      dictionary mapping file paths to content).
   (2) A connection is made between Grow and the destination.
-  (3) Control files are retrieved from the destination, if they exist. All
-      control files are serialized ProtoRPC messages. The most important
-      control file is "index.proto.json", which contains an index of file
-      paths to sha-1 hashes of each file's content.
+  (3) Control files are retrieved from the destination, if they exist. The
+      most important control file is "index.gz", which contains an index of
+      file paths to sha-1 hashes of each file's content. The index is cached
+      locally and only retrieved again when the tag in "index.etag" changes.
+      The legacy "index.proto.json" index is still written for older versions
+      of Grow, and is used instead of "index.gz" once it no longer matches the
+      tag recorded for it, such as after a deployment by an older version.
   (4) An index is generated locally, and the local index is compared to the
       index at the destination. This allows Grow to produce a diff between
       the local ("canary") fileset and the destination's fileset.
@@ -48,8 +52,16 @@ destination, you'll just have to implement the following methods/properties:
   KIND
     A string identifying the deployment.
 
+Static files are exported as `static.StaticContent` references to the file in
+the pod. Destinations that can copy or stream those files without reading
+them into memory should set `supports_static_content` and handle references
+in `write_file`; other destinations receive the content of the file.
+
 The following methods are optional to implement:
 
+  apply_diff(self, diff, paths_to_contents)
+    Applies a diff, for destinations that can transfer changes in bulk.
+
   postlaunch(self, dry_run)
     Performs any post-launch tasks.
 
@@ -77,8 +89,12 @@ import subprocess
 import sys
 from grow.common import utils
 from grow.deployments import indexes
+from grow.deployments import scheduler
+from grow.deployments import spool as spool_lib
 from grow.deployments import tests
 from grow.pods import env
+from grow.pods import incremental as incremental_lib
+from grow.pods import static
 from . import messages
 
 
@@ -114,10 +130,16 @@ class DestinationTestCase(object):
 
 class BaseDestination(object):
     TestCase = DestinationTestCase
+    build_manifest_basename = 'build.json'
     diff_basename = 'diff.proto.json'
-    index_basename = 'index.proto.json'
+    index_basename = 'index.gz'
+    index_etag_basename = 'index.etag'
+    legacy_index_basename = 'index.proto.json'
     stats_basename = 'stats.proto.json'
+    supports_static_content = False
     threaded = True
+    # Maximum number of files written or deleted at once.
+    max_workers = indexes.Diff.POOL_SIZE
     batch_writes = False
     _control_dir = '/.grow/'
     success = False
@@ -128,6 +150,9 @@ class BaseDestination(object):
         self.pod = None
         self._diff = None
         self._confirm = None
+        self._build_manifest = None
+        self._index_etag = None
+        self.scheduler = None
 
     def __str__(self):
         return self.__class__.__name__
@@ -145,12 +170,88 @@ class BaseDestination(object):
     def storage(self):
         raise NotImplementedError
 
+    @property
+    def _index_cache_path(self):
+        return '/.grow/deployments/{}/remote-{}'.format(
+            self.name, self.index_basename)
+
+    def _read_index_etags(self):
+        """Returns the tags of the deployed index and of the legacy index.
+
+        Either may be None; indexes written by earlier versions of Grow have
+        no tag for the legacy index.
+        """
+        try:
+            etags = self.read_control_file(self.index_etag_basename).split()
+        except IOError:
+            return None, None
+        return (etags + [None, None])[:2]
+
     def _get_remote_index(self):
+        """Returns the deployed `indexes.CompactIndex`.
+
+        The index is read from a local cache unless the version tag of the
+        deployed index has changed since it was cached. The legacy index is
+        used instead when it is not the one written along with the index,
+        since an older version of Grow deployed after it, or when the index
+        does not match its tag, since a deployment was interrupted.
+        """
+        etag, legacy_etag = self._read_index_etags()
+        try:
+            legacy_content = self.read_control_file(self.legacy_index_basename)
+        except IOError:
+            legacy_content = None
+        if etag is None or (
+                legacy_content is not None
+                and indexes.CompactIndex.get_etag(legacy_content) != legacy_etag):
+            return self._get_legacy_index(legacy_content)
+        can_cache = self.pod is not None and not self.config.keep_control_dir
+        cache_path = self._index_cache_path
+        if can_cache and self.pod.file_exists(cache_path):
+            content = self.pod.read_file(cache_path)
+            if indexes.CompactIndex.get_etag(content) == etag:
+                self._index_etag = etag
+                return indexes.CompactIndex.from_string(content)
         try:
             content = self.read_control_file(self.index_basename)
-            return indexes.Index.from_string(content)
         except IOError:
-            return indexes.Index.create()
+            logging.warning('Deployed index is missing: {}'.format(self))
+            return self._get_legacy_index(legacy_content)
+        if indexes.CompactIndex.get_etag(content) != etag:
+            logging.warning('Deployed index does not match its tag: {}'.format(
+                self))
+            return self._get_legacy_index(legacy_content)
+        self._index_etag = etag
+        if can_cache:
+            self.pod.write_file(cache_path, content)
+        return indexes.CompactIndex.from_string(content)
+
+    def _get_legacy_index(self, content):
+        self._index_etag = None
+        if content is None:
+            return indexes.CompactIndex.create()
+        return indexes.CompactIndex.from_index(
+            indexes.Index.from_string(content))
+
+    def _write_index(self, index):
+        """Writes the deployed index, returning its version tag.
+
+        The legacy index is written first, then the index, then the tags of
+        both, so that the tags only match once both indexes are written.
+        """
+        # TODO: Stop writing the legacy index once older versions of Grow
+        # are no longer used to deploy.
+        legacy_content = indexes.Index.to_string(index.to_index())
+        content = index.to_string()
+        etag = indexes.CompactIndex.get_etag(content)
+        self.write_control_file(self.legacy_index_basename, legacy_content)
+        self.write_control_file(self.index_basename, content)
+        self.write_control_file(self.index_etag_basename, '{} {}'.format(
+            etag, indexes.CompactIndex.get_etag(legacy_content)))
+        if self.pod is not None and not self.config.keep_control_dir:
+            self.pod.write_file(self._index_cache_path, content)
+        self._index_etag = etag
+        return etag
 
     def get_env(self):
         """Returns an environment object based on the config."""
@@ -171,6 +272,20 @@ class BaseDestination(object):
         """Writes an individual file."""
         raise NotImplementedError
 
+    def _read_static_content(self, content):
+        if (isinstance(content, static.StaticContent)
+                and not self.supports_static_content):
+            return content.read()
+        return content
+
+    def _write_file(self, path, content):
+        return self.write_file(path, self._read_static_content(content))
+
+    def _write_files(self, paths_to_contents):
+        return self.write_files(dict(
+            (path, self._read_static_content(content))
+            for path, content in paths_to_contents.iteritems()))
+
     def delete_file(self, path):
         raise NotImplementedError
 
@@ -226,25 +341,133 @@ class BaseDestination(object):
     def login(self, account, reauth=False):
         pass
 
-    def dump(self, pod):
+    def dump(self, pod, workers=None):
+        """Returns a mapping of paths to the content of the built pod."""
         pod.set_env(self.get_env())
-        return pod.dump()
+        return pod.dump(workers=workers, **self._get_dump_options())
+
+    def dump_iter(self, pod, workers=None, incremental=False):
+        """Returns a stream of (path, content) pairs for the pod.
+
+        Pages can be deployed and discarded as they are rendered, and static
+        files are streamed from disk, so memory use does not grow with the
+        size of the pod. When `incremental` is set, only the routes whose
+        inputs changed since the last build deployed to this destination are
+        rendered.
+        """
+        pod.set_env(self.get_env())
+        return pod.dump_iter(
+            workers=workers, manifest=self._get_build_manifest(pod, incremental),
+            static_content=True, **self._get_dump_options())
+
+    def _get_dump_options(self):
+        """Returns the options of the pod's dump for this destination."""
+        return {}
+
+    def _get_build_manifest(self, pod, incremental):
+        if not incremental:
+            self._build_manifest = None
+            return None
+        try:
+            content = self.read_control_file(self.build_manifest_basename)
+        except IOError:
+            content = None
+        # The manifest is only used with the index it was written with, which
+        # is not the deployed index if an older version of Grow deployed.
+        self._get_remote_index()
+        index_sha = self._index_etag
+        self._build_manifest = incremental_lib.BuildManifest(
+            pod, content, ignored_dirs=self._get_ignored_dirs(),
+            index_sha=index_sha)
+        return self._build_manifest
+
+    def _get_ignored_dirs(self):
+        """Returns local directories that are never inputs to a build."""
+        return []
+
+    def _write_build_manifest(self, index_sha):
+        if self._build_manifest is None:
+            return
+        self.write_control_file(
+            self.build_manifest_basename,
+            self._build_manifest.to_string(index_sha))
+
+    def _spool_changes(self, paths_to_contents, deployed_index, spool,
+                       stats=None):
+        """Consumes a stream of rendered files, returning the new index.
+
+        Files are hashed into the index as they arrive, in a thread pool. Files that differ
+        from the deployed index are queued in the spool to be written once
+        the diff is applied; unchanged files are dropped immediately. Files
+        skipped by an incremental build keep their deployed hash.
+        """
+        their_paths_to_shas = deployed_index.get_paths_to_shas()
+        paths_to_shas = {}
+        hashed = indexes.Index.hash_iter(
+            paths_to_contents,
+            skip=lambda content: content is incremental_lib.UNCHANGED)
+        for path, content, sha in hashed:
+            path = indexes.Index.normalize_path(path)
+            if content is incremental_lib.UNCHANGED:
+                sha = their_paths_to_shas.get(path)
+                if sha is None:
+                    text = '{} was not rendered but is missing from {}.'
+                    raise Error(text.format(path, self))
+            if stats is not None and path not in paths_to_shas:
+                stats.add_file(path)
+            paths_to_shas[path] = sha
+            if their_paths_to_shas.get(path) == sha:
+                spool.discard(path)
+            else:
+                spool.add(path, content)
+        return indexes.CompactIndex(
+            paths_to_shas, message=indexes.Index.create())
+
+    def apply_diff(self, diff, paths_to_contents):
+        """Writes and deletes the files changed by a diff.
+
+        Returns the `scheduler.Scheduler` that ran the changes, if any.
+        """
+        return indexes.Diff.apply(
+            diff, paths_to_contents, write_func=self._write_file, batch_write_func=self._write_files,
+            delete_func=self.delete_file, threaded=self.threaded, batch_writes=self.batch_writes,
+            max_workers=self.max_workers)
 
     def deploy(self, paths_to_contents, stats=None,
                repo=None, dry_run=False, confirm=False, test=True):
+        """Deploys the pod.
+
+        `paths_to_contents` is either a mapping of paths to content or an
+        iterable of (path, content) pairs, such as the stream returned by
+        `dump`. Streams are consumed once and never held in memory.
+        """
         self._confirm = confirm
         self.prelaunch(dry_run=dry_run)
         if test:
             self.test()
+        spool = None
         try:
             deployed_index = self._get_remote_index()
-            new_index = indexes.Index.create(paths_to_contents)
+            if isinstance(paths_to_contents, dict):
+                # Diffs hold normalized paths, which are used to look up the
+                # contents of the changed files.
+                paths_to_contents = dict(
+                    (indexes.Index.normalize_path(path), content)
+                    for path, content in paths_to_contents.iteritems())
+                new_index = indexes.CompactIndex.create(paths_to_contents)
+            else:
+                spool = spool_lib.ContentSpool()
+                new_index = self._spool_changes(
+                    paths_to_contents, deployed_index, spool, stats=stats)
+                paths_to_contents = spool
             if repo:
-                indexes.Index.add_repo(new_index, repo)
+                indexes.Index.add_repo(new_index.message, repo)
             diff = indexes.Diff.create(new_index, deployed_index, repo=repo)
             self._diff = diff
             if indexes.Diff.is_empty(diff):
                 logging.info('Finished with no diffs since the last build.')
+                if not dry_run:
+                    self._write_build_manifest(self._index_etag)
                 return
             if dry_run:
                 return
@@ -254,11 +477,12 @@ class BaseDestination(object):
                 if not utils.interactive_confirm(text):
                     logging.info('Aborted.')
                     return
-            indexes.Diff.apply(
-                diff, paths_to_contents, write_func=self.write_file, batch_write_func=self.write_files,
-                delete_func=self.delete_file, threaded=self.threaded, batch_writes=self.batch_writes)
-            self.write_control_file(
-                self.index_basename, indexes.Index.to_string(new_index))
+            try:
+                self.scheduler = self.apply_diff(diff, paths_to_contents)
+            except scheduler.FailedTasksError as e:
+                self.scheduler = e.scheduler
+                raise Error(str(e))
+            self._write_build_manifest(self._write_index(new_index))
             if stats is not None:
                 self.write_control_file(self.stats_basename, stats.to_string())
             else:
@@ -269,6 +493,8 @@ class BaseDestination(object):
             self.success = True
         finally:
             self.postlaunch()
+            if spool is not None:
+                spool.close()
         return diff
 
     def command(self, command):
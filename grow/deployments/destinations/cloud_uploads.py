@@ -0,0 +1,217 @@
+"""Reliable uploads to Google Cloud Storage and Amazon S3 buckets.
+
+Boto connections are not safe to share between threads, so each deploy thread
+gets its own bucket connection from a `BucketPool`, which also bounds the
+number of concurrent uploads. Requests that fail with a server error or a
+network error are retried with exponential backoff.
+
+Files larger than a threshold are uploaded in parts (S3) or resumably (GCS).
+The progress of those uploads is recorded in the pod, so that a deploy that
+is interrupted resumes the upload where it stopped rather than starting over.
+"""
+
+import contextlib
+import cStringIO
+import errno
+import hashlib
+import httplib
+import json
+import logging
+import os
+import random
+import socket
+import threading
+import time
+import boto
+from boto.s3 import multipart
+from grow.pods import static
+
+# Files at least this large are uploaded in parts.
+DEFAULT_MULTIPART_THRESHOLD = 32 * 1024 * 1024
+DEFAULT_PART_SIZE = 16 * 1024 * 1024
+DEFAULT_MAX_CONNECTIONS = 16
+MAX_RETRIES = 5
+# Seconds waited before the first retry, doubled for every later retry.
+RETRY_DELAY = 0.5
+UPLOADS_DIR = '/.grow/cache/uploads'
+
+
+def is_retryable(error):
+    """Returns whether a request failing with `error` should be retried."""
+    if isinstance(error, boto.exception.BotoServerError):
+        return error.status is None or error.status >= 500
+    return isinstance(error, (
+        httplib.HTTPException, socket.error, socket.timeout))
+
+
+def retry(func, *args, **kwargs):
+    """Calls `func`, retrying server and network errors with backoff."""
+    for attempt in range(MAX_RETRIES + 1):
+        try:
+            return func(*args, **kwargs)
+        except Exception as e:
+            if attempt == MAX_RETRIES or not is_retryable(e):
+                raise
+            delay = RETRY_DELAY * (2 ** attempt) * (1 + random.random())
+            logging.warning('Retrying in {:.1f}s after error: {}'.format(
+                delay, e))
+            time.sleep(delay)
+
+
+class BucketPool(object):
+    """Bucket connections, one for each thread using the pool.
+
+    At most `max_size` threads may use a connection at once; others wait
+    until a connection is released.
+    """
+
+    def __init__(self, connect_func, max_size=DEFAULT_MAX_CONNECTIONS):
+        self._connect_func = connect_func
+        self._local = threading.local()
+        self._semaphore = threading.BoundedSemaphore(max_size)
+
+    @contextlib.contextmanager
+    def bucket(self):
+        """Yields the bucket connection of the current thread."""
+        with self._semaphore:
+            if getattr(self._local, 'bucket', None) is None:
+                self._local.bucket = retry(self._connect_func)
+            yield self._local.bucket
+
+
+class UploadManifest(object):
+    """Progress of interrupted uploads, persisted in the pod.
+
+    Uploads are identified by their destination URL and the hash and size of
+    their content, so that changed files are never resumed.
+    """
+
+    def __init__(self, pod, name):
+        self.pod = pod
+        self._lock = threading.Lock()
+        self._path = '{}/{}.json'.format(UPLOADS_DIR, name)
+        self._uploads = {}
+        if pod and pod.file_exists(self._path):
+            try:
+                self._uploads = json.loads(pod.read_file(self._path))
+            except ValueError:
+                pass
+
+    def _write(self):
+        if self.pod:
+            self.pod.write_file(self._path, json.dumps(self._uploads))
+
+    def get_tracker_path(self, url, sha):
+        """Returns a path for a boto resumable upload tracker file."""
+        if not self.pod:
+            return None
+        name = hashlib.sha1('{}\0{}'.format(url, sha)).hexdigest()
+        path = self.pod.abs_path('{}/{}.tracker'.format(UPLOADS_DIR, name))
+        try:
+            os.makedirs(os.path.dirname(path))
+        except OSError as e:
+            if e.errno != errno.EEXIST:
+                raise
+        return path
+
+    def get(self, url, sha, size):
+        """Returns the record of an interrupted upload of the content."""
+        with self._lock:
+            record = self._uploads.get(url)
+            if record and record['sha'] == sha and record['size'] == size:
+                return record
+            return None
+
+    def start(self, url, sha, size, upload_id):
+        with self._lock:
+            self._uploads[url] = {
+                'id': upload_id,
+                'parts': [],
+                'sha': sha,
+                'size': size,
+            }
+            self._write()
+            return self._uploads[url]
+
+    def add_part(self, url, part_num):
+        with self._lock:
+            self._uploads[url]['parts'].append(part_num)
+            self._write()
+
+    def finish(self, url):
+        with self._lock:
+            if self._uploads.pop(url, None) is not None:
+                self._write()
+
+
+def get_size(content):
+    if isinstance(content, static.StaticContent):
+        return os.path.getsize(content.path)
+    return len(content)
+
+
+def get_sha(content):
+    if isinstance(content, static.StaticContent) and content.sha:
+        return content.sha
+    sha = hashlib.sha1()
+    if isinstance(content, static.StaticContent):
+        for chunk in content.iter_chunks():
+            sha.update(chunk)
+    else:
+        sha.update(content)
+    return sha.hexdigest()
+
+
+@contextlib.contextmanager
+def open_content(content):
+    """Yields a file object from which content can be uploaded."""
+    if isinstance(content, static.StaticContent):
+        with open(content.path, 'rb') as fp:
+            yield fp
+    else:
+        fp = cStringIO.StringIO(content)
+        yield fp
+        fp.close()
+
+
+def upload_multipart(bucket, path, content, manifest, url, headers=None,
+                     policy=None, part_size=DEFAULT_PART_SIZE):
+    """Uploads content to an S3 key in parts, resuming earlier uploads."""
+    size = get_size(content)
+    sha = get_sha(content)
+    record = manifest.get(url, sha, size)
+    resumed = record is not None
+    if resumed:
+        upload = multipart.MultiPartUpload(bucket)
+        upload.key_name = path
+        upload.id = record['id']
+        logging.info('Resuming upload: {}'.format(url))
+    else:
+        upload = retry(bucket.initiate_multipart_upload, path,
+                       headers=headers, policy=policy)
+        record = manifest.start(url, sha, size, upload.id)
+    completed = set(record['parts'])
+    num_parts = max(1, (size + part_size - 1) // part_size)
+    with open_content(content) as fp:
+        for part_num in range(1, num_parts + 1):
+            if part_num in completed:
+                continue
+            offset = (part_num - 1) * part_size
+
+            def _upload_part():
+                fp.seek(offset)
+                upload.upload_part_from_file(
+                    fp, part_num, size=min(part_size, size - offset))
+            try:
+                retry(_upload_part)
+            except boto.exception.S3ResponseError as e:
+                if not resumed or e.status != 404:
+                    raise
+                # The interrupted upload expired or was aborted.
+                manifest.finish(url)
+                return upload_multipart(
+                    bucket, path, content, manifest, url, headers=headers,
+                    policy=policy, part_size=part_size)
+            manifest.add_part(url, part_num)
+    retry(upload.complete_upload)
+    manifest.finish(url)
@@ -0,0 +1,91 @@
+from . import cloud_uploads
+from boto.s3 import multipart
+from grow.pods import pods
+from grow.pods import storage
+import boto
+import mock
+import shutil
+import tempfile
+import unittest
+
+
+class FakeUpload(object):
+
+    def __init__(self, parts, fail_at=None):
+        self.id = 'upload-id'
+        self.parts = parts
+        self.fail_at = fail_at
+        self.completed = False
+
+    def upload_part_from_file(self, fp, part_num, size=None):
+        if part_num == self.fail_at:
+            self.fail_at = None
+            raise KeyboardInterrupt()
+        self.parts[part_num] = fp.read(size)
+
+    def complete_upload(self):
+        self.completed = True
+
+
+class CloudUploadsTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.dir_path = tempfile.mkdtemp()
+        self.pod = pods.Pod(self.dir_path, storage=storage.FileStorage)
+
+    def tearDown(self):
+        shutil.rmtree(self.dir_path)
+
+    @mock.patch.object(cloud_uploads, 'RETRY_DELAY', 0)
+    def test_retry(self):
+        calls = []
+
+        def func():
+            calls.append(1)
+            if len(calls) < 3:
+                raise boto.exception.S3ResponseError(503, 'Unavailable')
+            return 'done'
+
+        self.assertEqual('done', cloud_uploads.retry(func))
+        self.assertEqual(3, len(calls))
+
+        def not_found():
+            calls.append(1)
+            raise boto.exception.S3ResponseError(404, 'Not Found')
+
+        del calls[:]
+        self.assertRaises(
+            boto.exception.S3ResponseError, cloud_uploads.retry, not_found)
+        self.assertEqual(1, len(calls))
+
+    def test_upload_multipart_resume(self):
+        parts = {}
+        upload = FakeUpload(parts, fail_at=2)
+        bucket = mock.Mock()
+        bucket.initiate_multipart_upload.return_value = upload
+        manifest = cloud_uploads.UploadManifest(self.pod, 'test')
+        content = 'aabbc'
+
+        # An interrupted upload records the completed parts.
+        self.assertRaises(
+            KeyboardInterrupt, cloud_uploads.upload_multipart, bucket,
+            'file.txt', content, manifest, 's3://bucket/file.txt',
+            part_size=2)
+        self.assertEqual({1: 'aa'}, parts)
+
+        # The next deploy resumes the upload from the persisted manifest.
+        manifest = cloud_uploads.UploadManifest(self.pod, 'test')
+        with mock.patch.object(multipart, 'MultiPartUpload') as upload_cls:
+            upload_cls.return_value = upload
+            cloud_uploads.upload_multipart(
+                bucket, 'file.txt', content, manifest,
+                's3://bucket/file.txt', part_size=2)
+        self.assertEqual(1, bucket.initiate_multipart_upload.call_count)
+        self.assertEqual({1: 'aa', 2: 'bb', 3: 'c'}, parts)
+        self.assertTrue(upload.completed)
+        manifest = cloud_uploads.UploadManifest(self.pod, 'test')
+        self.assertIsNone(manifest.get('s3://bucket/file.txt', 'sha', 5))
+
+
+if __name__ == '__main__':
+    unittest.main()
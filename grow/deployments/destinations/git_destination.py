@@ -1,6 +1,16 @@
+"""Destination committing files to a branch of a Git repository.
+
+By default, files are written to the working tree and committed through the
+index. With `fast_import` set, the deploy commit is built by streaming blobs
+to `git fast-import` on top of the branch's last commit instead, so that the
+working tree is neither checked out nor updated and unchanged files are never
+re-hashed.
+"""
+
 from . import base
 from grow.common import utils as common_utils
 from grow.pods import env
+from grow.pods import static
 from grow.pods.storage import storage as storage_lib
 from protorpc import messages
 import logging
@@ -9,6 +19,7 @@ import re
 import shutil
 import subprocess
 import tempfile
+import threading
 
 
 ONLINE_REPO_REGEX = \
@@ -21,18 +32,115 @@ class Config(messages.Message):
     branch = messages.StringField(3, default='master')
     root_dir = messages.StringField(4, default='')
     keep_control_dir = messages.BooleanField(5, default=False)
+    fast_import = messages.BooleanField(6, default=False)
+
+
+class FastImport(object):
+    """Builds a commit on a branch by streaming to `git fast-import`."""
+
+    def __init__(self, repo_path, branch, parent=None):
+        self.repo_path = repo_path
+        self.branch = branch
+        self.parent = parent
+        self.adds = {}
+        self.deletes = set()
+        self._lock = threading.Lock()
+        self._num_marks = 0
+        self._process = subprocess.Popen(
+            ['git', 'fast-import', '--quiet', '--date-format=now'], cwd=repo_path,
+            stdin=subprocess.PIPE)
+
+    def _git(self, *args):
+        process = subprocess.Popen(
+            ('git',) + args, cwd=self.repo_path, stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE)
+        stdout, stderr = process.communicate()
+        if process.returncode != 0:
+            raise base.CommandError(stderr)
+        return stdout
+
+    def read(self, path):
+        """Returns the content of a file in the parent commit."""
+        if self.parent is None:
+            raise IOError('{} does not exist.'.format(path))
+        try:
+            return self._git('cat-file', 'blob', '{}:{}'.format(
+                self.parent, path))
+        except base.CommandError:
+            raise IOError('{} does not exist.'.format(path))
+
+    def add(self, path, content):
+        """Streams the content of a file to the commit."""
+        stdin = self._process.stdin
+        with self._lock:
+            self._num_marks += 1
+            mark = self._num_marks
+            if isinstance(content, static.StaticContent):
+                size = os.path.getsize(content.path)
+                stdin.write('blob\nmark :{}\ndata {}\n'.format(mark, size))
+                for chunk in content.iter_chunks():
+                    stdin.write(chunk)
+            else:
+                stdin.write('blob\nmark :{}\ndata {}\n'.format(
+                    mark, len(content)))
+                stdin.write(content)
+            stdin.write('\n')
+            self.adds[path] = mark
+            self.deletes.discard(path)
+
+    def delete(self, path):
+        with self._lock:
+            self.adds.pop(path, None)
+            self.deletes.add(path)
+
+    def _quote(self, path):
+        if isinstance(path, unicode):
+            path = path.encode('utf-8')
+        if path.startswith('"') or '\n' in path:
+            return '"{}"'.format(
+                path.replace('\\', '\\\\').replace('"', '\\"')
+                .replace('\n', '\\n'))
+        return path
+
+    def commit(self, message, name, email):
+        """Commits the files streamed so far to the branch."""
+        if isinstance(message, unicode):
+            message = message.encode('utf-8')
+        committer = u'{} <{}> now'.format(name, email)
+        lines = [
+            'commit refs/heads/{}'.format(self.branch),
+            'committer {}'.format(committer.encode('utf-8')),
+            'data {}'.format(len(message)),
+            message,
+        ]
+        if self.parent is not None:
+            lines.append('from {}'.format(self.parent))
+        for path in sorted(self.deletes):
+            lines.append('D {}'.format(self._quote(path)))
+        for path, mark in sorted(self.adds.iteritems()):
+            lines.append('M 100644 :{} {}'.format(mark, self._quote(path)))
+        self._process.stdin.write('\n'.join(lines) + '\n\n')
+        self.close()
+
+    def close(self):
+        """Waits for the blobs and commit to be written."""
+        self._process.stdin.close()
+        if self._process.wait() != 0:
+            raise base.CommandError('git fast-import failed.')
 
 
 class GitDestination(base.BaseDestination):
     KIND = 'git'
     Config = Config
     storage = storage_lib.FileStorage
+    supports_static_content = True
 
     def __init__(self, *args, **kwargs):
         super(GitDestination, self).__init__(*args, **kwargs)
         self.adds = set()
         self.deletes = set()
         self._original_branch_name = None
+        self._fast_import = None
         self._git = common_utils.get_git()
 
     def __str__(self):
@@ -67,7 +175,37 @@ class GitDestination(base.BaseDestination):
             if e.status == 128:
                 self.repo.git.checkout(branch)
 
+    def _get_tree_path(self, path):
+        return os.path.join(self.config.root_dir.lstrip('/'), path.lstrip('/'))
+
+    def _start_fast_import(self):
+        branch = self.config.branch
+        ref = 'refs/heads/{}'.format(branch)
+        if self.is_remote:
+            self.remote = self._git.remote.Remote.add(self.repo, 'origin', self.config.repo)
+            try:
+                logging.info('Fetching {}...'.format(branch))
+                self.repo.git.fetch(
+                    '--update-head-ok', 'origin', '{}:{}'.format(ref, ref))
+            except self._git.exc.GitCommandError as e:
+                # Pass on this error, which will create a new branch upon pushing.
+                if "Couldn't find remote ref" not in e.stderr:
+                    raise
+        elif (not self.repo.bare and not self.repo.head.is_detached
+              and self.repo.active_branch.name == branch):
+            logging.warning(
+                'The working tree of {} is not updated by fast-import deployments'
+                ' to its checked out branch.'.format(self.repo_path))
+        try:
+            parent = self.repo.git.rev_parse('--verify', '{}^{{commit}}'.format(ref))
+        except self._git.exc.GitCommandError:
+            parent = None
+        self._fast_import = FastImport(self.repo_path, branch, parent=parent)
+
     def prelaunch(self, dry_run=False):
+        if self.config.fast_import:
+            self._start_fast_import()
+            return
         self._original_branch_name = self.repo.active_branch.name
         self._checkout()
         if self.is_remote:
@@ -91,7 +229,27 @@ class GitDestination(base.BaseDestination):
         content = open(commit_message_path).read()
         return content
 
+    def _finish_fast_import(self, dry_run=False):
+        fast_import = self._fast_import
+        self._fast_import = None
+        if dry_run or (not fast_import.adds and not fast_import.deletes):
+            if not dry_run:
+                logging.info('No changes, aborting.')
+            fast_import.close()
+        else:
+            committer = self._git.Actor.committer(self.repo.config_reader())
+            fast_import.commit(
+                self.create_commit_message(), committer.name, committer.email)
+            if self.is_remote:
+                logging.info('Pushing to origin...')
+                self.repo.git.push('origin', self.config.branch)
+        if self.is_remote:
+            shutil.rmtree(self.repo_path)
+
     def postlaunch(self, dry_run=False):
+        if self._fast_import is not None:
+            return self._finish_fast_import(dry_run=dry_run)
+
         if dry_run:
             if self.is_remote:
                 shutil.rmtree(self.repo_path)
@@ -117,6 +275,8 @@ class GitDestination(base.BaseDestination):
             self._checkout(self._original_branch_name)
 
     def read_file(self, path):
+        if self._fast_import is not None:
+            return self._fast_import.read(self._get_tree_path(path))
         path = os.path.join(self.repo_path, self.config.root_dir.lstrip('/'),
                             path.lstrip('/'))
         return self.storage.read(path)
@@ -125,9 +285,16 @@ class GitDestination(base.BaseDestination):
         path = os.path.join(self.control_dir, path.lstrip('/'))
         out_path = self.delete_file(path)
         # Control files should remain in the index, for now.
+        if self._fast_import is not None:
+            self._fast_import.deletes.discard(out_path)
+            return
         self.deletes.remove(out_path)
 
     def delete_file(self, path):
+        if self._fast_import is not None:
+            tree_path = self._get_tree_path(path)
+            self._fast_import.delete(tree_path)
+            return tree_path
         out_path = os.path.join(self.repo_path, self.config.root_dir.lstrip('/'),
                                 path.lstrip('/'))
         self.storage.delete(out_path)
@@ -139,9 +306,15 @@ class GitDestination(base.BaseDestination):
     def write_file(self, path, content):
         if isinstance(content, unicode):
             content = content.encode('utf-8')
+        if self._fast_import is not None:
+            self._fast_import.add(self._get_tree_path(path), content)
+            return
         out_path = os.path.join(self.repo_path, self.config.root_dir.lstrip('/'),
                                 path.lstrip('/'))
-        self.storage.write(out_path, content)
+        if isinstance(content, static.StaticContent):
+            self.storage.copy_file(content.path, out_path)
+        else:
+            self.storage.write(out_path, content)
         self.adds.add(out_path)
         if out_path in self.deletes:
             self.deletes.remove(out_path)
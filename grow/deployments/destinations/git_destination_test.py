@@ -1,5 +1,7 @@
 from grow.common import utils
 from grow.deployments import stats
+from grow.pods import pods
+from grow.pods import storage
 from grow.testing import testing
 from nose.plugins import skip
 import os
@@ -10,7 +12,7 @@ import unittest
 
 class GitDestinationTestCase(unittest.TestCase):
 
-    def _test_deploy(self, repo_url):
+    def _test_deploy(self, repo_url, fast_import=False):
         pod = testing.create_pod()
         pod.write_yaml('/podspec.yaml', {
             'deployments': {
@@ -18,6 +20,7 @@ class GitDestinationTestCase(unittest.TestCase):
                     'destination': 'git',
                     'repo': repo_url,
                     'branch': 'gh-pages',
+                    'fast_import': fast_import,
                 },
             },
         })
@@ -33,6 +36,7 @@ class GitDestinationTestCase(unittest.TestCase):
         stats_obj = stats.Stats(pod, paths_to_contents=paths_to_contents)
         deployment.deploy(paths_to_contents, stats=stats_obj, repo=repo,
                           confirm=False, test=False)
+        return pod
 
     def test_deploy_local(self):
         if utils.is_appengine():
@@ -43,6 +47,39 @@ class GitDestinationTestCase(unittest.TestCase):
         git.Repo.init(path)
         self._test_deploy(path)
 
+    def test_deploy_fast_import(self):
+        if utils.is_appengine():
+            text = 'Skipping Git destination test on GAE.'
+            raise skip.SkipTest(text)
+        import git
+        path = tempfile.mkdtemp()
+        repo = git.Repo.init(path)
+        pod = self._test_deploy(path, fast_import=True)
+        # The working tree is left untouched.
+        self.assertEqual(['.git'], os.listdir(path))
+        content = repo.git.show('gh-pages:page/index.html')
+        self.assertEqual(pod.read_file('/views/base.html'), content)
+        self.assertIn('.grow/index.gz',
+                      repo.git.ls_tree('-r', '--name-only', 'gh-pages'))
+
+        # Later deploys commit on top of the branch.
+        pod.write_file('/views/base.html', 'changed')
+        pod.write_yaml('/content/pages/page.yaml', {
+            '$path': '/{base}/moved/',
+            '$view': '/views/base.html',
+        })
+        pod = pods.Pod(pod.root, storage=storage.FileStorage)
+        deployment = pod.get_deployment('git')
+        paths_to_contents = deployment.dump(pod)
+        stats_obj = stats.Stats(pod, paths_to_contents=paths_to_contents)
+        deployment.deploy(paths_to_contents, stats=stats_obj, confirm=False,
+                          test=False)
+        self.assertEqual('changed',
+                         repo.git.show('gh-pages:page/moved/index.html'))
+        files = repo.git.ls_tree('-r', '--name-only', 'gh-pages').split()
+        self.assertNotIn('page/index.html', files)
+        self.assertEqual(2, len(repo.git.rev_list('gh-pages').split()))
+
     def test_deploy_online(self):
         online_url = os.getenv('GROW_TEST_REPO_URL')
         if not online_url:
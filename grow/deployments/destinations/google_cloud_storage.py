@@ -1,6 +1,8 @@
 from . import base
+from . import cloud_uploads
 from boto import auth_handler
 from boto.gs import key
+from boto.gs import resumable_upload_handler
 from boto.s3 import connection
 from gcs_oauth2_boto_plugin import oauth2_client
 from gcs_oauth2_boto_plugin import oauth2_helper
@@ -9,7 +11,6 @@ from grow.common import utils
 from grow.pods import env
 from protorpc import messages
 import boto
-import cStringIO
 import gcs_oauth2_boto_plugin
 import httplib2
 import logging
@@ -42,18 +43,40 @@ class Config(messages.Message):
     not_found_page = messages.StringField(11, default='404.html')
     oauth2 = messages.BooleanField(12, default=False)
     headers = messages.MessageField(HeaderMessage, 13, repeated=True)
+    resumable_threshold = messages.IntegerField(
+        14, default=cloud_uploads.DEFAULT_MULTIPART_THRESHOLD)
+    max_connections = messages.IntegerField(
+        15, default=cloud_uploads.DEFAULT_MAX_CONNECTIONS)
 
 
 
 class GoogleCloudStorageDestination(base.BaseDestination):
     KIND = 'gcs'
     Config = Config
+    supports_static_content = True
 
     def __str__(self):
         return 'gs://{}'.format(self.config.bucket)
 
     @utils.cached_property
     def bucket(self):
+        return self._connect()
+
+    @property
+    def max_workers(self):
+        return self.config.max_connections
+
+    @utils.cached_property
+    def bucket_pool(self):
+        return cloud_uploads.BucketPool(
+            self._connect, max_size=self.config.max_connections)
+
+    @utils.cached_property
+    def upload_manifest(self):
+        return cloud_uploads.UploadManifest(
+            self.pod, 'gcs-{}'.format(self.config.bucket))
+
+    def _connect(self):
         if self.config.oauth2:
             enable_oauth2_auth_handler()
         gs_connection = boto.connect_gs(
@@ -71,11 +94,11 @@ class GoogleCloudStorageDestination(base.BaseDestination):
                 return gs_connection.create_bucket(self.config.bucket)
             raise
 
-    def dump(self, pod):
-        pod.set_env(self.get_env())
-        return pod.dump(
-            suffix=self.config.main_page_suffix,
-            append_slashes=self.config.redirect_trailing_slashes)
+    def _get_dump_options(self):
+        return {
+            'suffix': self.config.main_page_suffix,
+            'append_slashes': self.config.redirect_trailing_slashes,
+        }
 
     def prelaunch(self, dry_run=False):
         if dry_run:
@@ -90,37 +113,49 @@ class GoogleCloudStorageDestination(base.BaseDestination):
         return self.write_file(path, content, policy='private')
 
     def read_file(self, path):
-        file_key = key.Key(self.bucket)
-        file_key.key = path
-        try:
-            return file_key.get_contents_as_string()
-        except boto.exception.GSResponseError as e:
-            if e.status != 404:
-                raise
-            raise IOError('File not found: {}'.format(path))
+        with self.bucket_pool.bucket() as bucket:
+            file_key = key.Key(bucket)
+            file_key.key = path
+            try:
+                return cloud_uploads.retry(file_key.get_contents_as_string)
+            except boto.exception.GSResponseError as e:
+                if e.status != 404:
+                    raise
+                raise IOError('File not found: {}'.format(path))
 
     def delete_file(self, path):
-        file_key = key.Key(self.bucket)
-        file_key.key = path.lstrip('/')
-        self.bucket.delete_key(file_key)
+        with self.bucket_pool.bucket() as bucket:
+            file_key = key.Key(bucket)
+            file_key.key = path.lstrip('/')
+            cloud_uploads.retry(bucket.delete_key, file_key)
 
     def write_file(self, path, content, policy='public-read'):
         if isinstance(content, unicode):
             content = content.encode('utf-8')
         path = path.lstrip('/')
         path = path if path != '' else self.config.main_page_suffix
-        fp = cStringIO.StringIO()
-        fp.write(content)
-        size = fp.tell()
-        try:
-            file_key = key.Key(self.bucket)
+        size = cloud_uploads.get_size(content)
+        headers = self._get_headers_for_path(path)
+        with self.bucket_pool.bucket() as bucket, \
+                cloud_uploads.open_content(content) as fp:
+            file_key = key.Key(bucket)
             file_key.key = path
-            headers = self._get_headers_for_path(path)
-            file_key.set_contents_from_file(
-                fp, headers=headers, replace=True, policy=policy, size=size,
-                rewind=True)
-        finally:
-            fp.close()
+            if size >= self.config.resumable_threshold:
+                # Large files are uploaded resumably, tracking the upload in
+                # the pod so that an interrupted deploy resumes it.
+                url = 'gs://{}/{}'.format(self.config.bucket, path)
+                tracker_path = self.upload_manifest.get_tracker_path(
+                    url, cloud_uploads.get_sha(content))
+                handler = resumable_upload_handler.ResumableUploadHandler(
+                    tracker_file_name=tracker_path,
+                    num_retries=cloud_uploads.MAX_RETRIES)
+                file_key.set_contents_from_file(
+                    fp, headers=headers, replace=True, policy=policy,
+                    res_upload_handler=handler, size=size, rewind=True)
+                return
+            cloud_uploads.retry(
+                file_key.set_contents_from_file, fp, headers=headers,
+                replace=True, policy=policy, size=size, rewind=True)
 
     def _get_headers_for_path(self, path):
         mimetype = mimetypes.guess_type(path)[0] or 'text/html'
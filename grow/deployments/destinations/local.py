@@ -1,6 +1,7 @@
 from . import base
 from protorpc import messages
 from grow.pods import env
+from grow.pods import static
 from grow.pods.storage import storage as storage_lib
 import os
 
@@ -12,12 +13,14 @@ class Config(messages.Message):
     before_deploy = messages.StringField(4, repeated=True)
     after_deploy = messages.StringField(5, repeated=True)
     control_dir = messages.StringField(6)
+    link_static_files = messages.BooleanField(7, default=False)
 
 
 class LocalDestination(base.BaseDestination):
     KIND = 'local'
     Config = Config
     storage = storage_lib.FileStorage
+    supports_static_content = True
 
     def __str__(self):
         return os.path.abspath(os.path.join(self.out_dir))
@@ -26,18 +29,36 @@ class LocalDestination(base.BaseDestination):
     def out_dir(self):
         return os.path.expanduser(self.config.out_dir)
 
+    def _get_ignored_dirs(self):
+        return [self.out_dir]
+
+    def _get_out_path(self, path):
+        # Paths of diffs are unicode, and are written as UTF-8 file names
+        # whatever the encoding of the file system.
+        out_dir = self.out_dir
+        if isinstance(out_dir, unicode):
+            out_dir = out_dir.encode('utf-8')
+        if isinstance(path, unicode):
+            path = path.encode('utf-8')
+        return os.path.join(out_dir, path.lstrip('/'))
+
     def read_file(self, path):
-        path = os.path.join(self.out_dir, path.lstrip('/'))
-        return self.storage.read(path)
+        return self.storage.read(self._get_out_path(path))
 
     def delete_file(self, path):
-        out_path = os.path.join(self.out_dir, path.lstrip('/'))
-        self.storage.delete(out_path)
+        self.storage.delete(self._get_out_path(path))
 
     def write_file(self, path, content):
+        out_path = self._get_out_path(path)
+        if isinstance(content, static.StaticContent):
+            self.storage.copy_file(
+                content.path, out_path, link=self.config.link_static_files)
+            return
         if isinstance(content, unicode):
             content = content.encode('utf-8')
-        out_path = os.path.join(self.out_dir, path.lstrip('/'))
+        if os.path.exists(out_path) and os.stat(out_path).st_nlink > 1:
+            # Never write through a link to a static file in the pod.
+            os.remove(out_path)
         fp = self.storage.write(out_path, content)
         fp.close()
 
@@ -1,4 +1,13 @@
 from . import local
+from grow.deployments import indexes
+from grow.deployments import stats
+from grow.pods import incremental
+from grow.pods import pods
+from grow.pods import storage
+from grow.testing import testing
+import mock
+import os
+import tempfile
 import unittest
 
 
@@ -10,6 +19,179 @@ class LocalDestinationTestCase(unittest.TestCase):
         # Weakly verify out_dir is expanded.
         self.assertNotIn('~', destination.out_dir)
 
+    def test_deploy_stream(self):
+        dir_path = testing.create_test_pod_dir()
+        pod = pods.Pod(dir_path, storage=storage.FileStorage)
+        out_dir = tempfile.mkdtemp()
+        config = local.Config(out_dir=out_dir)
+        destination = local.LocalDestination(config)
+        destination.pod = pod
+        paths_to_contents = destination.dump_iter(pod)
+        stats_obj = stats.Stats(pod, paths_to_contents=paths_to_contents)
+        diff = destination.deploy(paths_to_contents, stats=stats_obj,
+                                  confirm=False, test=False)
+        expected = pod.dump()
+        self.assertEqual(expected, destination.dump(pod))
+        self.assertEqual(len(expected), len(diff.adds))
+        for path, content in expected.iteritems():
+            if isinstance(content, unicode):
+                content = content.encode('utf-8')
+            out_path = os.path.join(out_dir, path.lstrip('/'))
+            self.assertEqual(content, open(out_path).read())
+        counts = dict((message.ext, message.count)
+                      for message in stats_obj.get_num_files_per_type())
+        self.assertEqual(len(expected), sum(counts.values()))
+
+        # Deploying again only writes the changed files.
+        pod.write_file('/views/base.html', 'changed')
+        diff = destination.deploy(destination.dump_iter(pod), confirm=False,
+                                  test=False)
+        self.assertTrue(diff.edits)
+        self.assertFalse(diff.adds)
+        self.assertFalse(diff.deletes)
+        out_path = os.path.join(out_dir, 'about', 'index.html')
+        self.assertEqual('changed', open(out_path).read())
+
+    def test_deploy_non_ascii_path(self):
+        out_dir = tempfile.mkdtemp()
+        config = local.Config(out_dir=out_dir)
+        pod = testing.create_pod()
+        pod.write_yaml('/podspec.yaml', {})
+        destination = local.LocalDestination(config)
+        destination.pod = pod
+        paths_to_contents = [('/caf\xc3\xa9.html', 'cafe')]
+        stats_obj = stats.Stats(destination.pod, full=False)
+        diff = destination.deploy(
+            iter(paths_to_contents), stats=stats_obj, confirm=False,
+            test=False)
+        self.assertEqual([u'/caf\xe9.html'], [m.path for m in diff.adds])
+        self.assertEqual(
+            'cafe', open(os.path.join(out_dir, 'caf\xc3\xa9.html')).read())
+
+        # Unchanged files with non-ASCII paths are not deployed again.
+        destination = local.LocalDestination(config)
+        destination.pod = pod
+        self.assertIsNone(destination.deploy(
+            iter(paths_to_contents), confirm=False, test=False))
+        self.assertIsNone(destination.deploy(
+            dict(paths_to_contents), confirm=False, test=False))
+
+    def test_remote_index(self):
+        dir_path = testing.create_test_pod_dir()
+        pod = pods.Pod(dir_path, storage=storage.FileStorage)
+        out_dir = tempfile.mkdtemp()
+        config = local.Config(out_dir=out_dir)
+        destination = local.LocalDestination(config)
+        destination.pod = pod
+        paths_to_contents = destination.dump(pod)
+        stats_obj = stats.Stats(pod, paths_to_contents=paths_to_contents)
+        diff = destination.deploy(paths_to_contents, stats=stats_obj,
+                                  confirm=False, test=False)
+        self.assertEqual(0, diff.num_nochanges)
+        self.assertFalse(diff.indexes[1].files)
+
+        # The index is read from the local cache while its tag is unchanged.
+        destination = local.LocalDestination(config)
+        destination.pod = pod
+        with mock.patch.object(
+                destination, 'read_control_file',
+                wraps=destination.read_control_file) as read_control_file:
+            index = destination._get_remote_index()
+        self.assertEqual(
+            [mock.call(destination.index_etag_basename),
+             mock.call(destination.legacy_index_basename)],
+            read_control_file.call_args_list)
+        self.assertEqual(len(diff.adds), len(index))
+
+        # The legacy index is kept up to date for older versions of Grow.
+        legacy_index = indexes.Index.from_string(
+            destination.read_control_file(destination.legacy_index_basename))
+        self.assertEqual(
+            index.get_paths_to_shas(),
+            indexes.CompactIndex.from_index(legacy_index).get_paths_to_shas())
+
+        # Legacy indexes written by older versions of Grow are used instead.
+        legacy_index = indexes.Index.create({'/foo.html': 'foo'})
+        destination.write_file('/foo.html', 'foo')
+        destination.write_control_file(
+            destination.legacy_index_basename,
+            indexes.Index.to_string(legacy_index))
+        self.assertEqual(
+            ['/foo.html'], destination._get_remote_index().paths)
+        self.assertIsNone(destination._index_etag)
+        diff = destination.deploy(destination.dump(pod), stats=stats_obj,
+                                  confirm=False, test=False)
+        self.assertEqual(['/foo.html'], [m.path for m in diff.deletes])
+        self.assertEqual(len(diff.adds), len(destination._get_remote_index()))
+        self.assertIsNotNone(destination._index_etag)
+
+        # Indexes that do not match their tags are not used.
+        pod.delete_file(destination._index_cache_path)
+        destination.write_control_file(
+            destination.index_basename, indexes.CompactIndex.create(
+                {'/bar.html': 'bar'}).to_string())
+        self.assertEqual(len(diff.adds), len(destination._get_remote_index()))
+        self.assertIsNone(destination._index_etag)
+
+    def test_deploy_link_static_files(self):
+        dir_path = testing.create_test_pod_dir()
+        pod = pods.Pod(dir_path, storage=storage.FileStorage)
+        out_dir = tempfile.mkdtemp()
+        config = local.Config(out_dir=out_dir, link_static_files=True)
+        destination = local.LocalDestination(config)
+        destination.pod = pod
+        paths_to_contents = destination.dump_iter(pod)
+        stats_obj = stats.Stats(pod, paths_to_contents=paths_to_contents)
+        destination.deploy(paths_to_contents, stats=stats_obj, confirm=False,
+                           test=False)
+        source_path = pod.abs_path('/public/file.txt')
+        out_path = os.path.join(out_dir, 'public', 'file.txt')
+        self.assertTrue(os.path.samefile(source_path, out_path))
+
+        # Writes to a linked output never modify the pod.
+        content = pod.read_file('/public/file.txt')
+        destination.write_file('/public/file.txt', 'changed')
+        self.assertEqual(content, pod.read_file('/public/file.txt'))
+        self.assertEqual('changed', open(out_path).read())
+
+    def test_deploy_incremental(self):
+        dir_path = testing.create_test_pod_dir()
+        pod = pods.Pod(dir_path, storage=storage.FileStorage)
+        out_dir = tempfile.mkdtemp()
+        config = local.Config(out_dir=out_dir)
+        destination = local.LocalDestination(config)
+        destination.pod = pod
+        paths_to_contents = destination.dump_iter(pod, incremental=True)
+        stats_obj = stats.Stats(pod, paths_to_contents=paths_to_contents)
+        expected = destination.deploy(
+            paths_to_contents, stats=stats_obj, confirm=False, test=False)
+
+        # Only the changed document is rendered and written again.
+        pod = pods.Pod(dir_path, storage=storage.FileStorage)
+        content = pod.read_file('/content/pages/intro.md')
+        pod.write_file('/content/pages/intro.md', content + '\nChanged.\n')
+        destination = local.LocalDestination(config)
+        destination.pod = pod
+        paths_to_contents = list(destination.dump_iter(pod, incremental=True))
+        rendered = [path for path, content in paths_to_contents
+                    if content is not incremental.UNCHANGED]
+        self.assertIn('/intro/index.html', rendered)
+        self.assertNotIn('/about/index.html', rendered)
+        self.assertNotIn('/de/contact-us/index.html', rendered)
+        diff = destination.deploy(
+            paths_to_contents, confirm=False, test=False)
+        self.assertFalse(diff.adds)
+        self.assertFalse(diff.deletes)
+        self.assertEqual(
+            len(expected.adds),
+            len(diff.edits) + diff.num_nochanges)
+
+        # Without the manifest, every route is rendered.
+        destination.delete_control_file(destination.build_manifest_basename)
+        paths_to_contents = list(destination.dump_iter(pod, incremental=True))
+        for path, content in paths_to_contents:
+            self.assertIsNot(incremental.UNCHANGED, content)
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -1,9 +1,30 @@
+"""Destination deploying files to a host over SSH.
+
+Files are written over several SFTP channels opened on a single SSH
+connection, one for each deploy thread, so that transfers are pipelined
+rather than waiting on each other's round trips. The directories needed by a
+diff are created up front, using a single `mkdir -p` command where the host
+allows it, and directories known to exist are cached.
+
+With `archive` set, the changed files are instead uploaded as one tar archive
+that is extracted on the host, and deleted files are removed with `rm`.
+"""
+
 from . import base
 from grow.common import utils
 from grow.pods import env
+from grow.pods import static
 from protorpc import messages
-import errno
+import cStringIO
+import itertools
+import logging
 import os
+import pipes
+import tarfile
+import tempfile
+import threading
+import time
+import uuid
 try:
     import paramiko
 except ImportError:
@@ -11,6 +32,9 @@ except ImportError:
     # https://github.com/paramiko/paramiko/pull/334
     paramiko = None
 
+# Number of paths passed to a single remote command.
+COMMAND_BATCH_SIZE = 500
+
 
 class Config(messages.Message):
     host = messages.StringField(1)
@@ -19,12 +43,59 @@ class Config(messages.Message):
     username = messages.StringField(4)
     env = messages.MessageField(env.EnvConfig, 5)
     keep_control_dir = messages.BooleanField(6, default=False)
+    channels = messages.IntegerField(7, default=8)
+    archive = messages.BooleanField(8, default=False)
+
+
+def get_parents(path):
+    """Returns a directory path and its parents, outermost first."""
+    if path != '/':
+        path = path.rstrip('/')
+    parents = []
+    while path not in ('', '/'):
+        parents.append(path)
+        path = os.path.dirname(path)
+    return list(reversed(parents))
+
+
+def write_archive(fp, paths_to_contents):
+    """Writes a stream of (path, content) pairs to a tar archive.
+
+    Symlinked static files are archived as the files they link to, as they
+    are uploaded without an archive, and every file gets the same mode.
+    """
+    archive = tarfile.open(fileobj=fp, mode='w', dereference=True)
+    try:
+        for path, content in paths_to_contents:
+            name = path.lstrip('/')
+            if isinstance(name, unicode):
+                name = name.encode('utf-8')
+            if isinstance(content, static.StaticContent):
+                info = archive.gettarinfo(content.path, arcname=name)
+                info.mode = 0644
+                with open(content.path, 'rb') as static_fp:
+                    archive.addfile(info, static_fp)
+                continue
+            if isinstance(content, unicode):
+                content = content.encode('utf-8')
+            info = tarfile.TarInfo(name)
+            info.size = len(content)
+            info.mode = 0644
+            info.mtime = time.time()
+            archive.addfile(info, cStringIO.StringIO(content))
+    finally:
+        archive.close()
+
+
+def _iter_batches(items, size=COMMAND_BATCH_SIZE):
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
 
 
 class ScpDestination(base.BaseDestination):
     KIND = 'scp'
     Config = Config
-    threaded = False
+    supports_static_content = True
 
     def __init__(self, *args, **kwargs):
         super(ScpDestination, self).__init__(*args, **kwargs)
@@ -36,47 +107,139 @@ class ScpDestination(base.BaseDestination):
         self.port = self.config.port
         self.root_dir = self.config.root_dir
         self.username = self.config.username
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._sftp_clients = []
+        self._dirs = set()
 
     def __str__(self):
         return 'scp://{}:{}'.format(self.config.host, self.config.root_dir)
 
+    @property
+    def max_workers(self):
+        return self.config.channels
+
+    @property
+    def sftp(self):
+        """The SFTP client of the current thread."""
+        sftp = getattr(self._local, 'sftp', None)
+        if sftp is None:
+            sftp = self.ssh.open_sftp()
+            self._local.sftp = sftp
+            with self._lock:
+                self._sftp_clients.append(sftp)
+        return sftp
+
     def prelaunch(self, dry_run=False):
         self.ssh.load_system_host_keys()
         self.ssh.connect(self.host, username=self.username, port=self.port)
-        self.sftp = self.ssh.open_sftp()
 
     def postlaunch(self, dry_run=False):
-        self.sftp.close()
+        with self._lock:
+            for sftp in self._sftp_clients:
+                sftp.close()
+            self._sftp_clients = []
+            self._dirs = set()
+        self._local = threading.local()
         self.ssh.close()
 
+    def _get_remote_path(self, path):
+        return os.path.join(self.root_dir, path.lstrip('/'))
+
     def read_file(self, path):
-        path = os.path.join(self.root_dir, path.lstrip('/'))
+        path = self._get_remote_path(path)
         fp = self.sftp.open(path)
         content = fp.read()
         fp.close()
         return content
 
     def delete_file(self, path):
-        path = os.path.join(self.root_dir, path.lstrip('/'))
+        path = self._get_remote_path(path)
         self.sftp.remove(path)
 
     def write_file(self, path, content):
         if isinstance(content, unicode):
             content = content.encode('utf-8')
-        path = os.path.join(self.root_dir, path.lstrip('/'))
+        path = self._get_remote_path(path)
         self._mkdirs(os.path.dirname(path))
-        fp = self.sftp.open(path, 'w')
-        fp.write(content)
-        fp.close()
+        if isinstance(content, static.StaticContent):
+            self.sftp.put(content.path, path, confirm=False)
+            return content
+        self.sftp.putfo(cStringIO.StringIO(content), path, confirm=False)
         return content
 
+    def apply_diff(self, diff, paths_to_contents):
+        paths = [file_message.path
+                 for file_message in itertools.chain(diff.adds, diff.edits)]
+        self._make_dirs(
+            os.path.dirname(self._get_remote_path(path)) for path in paths)
+        if self.config.archive:
+            self._apply_archive(paths, diff.deletes, paths_to_contents)
+            return None
+        return super(ScpDestination, self).apply_diff(diff, paths_to_contents)
+
+    def _apply_archive(self, paths, deletes, paths_to_contents):
+        """Uploads files as one archive, which is extracted on the host."""
+        archive_path = self._get_remote_path(
+            '.grow-deploy-{}.tar'.format(uuid.uuid4().hex))
+        with tempfile.TemporaryFile() as fp:
+            write_archive(
+                fp, ((path, paths_to_contents[path]) for path in paths))
+            fp.seek(0)
+            logging.info('Uploading {} file(s) as an archive.'.format(
+                len(paths)))
+            self.sftp.putfo(fp, archive_path, confirm=False)
+        try:
+            self._exec('tar -xf {} -C {}'.format(
+                pipes.quote(archive_path), pipes.quote(self.root_dir or '.')))
+        finally:
+            self.sftp.remove(archive_path)
+        delete_paths = [self._get_remote_path(file_message.path)
+                        for file_message in deletes]
+        for batch in _iter_batches(delete_paths):
+            self._exec('rm -f -- {}'.format(
+                ' '.join(pipes.quote(path) for path in batch)))
+
+    def _exec(self, command):
+        """Runs a command on the host, raising `CommandError` on failure."""
+        _, stdout, stderr = self.ssh.exec_command(command)
+        if stdout.channel.recv_exit_status() != 0:
+            raise base.CommandError(stderr.read())
+        return stdout.read()
+
+    def _add_dirs(self, path):
+        with self._lock:
+            self._dirs.update(get_parents(path))
+
+    def _make_dirs(self, paths):
+        """Creates the directories that are not known to exist."""
+        with self._lock:
+            paths = sorted(set(paths) - self._dirs - set(['', '/']))
+        if not paths:
+            return
+        try:
+            for batch in _iter_batches(paths):
+                self._exec('mkdir -p -- {}'.format(
+                    ' '.join(pipes.quote(path) for path in batch)))
+        except (paramiko.SSHException, base.CommandError) as e:
+            # Hosts restricted to SFTP do not run commands.
+            logging.info('Creating directories over SFTP: {}'.format(e))
+            for path in paths:
+                self._mkdirs(path)
+            return
+        for path in paths:
+            self._add_dirs(path)
+
     def _mkdirs(self, path):
         """Recursively creates directories."""
-        base = ''
-        for part in path.split('/'):
-            base += part + '/'
+        for parent in get_parents(path):
+            with self._lock:
+                if parent in self._dirs:
+                    continue
             try:
-                self.sftp.lstat(base)
-            except IOError, e:
-                if e.errno == errno.ENOENT:
-                    self.sftp.mkdir(base)
+                self.sftp.mkdir(parent)
+            except IOError:
+                # Raises if the directory does not exist after all.
+                self.sftp.lstat(parent)
+            with self._lock:
+                self._dirs.add(parent)
@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+from . import scp
+from grow.deployments import messages
+from grow.pods import static
+import cStringIO
+import mock
+import os
+import tarfile
+import tempfile
+import unittest
+
+
+class ScpDestinationTestCase(unittest.TestCase):
+
+    def setUp(self):
+        config = scp.Config(host='example.com', root_dir='/var/www')
+        self.destination = scp.ScpDestination(config)
+        self.destination.ssh = mock.Mock()
+        self.commands = []
+
+        def exec_command(command):
+            self.commands.append(command)
+            stdout = mock.Mock()
+            stdout.channel.recv_exit_status.return_value = 0
+            return None, stdout, mock.Mock()
+
+        self.destination.ssh.exec_command.side_effect = exec_command
+
+    def test_get_parents(self):
+        self.assertEqual(['/var', '/var/www'], scp.get_parents('/var/www/'))
+        self.assertEqual(['foo', 'foo/bar'], scp.get_parents('foo/bar'))
+        self.assertEqual([], scp.get_parents(''))
+
+    def test_make_dirs(self):
+        self.destination._make_dirs(['/var/www/foo', '/var/www/foo/bar'])
+        self.assertEqual(
+            ["mkdir -p -- /var/www/foo /var/www/foo/bar"], self.commands)
+        sftp = self.destination.ssh.open_sftp.return_value
+        self.destination.write_file('/foo/bar/index.html', 'test')
+        self.assertFalse(sftp.mkdir.called)
+        self.assertFalse(sftp.lstat.called)
+
+        # Directories are created over SFTP if commands are unavailable.
+        self.destination._dirs = set()
+        self.destination.ssh.exec_command.side_effect = scp.paramiko.SSHException
+        sftp.mkdir.side_effect = [IOError, None, None]
+        self.destination._make_dirs(['/var/www/baz'])
+        self.assertEqual(
+            [mock.call('/var'), mock.call('/var/www'),
+             mock.call('/var/www/baz')],
+            sftp.mkdir.call_args_list)
+        sftp.lstat.assert_called_once_with('/var')
+
+    def test_apply_archive(self):
+        self.destination.config.archive = True
+        sftp = self.destination.ssh.open_sftp.return_value
+        uploaded = {}
+
+        def putfo(fp, path, confirm=True):
+            uploaded[path] = fp.read()
+
+        sftp.putfo.side_effect = putfo
+        with tempfile.NamedTemporaryFile() as fp:
+            fp.write('static')
+            fp.flush()
+            os.chmod(fp.name, 0600)
+            link_dir = tempfile.mkdtemp()
+            link_path = os.path.join(link_dir, 'sym.txt')
+            os.symlink(os.path.relpath(fp.name, link_dir), link_path)
+            paths_to_contents = {
+                '/index.html': u'index☃',
+                '/static/file.txt': static.StaticContent('/file.txt', fp.name),
+                '/static/sym.txt': static.StaticContent('/sym.txt', link_path),
+            }
+            diff = messages.DiffMessage(
+                adds=[messages.FileMessage(path='/index.html'),
+                      messages.FileMessage(path='/static/sym.txt')],
+                edits=[messages.FileMessage(path='/static/file.txt')],
+                deletes=[messages.FileMessage(path='/old.html')])
+            self.assertIsNone(
+                self.destination.apply_diff(diff, paths_to_contents))
+        archive_path, content = uploaded.items()[0]
+        archive = tarfile.open(fileobj=cStringIO.StringIO(content))
+        self.assertEqual(
+            u'index☃'.encode('utf-8'),
+            archive.extractfile('index.html').read())
+        self.assertEqual('static', archive.extractfile('static/file.txt').read())
+        # Symlinks are archived as the files they link to.
+        info = archive.getmember('static/sym.txt')
+        self.assertTrue(info.isfile())
+        self.assertEqual('static', archive.extractfile(info).read())
+        self.assertEqual(
+            [0644, 0644, 0644], [member.mode for member in archive])
+        self.assertEqual([
+            'mkdir -p -- /var/www /var/www/static',
+            'tar -xf {} -C /var/www'.format(archive_path),
+            'rm -f -- /var/www/old.html',
+        ], self.commands)
+        sftp.remove.assert_called_once_with(archive_path)
+
+
+if __name__ == '__main__':
+    unittest.main()
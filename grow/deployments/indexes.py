@@ -1,17 +1,26 @@
 from . import messages
+from . import scheduler
+from . import spool
 from . import utils
 from grow.common import utils as common_utils
+from grow.pods import static
 from protorpc import protojson
 if common_utils.is_appengine():
     pool = None
 else:
     from multiprocessing import pool
 import ConfigParser
+import cStringIO
+import collections
 import datetime
+import gzip
 import hashlib
+import json
 import logging
+import os
 import progressbar
 import texttable
+import threading
 
 
 class Error(Exception):
@@ -23,7 +32,7 @@ class CorruptIndexError(Error):
 
 
 class Diff(object):
-    POOL_SIZE = 100  # Thread pool size for applying a diff.
+    POOL_SIZE = 100  # Maximum number of threads applying a diff.
 
     @classmethod
     def is_empty(cls, diff):
@@ -94,46 +103,48 @@ class Diff(object):
 
     @classmethod
     def create(cls, index, theirs, repo=None):
+        """Returns the diff between two indexes.
+
+        Indexes may be `CompactIndex` objects or `IndexMessage`s. The diff is
+        computed by merging the sorted paths of both indexes; unchanged files
+        are only counted, and the diff's indexes carry no files.
+        """
         git = common_utils.get_git()
+        index = CompactIndex.from_index(index)
+        theirs = CompactIndex.from_index(theirs)
         diff = messages.DiffMessage()
-        diff.indexes = []
-        diff.indexes.append(theirs or messages.IndexMessage())
-        diff.indexes.append(index or messages.IndexMessage())
-
-        index_paths_to_shas = {}
-        their_paths_to_shas = {}
-
-        for file_message in index.files:
-            index_paths_to_shas[file_message.path] = file_message.sha
-        for file_message in theirs.files:
-            their_paths_to_shas[file_message.path] = file_message.sha
-
-        for path, sha in index_paths_to_shas.iteritems():
-            if path in their_paths_to_shas:
-                if index_paths_to_shas[path] == their_paths_to_shas[path]:
-                    file_message = messages.FileMessage()
-                    file_message.path = path
-                    file_message.deployed = theirs.deployed
-                    file_message.deployed_by = theirs.deployed_by
-                    diff.nochanges.append(file_message)
-                else:
-                    file_message = messages.FileMessage()
-                    file_message.path = path
-                    file_message.deployed = theirs.deployed
-                    file_message.deployed_by = theirs.deployed_by
-                    diff.edits.append(file_message)
-                del their_paths_to_shas[path]
-            else:
-                file_message = messages.FileMessage()
-                file_message.path = path
-                diff.adds.append(file_message)
+        diff.indexes = [theirs.message, index.message]
+        diff.num_nochanges = 0
 
-        for path, sha in their_paths_to_shas.iteritems():
+        def make_file_message(path, deployed=True):
             file_message = messages.FileMessage()
             file_message.path = path
-            file_message.deployed = theirs.deployed
-            file_message.deployed_by = theirs.deployed_by
-            diff.deletes.append(file_message)
+            if deployed:
+                file_message.deployed = theirs.message.deployed
+                file_message.deployed_by = theirs.message.deployed_by
+            return file_message
+
+        i = j = 0
+        num_paths = len(index.paths)
+        num_their_paths = len(theirs.paths)
+        while i < num_paths or j < num_their_paths:
+            if j == num_their_paths or (
+                    i < num_paths and index.paths[i] < theirs.paths[j]):
+                diff.adds.append(make_file_message(index.paths[i], False))
+                i += 1
+            elif i == num_paths or theirs.paths[j] < index.paths[i]:
+                diff.deletes.append(make_file_message(theirs.paths[j]))
+                j += 1
+            else:
+                if index.shas[i] == theirs.shas[j]:
+                    diff.num_nochanges += 1
+                else:
+                    diff.edits.append(make_file_message(index.paths[i]))
+                i += 1
+                j += 1
+
+        index = index.message
+        theirs = theirs.message
 
         # What changed in the pod between deploy commits.
         if (repo is not None
@@ -168,21 +179,43 @@ class Diff(object):
 
     @classmethod
     def apply(cls, message, paths_to_content, write_func, batch_write_func, delete_func,
-              threaded=True, batch_writes=False):
+              threaded=True, batch_writes=False, max_workers=None):
+        """Applies a diff, returning the `scheduler.Scheduler` that ran it.
+
+        Raises `scheduler.FailedTasksError` if any files could not be written
+        or deleted after retrying.
+        """
         if pool is None:
             text = 'Deployment is unavailable in this environment.'
             raise common_utils.UnavailableError(text)
-        thread_pool = pool.ThreadPool(cls.POOL_SIZE)
         diff = message
         num_files = len(diff.adds) + len(diff.edits) + len(diff.deletes)
         text = 'Deploying: %(value)d/{} (in %(elapsed)s)'
         widgets = [progressbar.FormatLabel(text.format(num_files))]
         bar = progressbar.ProgressBar(widgets=widgets, maxval=num_files)
+        bar_lock = threading.Lock()
 
-        def run_with_progress(func, *args):
-            func(*args)
-            bar.update(bar.value + 1)
+        def update_progress(task):
+            with bar_lock:
+                bar.update(bar.value + 1)
 
+        def write(path):
+            # Content is read when the write runs, so that only the contents
+            # of the files being written are held in memory.
+            write_func(path, paths_to_content[path])
+
+        def get_size(path):
+            # Spooled contents are sized without reading them.
+            if isinstance(paths_to_content, spool.ContentSpool):
+                return paths_to_content.get_size(path)
+            content = paths_to_content[path]
+            if isinstance(content, static.StaticContent):
+                return os.path.getsize(content.path)
+            return len(content)
+
+        deploy_scheduler = scheduler.Scheduler(
+            max_workers=max_workers or cls.POOL_SIZE,
+            threaded=threaded and not batch_writes, callback=update_progress)
         if batch_writes:
             writes_paths_to_contents = {}
             for file_message in diff.adds:
@@ -193,40 +226,44 @@ class Diff(object):
                     paths_to_content[file_message.path]
             deletes_paths = [file_message.path for file_message in diff.deletes]
             if writes_paths_to_contents:
-                batch_write_func(writes_paths_to_contents)
+                deploy_scheduler.submit(
+                    'write', '(batch)', batch_write_func,
+                    writes_paths_to_contents)
             if deletes_paths:
-                delete_func(deletes_paths)
-        else:
-            bar.start()
+                deploy_scheduler.submit(
+                    'delete', '(batch)', delete_func, deletes_paths)
+            deploy_scheduler.join()
+            return deploy_scheduler
+
+        bar.start()
+        try:
             for file_message in diff.adds:
-                content = paths_to_content[file_message.path]
-                if threaded:
-                    args = (write_func, file_message.path, content)
-                    thread_pool.apply_async(run_with_progress, args=args)
-                else:
-                    run_with_progress(write_func, file_message.path, content)
+                deploy_scheduler.submit(
+                    'add', file_message.path, write, file_message.path,
+                    size=get_size(file_message.path))
             for file_message in diff.edits:
-                content = paths_to_content[file_message.path]
-                if threaded:
-                    args = (write_func, file_message.path, content)
-                    thread_pool.apply_async(run_with_progress, args=args)
-                else:
-                    run_with_progress(write_func, file_message.path, content)
+                deploy_scheduler.submit(
+                    'edit', file_message.path, write, file_message.path,
+                    size=get_size(file_message.path))
             for file_message in diff.deletes:
-                if threaded:
-                    args = (delete_func, file_message.path)
-                    thread_pool.apply_async(run_with_progress, args=args)
-                else:
-                    run_with_progress(delete_func, file_message.path)
-
-        if threaded:
-            thread_pool.close()
-            thread_pool.join()
-        if not batch_writes:
+                deploy_scheduler.submit('delete', file_message.path,
+                                        delete_func, file_message.path)
+            deploy_scheduler.join()
+        finally:
             bar.finish()
+        deploy_scheduler.pretty_print_timings()
+        return deploy_scheduler
 
 
 class Index(object):
+    # Number of threads hashing file contents. Hashing releases the GIL, so
+    # large files are hashed concurrently with rendering and each other.
+    HASH_POOL_SIZE = 8
+    # Contents smaller than this are hashed inline, where a thread would cost
+    # more than it saves.
+    HASH_THREAD_THRESHOLD = 256 * 1024
+    # Number of files of a stream that may be waiting to be hashed.
+    HASH_WINDOW = 32
 
     @classmethod
     def create(cls, paths_to_contents=None):
@@ -235,20 +272,92 @@ class Index(object):
         message.files = []
         if paths_to_contents is None:
             return message
-        for pod_path, contents in paths_to_contents.iteritems():
-            cls.add_file(message, pod_path, contents)
+        for pod_path, _, sha in cls.hash_iter(paths_to_contents.iteritems()):
+            cls.add_sha(message, pod_path, sha)
         return message
 
     @classmethod
     def add_file(cls, message, path, contents):
-        pod_path = '/' + path.lstrip('/')
+        return cls.add_sha(message, path, cls.hash_contents(contents))
+
+    @classmethod
+    def add_sha(cls, message, path, sha):
+        pod_path = cls.normalize_path(path)
+        message.files.append(messages.FileMessage(path=pod_path, sha=sha))
+        return message
+
+    @classmethod
+    def hash_contents(cls, contents):
+        """Returns the sha-1 hash of contents.
+
+        Contents may be a string or a `static.StaticContent`, which is hashed
+        by streaming the file unless its hash is already known.
+        """
+        if isinstance(contents, static.StaticContent):
+            if contents.sha:
+                return contents.sha
+            m = hashlib.sha1()
+            for chunk in contents.iter_chunks():
+                m.update(chunk)
+            return m.hexdigest()
         m = hashlib.sha1()
         if isinstance(contents, unicode):
             contents = contents.encode('utf-8')
         m.update(contents)
-        sha = m.hexdigest()
-        message.files.append(messages.FileMessage(path=pod_path, sha=sha))
-        return message
+        return m.hexdigest()
+
+    @classmethod
+    def _needs_thread(cls, contents):
+        if isinstance(contents, static.StaticContent):
+            return not contents.sha
+        return len(contents) >= cls.HASH_THREAD_THRESHOLD
+
+    @classmethod
+    def hash_iter(cls, paths_to_contents, skip=None):
+        """Hashes a stream of (path, contents) pairs in a thread pool.
+
+        Yields (path, contents, sha) in the order of the stream, consuming at
+        most `HASH_WINDOW` pairs ahead. The sha is None for contents for which
+        `skip` returns True.
+        """
+        thread_pool = pool.ThreadPool(cls.HASH_POOL_SIZE) if pool else None
+        pending = collections.deque()
+        try:
+            for path, contents in paths_to_contents:
+                if skip is not None and skip(contents):
+                    result = None
+                elif thread_pool and cls._needs_thread(contents):
+                    result = thread_pool.apply_async(
+                        cls.hash_contents, (contents,))
+                else:
+                    result = cls.hash_contents(contents)
+                pending.append((path, contents, result))
+                while len(pending) > cls.HASH_WINDOW:
+                    yield cls._get_hashed(pending.popleft())
+            while pending:
+                yield cls._get_hashed(pending.popleft())
+        finally:
+            if thread_pool:
+                thread_pool.terminate()
+                thread_pool.join()
+
+    @classmethod
+    def _get_hashed(cls, item):
+        path, contents, result = item
+        if result is not None and not isinstance(result, basestring):
+            result = result.get()
+        return path, contents, result
+
+    @classmethod
+    def normalize_path(cls, path):
+        """Returns a path as unicode with a leading slash.
+
+        Rendered paths may be UTF-8 strings while deployed indexes hold
+        unicode, and paths of both are compared as unicode.
+        """
+        if isinstance(path, str):
+            path = path.decode('utf-8')
+        return u'/' + path.lstrip(u'/')
 
     @classmethod
     def add_repo(cls, message, repo):
@@ -272,3 +381,102 @@ class Index(object):
     @classmethod
     def from_string(cls, content):
         return protojson.decode_message(messages.IndexMessage, content)
+
+
+class CompactIndex(object):
+    """An index stored as sorted arrays of paths and shas.
+
+    The metadata of the index (when and by whom it was deployed) is kept in
+    an `IndexMessage` without files. Serialized, the index is a gzipped
+    header line holding that message followed by a line for each file.
+    """
+
+    VERSION = 1
+
+    def __init__(self, paths_to_shas=None, message=None):
+        self.message = message or messages.IndexMessage()
+        items = sorted(
+            (Index.normalize_path(path), sha)
+            for path, sha in (paths_to_shas or {}).iteritems())
+        self.paths = [path for path, _ in items]
+        self.shas = [sha for _, sha in items]
+
+    def __len__(self):
+        return len(self.paths)
+
+    @classmethod
+    def create(cls, paths_to_contents=None):
+        paths_to_shas = {}
+        if paths_to_contents is not None:
+            for path, _, sha in Index.hash_iter(paths_to_contents.iteritems()):
+                paths_to_shas[path] = sha
+        return cls(paths_to_shas, message=Index.create())
+
+    @classmethod
+    def from_index(cls, index):
+        """Returns a compact index from an `IndexMessage`, if needed."""
+        if isinstance(index, cls):
+            return index
+        if index is None:
+            return cls()
+        paths_to_shas = dict(
+            (file_message.path, file_message.sha)
+            for file_message in index.files)
+        message = messages.IndexMessage(
+            deployed=index.deployed, deployed_by=index.deployed_by,
+            commit=index.commit)
+        return cls(paths_to_shas, message=message)
+
+    def get_paths_to_shas(self):
+        return dict(zip(self.paths, self.shas))
+
+    def to_index(self):
+        """Returns the index as an `IndexMessage` with files."""
+        message = messages.IndexMessage(
+            deployed=self.message.deployed,
+            deployed_by=self.message.deployed_by,
+            commit=self.message.commit)
+        message.files = [
+            messages.FileMessage(path=path, sha=sha)
+            for path, sha in zip(self.paths, self.shas)]
+        return message
+
+    def to_string(self):
+        fp = cStringIO.StringIO()
+        gzip_file = gzip.GzipFile(fileobj=fp, mode='wb', mtime=0)
+        header = json.dumps({
+            'index': json.loads(protojson.encode_message(self.message)),
+            'version': self.VERSION,
+        }, sort_keys=True)
+        gzip_file.write(header + '\n')
+        for path, sha in zip(self.paths, self.shas):
+            if isinstance(path, unicode):
+                path = path.encode('utf-8')
+            gzip_file.write('{} {}\n'.format(sha, path))
+        gzip_file.close()
+        return fp.getvalue()
+
+    @classmethod
+    def from_string(cls, content):
+        try:
+            gzip_file = gzip.GzipFile(fileobj=cStringIO.StringIO(content))
+            lines = gzip_file.read().splitlines()
+            header = json.loads(lines[0])
+        except (IOError, IndexError, ValueError) as e:
+            raise CorruptIndexError('Invalid index: {}'.format(e))
+        if header.get('version') != cls.VERSION:
+            raise CorruptIndexError(
+                'Unsupported index version: {}'.format(header.get('version')))
+        message = protojson.decode_message(
+            messages.IndexMessage, json.dumps(header['index']))
+        index = cls(message=message)
+        for line in lines[1:]:
+            sha, path = line.split(' ', 1)
+            index.paths.append(Index.normalize_path(path))
+            index.shas.append(sha)
+        return index
+
+    @classmethod
+    def get_etag(cls, content):
+        """Returns the version tag of a serialized index."""
+        return hashlib.sha1(content).hexdigest()
@@ -2,6 +2,7 @@ from . import indexes
 from . import messages
 from grow.common import utils
 from grow.pods import pods
+from grow.pods import static
 from grow.pods import storage
 from grow.testing import testing
 import unittest
@@ -43,6 +44,71 @@ class IndexTest(unittest.TestCase):
             diff = indexes.Diff.create(my_index, their_index)
             self.assertFilePathsEqual(expected.adds, diff.adds)
 
+    def test_compact_index(self):
+        index = indexes.CompactIndex.create({
+            '/foo.html': 'foo',
+            u'/\u2603.html': 'snowman',
+        })
+        index.message.commit = messages.CommitMessage(sha='abc')
+        content = index.to_string()
+        loaded = indexes.CompactIndex.from_string(content)
+        self.assertEqual([u'/foo.html', u'/\u2603.html'], loaded.paths)
+        self.assertEqual(index.shas, loaded.shas)
+        self.assertEqual('abc', loaded.message.commit.sha)
+        self.assertRaises(indexes.CorruptIndexError,
+                          indexes.CompactIndex.from_string, 'invalid')
+
+        their_index = indexes.CompactIndex.from_index(indexes.Index.create({
+            '/bar.html': 'bar',
+            '/foo.html': 'changed',
+            u'/\u2603.html': 'snowman',
+        }))
+        diff = indexes.Diff.create(loaded, their_index)
+        self.assertEqual([], [m.path for m in diff.adds])
+        self.assertEqual(['/foo.html'], [m.path for m in diff.edits])
+        self.assertEqual(['/bar.html'], [m.path for m in diff.deletes])
+        self.assertEqual(1, diff.num_nochanges)
+
+        # Paths of UTF-8 strings and unicode are the same paths.
+        index = indexes.CompactIndex.create({
+            '/caf\xc3\xa9.html': 'cafe',
+            '/\xe2\x98\x83.html': 'snowman',
+            '/z.html': 'z',
+        })
+        self.assertTrue(all(isinstance(path, unicode) for path in index.paths))
+        theirs = indexes.CompactIndex.from_string(
+            indexes.CompactIndex.create({
+                u'/caf\xe9.html': 'cafe',
+                u'/\u2603.html': 'snowman',
+                u'/z.html': 'z',
+            }).to_string())
+        diff = indexes.Diff.create(index, theirs)
+        self.assertFalse(diff.adds or diff.edits or diff.deletes)
+        self.assertEqual(3, diff.num_nochanges)
+
+    def test_hash_iter(self):
+        pod_path = '/static/test.txt'
+        content = static.StaticContent(pod_path, self.pod.abs_path(pod_path))
+        large_content = 'a' * indexes.Index.HASH_THREAD_THRESHOLD
+        items = [('/file.txt', 'test'), ('/static.txt', content),
+                 ('/large.txt', large_content), ('/skip.txt', None)]
+        results = list(indexes.Index.hash_iter(
+            iter(items), skip=lambda content: content is None))
+        self.assertEqual(
+            ['/file.txt', '/static.txt', '/large.txt', '/skip.txt'],
+            [path for path, _, _ in results])
+        self.assertEqual(indexes.Index.hash_contents('test'), results[0][2])
+        self.assertEqual(
+            indexes.Index.hash_contents(self.pod.read_file(pod_path)),
+            results[1][2])
+        self.assertEqual(
+            indexes.Index.hash_contents(large_content), results[2][2])
+        self.assertIsNone(results[3][2])
+
+        # Known hashes of static files are used without reading the file.
+        content.sha = 'sha'
+        self.assertEqual('sha', indexes.Index.hash_contents(content))
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,261 @@
+"""Scheduler of the writes and deletes made when applying a diff.
+
+Work is run by a pool of threads, but only `limit` tasks run at once. The
+limit adapts to the destination: it grows by one for every `limit` tasks that
+complete without errors and without latency rising, and is halved when a task
+fails or the average latency rises well above the lowest average observed.
+Threads are started as work is submitted, up to the limit, rather than up to
+`max_workers` at once.
+
+Tasks transferring more than `LARGE_TASK_SIZE` bytes are slow because of
+their size rather than congestion, so their latency is not used to adapt the
+limit.
+
+Submitting work blocks while `max_pending` tasks are waiting to run, so that
+the contents of a large diff are never all held in memory at once.
+
+Tasks that fail are collected and retried once the rest of the work is done.
+Every attempt is timed, and the timings can be exported as CSV.
+"""
+
+import Queue
+import collections
+import csv
+import logging
+import threading
+import time
+import texttable
+
+# Number of tasks run at once before the limit has adapted.
+INITIAL_LIMIT = 8
+# Number of times failed tasks are retried.
+MAX_RETRIES = 3
+# Seconds waited before retrying failed tasks, doubled for every round.
+RETRY_DELAY = 1.0
+# Weight of the latest task in the moving average of latency.
+LATENCY_WEIGHT = 0.2
+# The limit is reduced when the average latency is this many times the lowest
+# average latency observed.
+LATENCY_FACTOR = 2.0
+# Tasks of more bytes than this are not used to measure latency.
+LARGE_TASK_SIZE = 1024 * 1024
+
+
+class Error(Exception):
+    pass
+
+
+class FailedTasksError(Error):
+
+    def __init__(self, failures, scheduler):
+        self.failures = failures
+        self.scheduler = scheduler
+        # Paths may be unicode, which `str.format` cannot encode.
+        lines = ['%s %s: %s' % (timing.action, timing.path, timing.error)
+                 for timing in failures]
+        text = 'Failed to deploy {} file(s):\n{}'.format(
+            len(failures), '\n'.join(lines))
+        super(FailedTasksError, self).__init__(text)
+
+
+Timing = collections.namedtuple(
+    'Timing', ['action', 'path', 'seconds', 'attempt', 'error'])
+
+
+class Task(object):
+
+    def __init__(self, action, path, func, args, size=None):
+        self.action = action
+        self.path = path
+        self.func = func
+        self.args = args
+        self.size = size
+        self.attempts = 0
+
+
+class Scheduler(object):
+    """Runs tasks with a limit on concurrency that adapts to latency."""
+
+    def __init__(self, max_workers, threaded=True, max_pending=None,
+                 callback=None):
+        self.max_workers = max(1, max_workers)
+        self.limit = min(INITIAL_LIMIT, self.max_workers)
+        self.threaded = threaded
+        self.timings = []
+        self._callback = callback
+        self._failures = []
+        self._lock = threading.Lock()
+        self._condition = threading.Condition(self._lock)
+        self._active = 0
+        self._successes = 0
+        self._latency = None
+        self._min_latency = None
+        self._queue = Queue.Queue(maxsize=max_pending or 2 * self.max_workers)
+        self._threads = []
+
+    def submit(self, action, path, func, *args, **kwargs):
+        """Schedules `func(*args)`, blocking while too many tasks wait.
+
+        `size` may be given as the number of bytes the task transfers.
+        """
+        task = Task(action, path, func, args, size=kwargs.pop('size', None))
+        if kwargs:
+            raise TypeError('Unexpected arguments: {}'.format(kwargs.keys()))
+        if self.threaded:
+            self._put(task)
+        else:
+            self._run(task)
+
+    def _put(self, task):
+        self._start_threads()
+        self._queue.put(task)
+
+    def _start_threads(self):
+        """Starts threads until there are as many as the limit."""
+        with self._lock:
+            num_threads = self.limit - len(self._threads)
+        for _ in range(num_threads):
+            thread = threading.Thread(target=self._work)
+            thread.daemon = True
+            thread.start()
+            self._threads.append(thread)
+
+    def join(self, retries=MAX_RETRIES):
+        """Waits for all tasks, retrying failures, and stops the threads.
+
+        Raises `FailedTasksError` if any tasks still fail after `retries`
+        rounds of retries.
+        """
+        try:
+            self._wait()
+            for retry_round in range(retries):
+                with self._lock:
+                    failures = self._failures
+                    self._failures = []
+                if not failures:
+                    break
+                delay = RETRY_DELAY * (2 ** retry_round)
+                logging.warning('Retrying {} failed file(s) in {:.0f}s.'.format(
+                    len(failures), delay))
+                time.sleep(delay)
+                for task in failures:
+                    if self.threaded:
+                        self._put(task)
+                    else:
+                        self._run(task)
+                self._wait()
+        finally:
+            self._stop()
+        if self._failures:
+            failures = [self._get_last_timing(task) for task in self._failures]
+            raise FailedTasksError(failures, self)
+
+    def _get_last_timing(self, task):
+        for timing in reversed(self.timings):
+            if timing.path == task.path and timing.action == task.action:
+                return timing
+
+    def _wait(self):
+        if self.threaded:
+            self._queue.join()
+
+    def _stop(self):
+        for _ in self._threads:
+            self._queue.put(None)
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+
+    def _work(self):
+        while True:
+            task = self._queue.get()
+            try:
+                if task is None:
+                    return
+                with self._condition:
+                    while self._active >= self.limit:
+                        self._condition.wait()
+                    self._active += 1
+                try:
+                    self._run(task)
+                finally:
+                    with self._condition:
+                        self._active -= 1
+                        self._condition.notify_all()
+            finally:
+                self._queue.task_done()
+
+    def _run(self, task):
+        task.attempts += 1
+        error = None
+        start = time.time()
+        try:
+            task.func(*task.args)
+        except Exception as e:
+            error = e
+            logging.warning('Error deploying %s: %s', task.path, e)
+        seconds = time.time() - start
+        timing = Timing(task.action, task.path, seconds, task.attempts, error)
+        with self._lock:
+            self.timings.append(timing)
+            if error is not None:
+                self._failures.append(task)
+                self._decrease()
+            elif task.size is not None and task.size > LARGE_TASK_SIZE:
+                self._count_success()
+            else:
+                self._on_success(seconds)
+        if error is None and self._callback:
+            self._callback(task)
+
+    def _on_success(self, seconds):
+        if self._latency is None:
+            self._latency = seconds
+        else:
+            self._latency += LATENCY_WEIGHT * (seconds - self._latency)
+        if self._min_latency is None or self._latency < self._min_latency:
+            self._min_latency = self._latency
+        if self._latency > LATENCY_FACTOR * self._min_latency:
+            self._decrease()
+            # Adapt to the new latency instead of shrinking indefinitely.
+            self._min_latency = self._latency
+            return
+        self._count_success()
+
+    def _count_success(self):
+        self._successes += 1
+        if self._successes >= self.limit and self.limit < self.max_workers:
+            self._successes = 0
+            self.limit += 1
+            self._condition.notify_all()
+
+    def _decrease(self):
+        self._successes = 0
+        self.limit = max(1, self.limit // 2)
+
+    def write_timings(self, fp):
+        """Writes the time taken by each attempt as CSV."""
+        writer = csv.writer(fp)
+        writer.writerow(['action', 'path', 'seconds', 'attempt', 'error'])
+        for timing in self.timings:
+            path = timing.path
+            if isinstance(path, unicode):
+                path = path.encode('utf-8')
+            writer.writerow([
+                timing.action, path, '{:.3f}'.format(timing.seconds),
+                timing.attempt, timing.error or ''])
+
+    def pretty_print_timings(self, num_files=10):
+        """Logs the slowest attempts."""
+        timings = sorted(self.timings, key=lambda timing: timing.seconds,
+                         reverse=True)[:num_files]
+        if not timings:
+            return
+        table = texttable.Texttable(max_width=0)
+        table.set_deco(texttable.Texttable.HEADER)
+        rows = [['Action', 'Path', 'Seconds']]
+        for timing in timings:
+            rows.append([timing.action, timing.path,
+                         '{:.3f}'.format(timing.seconds)])
+        table.add_rows(rows)
+        logging.info('Slowest files:\n' + table.draw() + '\n')
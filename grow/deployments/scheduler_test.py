@@ -0,0 +1,102 @@
+from . import scheduler
+import StringIO
+import mock
+import threading
+import unittest
+
+
+class SchedulerTestCase(unittest.TestCase):
+
+    def test_submit(self):
+        lock = threading.Lock()
+        written = []
+
+        def write(path):
+            with lock:
+                written.append(path)
+
+        deploy_scheduler = scheduler.Scheduler(max_workers=4)
+        paths = ['/{}.html'.format(i) for i in range(50)]
+        for path in paths:
+            deploy_scheduler.submit('add', path, write, path)
+        deploy_scheduler.join()
+        self.assertItemsEqual(paths, written)
+        self.assertEqual(50, len(deploy_scheduler.timings))
+        self.assertLessEqual(deploy_scheduler.limit, 4)
+
+    def test_limit(self):
+        deploy_scheduler = scheduler.Scheduler(max_workers=10, threaded=False)
+        self.assertEqual(8, deploy_scheduler.limit)
+        with deploy_scheduler._lock:
+            for _ in range(8):
+                deploy_scheduler._on_success(1.0)
+            self.assertEqual(9, deploy_scheduler.limit)
+            deploy_scheduler._decrease()
+            self.assertEqual(4, deploy_scheduler.limit)
+            # Rising latency reduces the limit.
+            deploy_scheduler._on_success(5.0)
+            deploy_scheduler._on_success(5.0)
+            self.assertEqual(2, deploy_scheduler.limit)
+
+    def test_threads(self):
+        deploy_scheduler = scheduler.Scheduler(max_workers=100)
+        self.assertEqual([], deploy_scheduler._threads)
+        deploy_scheduler.submit('add', '/index.html', lambda: None)
+        # Threads are started up to the limit, not up to `max_workers`.
+        self.assertEqual(
+            scheduler.INITIAL_LIMIT, len(deploy_scheduler._threads))
+        deploy_scheduler.join()
+        self.assertEqual([], deploy_scheduler._threads)
+
+    def test_large_tasks(self):
+        deploy_scheduler = scheduler.Scheduler(max_workers=10, threaded=False)
+        large_size = scheduler.LARGE_TASK_SIZE + 1
+        with mock.patch.object(
+                scheduler.time, 'time', side_effect=[0, 1, 1, 11, 11, 21]):
+            deploy_scheduler.submit('add', '/small.html', lambda: None, size=1)
+            # Slow large tasks are not taken as rising latency.
+            deploy_scheduler.submit(
+                'add', '/large.zip', lambda: None, size=large_size)
+            self.assertEqual(8, deploy_scheduler.limit)
+            deploy_scheduler.submit('add', '/slow.html', lambda: None, size=1)
+            self.assertEqual(4, deploy_scheduler.limit)
+        self.assertEqual(
+            [1, 10, 10],
+            [timing.seconds for timing in deploy_scheduler.timings])
+
+    @mock.patch.object(scheduler, 'RETRY_DELAY', 0)
+    def test_retry(self):
+        attempts = []
+
+        def flaky(path):
+            attempts.append(path)
+            if len(attempts) < 2:
+                raise IOError('Unavailable')
+
+        def broken(path):
+            raise IOError('Broken')
+
+        deploy_scheduler = scheduler.Scheduler(max_workers=2)
+        deploy_scheduler.submit('add', '/flaky.html', flaky, '/flaky.html')
+        deploy_scheduler.join()
+        self.assertEqual(2, len(attempts))
+
+        deploy_scheduler = scheduler.Scheduler(max_workers=2)
+        deploy_scheduler.submit('edit', '/broken.html', broken, '/broken.html')
+        deploy_scheduler.submit('add', '/flaky.html', flaky, '/flaky.html')
+        with self.assertRaises(scheduler.FailedTasksError) as context:
+            deploy_scheduler.join(retries=2)
+        self.assertEqual(
+            ['/broken.html'],
+            [timing.path for timing in context.exception.failures])
+        self.assertEqual(3, context.exception.failures[0].attempt)
+
+        fp = StringIO.StringIO()
+        deploy_scheduler.write_timings(fp)
+        lines = fp.getvalue().splitlines()
+        self.assertEqual('action,path,seconds,attempt,error', lines[0])
+        self.assertEqual(5, len(lines))
+
+
+if __name__ == '__main__':
+    unittest.main()
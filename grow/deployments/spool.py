@@ -0,0 +1,81 @@
+"""Disk-backed spool of file contents waiting to be deployed.
+
+When a pod is deployed from a stream of rendered pages, only the pages that
+differ from the destination's index need to be kept until the diff is
+applied. The spool writes those pages to a temporary directory so that memory
+use stays flat regardless of the size of the pod, while still providing the
+mapping interface expected by `indexes.Diff.apply`.
+
+Static files exported as `static.StaticContent` are already on disk, so only
+the reference is kept, and returned in place of the content so that the
+destination can copy or stream the file itself.
+"""
+
+import os
+import shutil
+import tempfile
+from grow.pods import static
+
+
+class ContentSpool(object):
+    """Mapping of paths to contents, stored in a temporary directory."""
+
+    def __init__(self, root=None):
+        self._root = tempfile.mkdtemp(prefix='grow-spool-', dir=root)
+        self._paths_to_files = {}
+        self._paths_to_static = {}
+        self._num_files = 0
+
+    def __contains__(self, path):
+        return path in self._paths_to_files or path in self._paths_to_static
+
+    def __getitem__(self, path):
+        if path in self._paths_to_static:
+            return self._paths_to_static[path]
+        with open(self._paths_to_files[path], 'rb') as fp:
+            return fp.read()
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def __len__(self):
+        return len(self._paths_to_files) + len(self._paths_to_static)
+
+    def add(self, path, content):
+        """Spools the content for a path, replacing any existing content."""
+        if isinstance(content, static.StaticContent):
+            self.discard(path)
+            self._paths_to_static[path] = content
+            return
+        self._paths_to_static.pop(path, None)
+        if isinstance(content, unicode):
+            content = content.encode('utf-8')
+        file_path = self._paths_to_files.get(path)
+        if file_path is None:
+            self._num_files += 1
+            file_path = os.path.join(self._root, str(self._num_files))
+            self._paths_to_files[path] = file_path
+        with open(file_path, 'wb') as fp:
+            fp.write(content)
+
+    def discard(self, path):
+        """Removes the content for a path from the spool, if it exists."""
+        self._paths_to_static.pop(path, None)
+        file_path = self._paths_to_files.pop(path, None)
+        if file_path is not None:
+            os.remove(file_path)
+
+    def close(self):
+        """Removes the spooled contents from disk."""
+        shutil.rmtree(self._root, ignore_errors=True)
+        self._paths_to_files = {}
+        self._paths_to_static = {}
+
+    def get_size(self, path):
+        """Returns the size of the content for a path, without reading it."""
+        if path in self._paths_to_static:
+            return os.path.getsize(self._paths_to_static[path].path)
+        return os.path.getsize(self._paths_to_files[path])
+
+    def keys(self):
+        return self._paths_to_files.keys() + self._paths_to_static.keys()
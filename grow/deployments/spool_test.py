@@ -0,0 +1,55 @@
+from . import spool
+from grow.pods import static
+import os
+import tempfile
+import unittest
+
+
+class ContentSpoolTestCase(unittest.TestCase):
+
+    def test_add(self):
+        content_spool = spool.ContentSpool()
+        content_spool.add('/foo.html', u'foo\u2603')
+        content_spool.add('/bar.html', 'bar')
+        content_spool.add('/bar.html', 'baz')
+        self.assertEqual(2, len(content_spool))
+        self.assertIn('/foo.html', content_spool)
+        self.assertEqual(u'foo\u2603'.encode('utf-8'), content_spool['/foo.html'])
+        self.assertEqual('baz', content_spool['/bar.html'])
+        self.assertItemsEqual(['/foo.html', '/bar.html'], content_spool.keys())
+        content_spool.close()
+
+    def test_add_static_content(self):
+        content_spool = spool.ContentSpool()
+        with tempfile.NamedTemporaryFile() as fp:
+            fp.write('static')
+            fp.flush()
+            content_spool.add('/foo.txt', 'foo')
+            content_spool.add(
+                '/foo.txt', static.StaticContent('/foo.txt', fp.name))
+            self.assertEqual(1, len(content_spool))
+            self.assertEqual('static', content_spool['/foo.txt'].read())
+            content_spool.discard('/foo.txt')
+            self.assertNotIn('/foo.txt', content_spool)
+        content_spool.close()
+
+    def test_discard(self):
+        content_spool = spool.ContentSpool()
+        content_spool.add('/foo.html', 'foo')
+        content_spool.discard('/foo.html')
+        content_spool.discard('/bar.html')
+        self.assertNotIn('/foo.html', content_spool)
+        self.assertEqual(0, len(content_spool))
+        content_spool.close()
+
+    def test_close(self):
+        content_spool = spool.ContentSpool()
+        content_spool.add('/foo.html', 'foo')
+        root = content_spool._root
+        content_spool.close()
+        self.assertFalse(os.path.exists(root))
+        self.assertEqual(0, len(content_spool))
+
+
+if __name__ == '__main__':
+    unittest.main()
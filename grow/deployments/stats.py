@@ -8,21 +8,32 @@ from . import messages
 
 
 class Stats(object):
+    """Stats about a pod and the files built from it.
+
+    `paths_to_contents` may be a mapping of paths to content or a stream of
+    (path, content) pairs. Streams are not consumed by the stats; instead,
+    file counts are collected through `add_file` as the stream is deployed.
+    """
 
     def __init__(self, pod, paths_to_contents=None, full=True):
         self.full = full
         self.pod = pod
+        self._file_counts = collections.defaultdict(int)
         if paths_to_contents is None and full:
-            paths_to_contents = pod.export()
-        self.paths_to_contents = paths_to_contents
+            for path, _ in pod.export_iter():
+                self.add_file(path)
+        elif isinstance(paths_to_contents, dict):
+            for path in paths_to_contents.iterkeys():
+                self.add_file(path)
+
+    def add_file(self, path):
+        """Counts a built file."""
+        ext = os.path.splitext(path)[-1]
+        self._file_counts[ext] += 1
 
     def get_num_files_per_type(self):
-        file_counts = collections.defaultdict(int)
-        for path in self.paths_to_contents.keys():
-            ext = os.path.splitext(path)[-1]
-            file_counts[ext] += 1
         ms = []
-        for ext, count in file_counts.iteritems():
+        for ext, count in self._file_counts.iteritems():
             ms.append(messages.FileCountMessage(ext=ext, count=count))
         return ms
 
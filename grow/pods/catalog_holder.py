@@ -405,6 +405,17 @@ class Catalogs(object):
         template_file.close()
         return catalog
 
+    def find_mo_path(self, locale):
+        """Returns the pod path of the compiled catalog used for a locale."""
+        identifiers = gettext._expand_lang(str(locale))
+        for identifier in identifiers:
+            path = os.path.join(
+                '/translations', identifier, 'LC_MESSAGES',
+                'messages.mo')
+            if self.pod.file_exists(path):
+                return path
+        return None
+
     def find_mo_file(self, locale):
         identifiers = gettext._expand_lang(str(locale))
         for identifier in identifiers:
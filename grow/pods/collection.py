@@ -12,6 +12,7 @@ from grow.pods import locales
 from . import document_fields
 from . import documents
 from . import messages
+from . import pagination
 
 
 class Error(Exception):
@@ -78,16 +79,18 @@ class Collection(object):
     def clean_collection_path(cls, pod_path):
         return Collection._content_path_regex.sub('', pod_path).strip('/')
 
-    def _add_localized_docs(self, sorted_docs, pod_path, locale, doc):
+    def _list_localized_docs(self, pod_path, locale, doc):
+        localized_docs = []
         for each_locale in doc.locales:
             if each_locale == doc.default_locale and locale != each_locale:
                 continue
             base, ext = os.path.splitext(pod_path)
             localized_file_path = '{}@{}{}'.format(base, each_locale, ext)
             if (locale in [utils.SENTINEL, each_locale]
-                    and not self.pod.file_exists(localized_file_path)):
-                new_doc = doc.localize(each_locale)
-                sorted_docs.insert(new_doc)
+                    and not self.pod.podcache.content_index.file_exists(
+                        localized_file_path)):
+                localized_docs.append(doc.localize(each_locale))
+        return localized_docs
 
     def _get_builtin_field(self, name):
         """Returns a builtin field, which is a field prefixed with a `$`. To be
@@ -96,17 +99,8 @@ class Collection(object):
         return self.fields.get('${}'.format(name), self.fields.get(name))
 
     def _owns_doc_at_path(self, pod_path):
-        dir_name = os.path.dirname(pod_path)
-        doc_blueprint_path = os.path.join(dir_name, self.BLUEPRINT_PATH)
-        if doc_blueprint_path == self.blueprint_path:
-            return True
-        parts = pod_path.split(os.sep)
-        for i, part in enumerate(parts):
-            path = os.sep.join(parts[:-i])
-            doc_blueprint_path = os.path.join(path, self.BLUEPRINT_PATH)
-            if self.pod.file_exists(doc_blueprint_path):
-                return doc_blueprint_path == self.blueprint_path
-        return False
+        owner = self.pod.podcache.content_index.get_owner(pod_path)
+        return owner == self.pod_path.rstrip('/')
 
     @classmethod
     def create(cls, collection_path, fields, pod):
@@ -125,15 +119,8 @@ class Collection(object):
 
     @classmethod
     def list(cls, pod):
-        items = []
-        for root, dirs, _ in pod.walk(cls.CONTENT_PATH + '/'):
-            for dir_name in dirs:
-                pod_path = os.path.join(root, dir_name)
-                pod_path = pod_path.replace(pod.root, '')
-                col_path = os.path.join(pod_path, cls.BLUEPRINT_PATH)
-                if pod.file_exists(col_path):
-                    items.append(pod.get_collection(pod_path))
-        return items
+        return [pod.get_collection(pod_path) for pod_path in
+                pod.podcache.content_index.list_collection_paths()]
 
     @utils.cached_property
     def default_locale(self):
@@ -150,7 +137,7 @@ class Collection(object):
     def exists(self):
         """Returns whether the collection exists, as determined by whether
         the collection's blueprint exists."""
-        return self.pod.file_exists(self.blueprint_path)
+        return self.pod.podcache.content_index.file_exists(self.blueprint_path)
 
     @utils.cached_property
     def fields(self):
@@ -245,7 +232,7 @@ class Collection(object):
         pod_path = documents.Document.clean_localized_path(pod_path, locale)
         if locale is not None:
             localized_path = documents.Document.localize_path(pod_path, locale)
-            if self.pod.file_exists(localized_path):
+            if self.pod.podcache.content_index.file_exists(localized_path):
                 pod_path = localized_path
         cached = self.pod.podcache.collection_cache.get_document(
             self, pod_path, locale)
@@ -262,25 +249,63 @@ class Collection(object):
     def list_docs(self, order_by=None, locale=utils.SENTINEL, reverse=None,
                   include_hidden=False, recursive=True, inject=False):
         reverse = False if reverse is None else reverse
-        order_by = 'order' if order_by is None else order_by
-        key = operator.attrgetter(order_by)
-        sorted_docs = structures.SortedCollection(key=key)
         if inject:
+            # Pages listing the collection depend on each of its documents.
+            self.pod.podcache.dependency_graph.add_tracked(
+                self.pod_path.rstrip('/'))
+            order_by = 'order' if order_by is None else order_by
+            key = operator.attrgetter(order_by)
+            sorted_docs = structures.SortedCollection(key=key)
             injected_docs = self.pod.inject_preprocessors(collection=self)
             if injected_docs is not None:
                 sorted_docs = injected_docs
                 self.pod.logger.info('Injected collection -> {}'.format(self.pod_path))
-            return reversed(sorted_docs) if reverse else sorted_docs
-        for path in self.pod.list_dir(self.pod_path, recursive=recursive):
-            pod_path = os.path.join(self.pod_path, path.lstrip('/'))
-            # Document is owned by a different collection, skip it.
-            if not self._owns_doc_at_path(pod_path):
-                continue
-            slug, ext = os.path.splitext(os.path.basename(pod_path))
-            if (slug.startswith('_')
-                    or ext not in messages.extensions_to_formats
-                    or not pod_path):
-                continue
+        else:
+            sorted_docs = self.get_positions(
+                order_by, locale, include_hidden, recursive).docs
+        # Each caller gets its own list, which it is free to change.
+        return list(reversed(sorted_docs) if reverse else sorted_docs)
+
+    def get_positions(self, order_by=None, locale=utils.SENTINEL,
+                      include_hidden=False, recursive=True):
+        """Returns the positions of the sorted documents of the collection.
+
+        Sorted views are cached until a document of the collection or the set
+        of content files changes, and are shared by every caller, so the
+        documents of a view are kept in a tuple.
+        """
+        order_by = 'order' if order_by is None else order_by
+        # Pages listing the collection depend on each of its documents.
+        self.pod.podcache.dependency_graph.add_tracked(
+            self.pod_path.rstrip('/'))
+        content_index = self.pod.podcache.content_index
+        collection_cache = self.pod.podcache.collection_cache
+        view_key = (
+            locale if locale is None or locale is utils.SENTINEL
+            else str(locale),
+            order_by, include_hidden, recursive, content_index.version)
+        view = collection_cache.get_view(self, view_key)
+        if view is None:
+            sorted_docs = self._sort_docs(
+                self._list_docs(locale, include_hidden, recursive),
+                operator.attrgetter(order_by))
+            view = pagination.Positions(sorted_docs)
+            collection_cache.add_view(self, view_key, view)
+        return view
+
+    @staticmethod
+    def _sort_docs(docs, key):
+        # Documents with equal keys are ordered last listed first, as when
+        # each is inserted to the left of the equal documents.
+        return structures.SortedCollection(reversed(docs), key=key)
+
+    def _list_docs(self, locale, include_hidden, recursive):
+        """Returns the documents of the collection, in listing order."""
+        docs = []
+        # The index only lists the documents owned by this collection.
+        content_index = self.pod.podcache.content_index
+        for pod_path in content_index.list_doc_paths(
+                self.pod_path, recursive=recursive):
             try:
                 _, locale_from_path = \
                     documents.Document.parse_localized_path(pod_path)
@@ -290,23 +315,24 @@ class Collection(object):
                         new_doc = self.get_doc(pod_path, locale=locale_from_path)
                         if not include_hidden and new_doc.hidden:
                             continue
-                        sorted_docs.insert(new_doc)
+                        docs.append(new_doc)
                     continue
                 doc = self.get_doc(pod_path)
                 if not include_hidden and doc.hidden:
                     continue
                 if locale in [utils.SENTINEL, None]:
-                    sorted_docs.insert(doc)
+                    docs.append(doc)
                 if locale is None:
                     continue
                 if locale == doc.default_locale:
-                    sorted_docs.insert(doc)
+                    docs.append(doc)
                 else:
-                    self._add_localized_docs(sorted_docs, pod_path, locale, doc)
+                    docs.extend(
+                        self._list_localized_docs(pod_path, locale, doc))
             except Exception as e:
                 logging.error('Error loading doc: {}'.format(pod_path))
                 raise
-        return reversed(sorted_docs) if reverse else sorted_docs
+        return docs
 
     # Aliases `collection.docs` to `collection.list_docs`. `collection.docs`
     # should be the public and supported way to retrieve documents from a
@@ -332,7 +358,7 @@ class Collection(object):
                     not documents.Document.is_localized_path(doc.pod_path)):
                 localized_path = documents.Document.localize_path(
                     doc.pod_path, doc.locale)
-                if self.pod.file_exists(localized_path):
+                if self.pod.podcache.content_index.file_exists(localized_path):
                     continue
 
             docs.append(doc)
@@ -343,7 +369,9 @@ class Collection(object):
         sorted_docs = structures.SortedCollection(key=None)
         doc = self.get_doc(pod_path)
         sorted_docs.insert(doc)
-        self._add_localized_docs(sorted_docs, pod_path, utils.SENTINEL, doc)
+        for localized_doc in self._list_localized_docs(
+                pod_path, utils.SENTINEL, doc):
+            sorted_docs.insert(localized_doc)
         return self.list_servable_documents(
             include_hidden=include_hidden, locales=locales, doc_list=sorted_docs)
 
@@ -19,6 +19,7 @@ class CollectionCache(object):
         self._cache[col.collection_path] = {
             'collection': col,
             'docs': {},
+            'views': {},
         }
 
     def add_document(self, doc):
@@ -54,6 +55,7 @@ class CollectionCache(object):
                 while col_path != os.sep:
                     collection_path = col_path[1:]
                     if collection_path in self._cache:
+                        self._cache[collection_path]['views'] = {}
                         # Do a 'wildcard' match on the path to remove all locales.
                         generic_key = CollectionCache.generate_cache_key(path, '')
                         for key in self._cache[collection_path]['docs'].keys():
@@ -63,6 +65,16 @@ class CollectionCache(object):
 
                     col_path = os.path.split(col_path)[0]
 
+    def add_view(self, col, key, docs):
+        """Caches the positions of the sorted documents of a collection."""
+        self.ensure_collection(col)
+        self._cache[col.collection_path]['views'][key] = docs
+
+    def get_view(self, col, key):
+        if col.collection_path in self._cache:
+            return self._cache[col.collection_path]['views'].get(key)
+        return None
+
     def remove_collection(self, col):
         if col.collection_path in self._cache:
             del self._cache[col.collection_path]
@@ -70,6 +82,7 @@ class CollectionCache(object):
     def remove_document(self, doc):
         col = doc.collection
         if col.collection_path in self._cache:
+            self._cache[col.collection_path]['views'] = {}
             cache_key = CollectionCache.generate_cache_key(
                 doc.pod_path, doc._locale_kwarg)
             if cache_key in self._cache[col.collection_path]['docs']:
@@ -78,6 +91,7 @@ class CollectionCache(object):
     def remove_document_locales(self, doc):
         col = doc.collection
         if col.collection_path in self._cache:
+            self._cache[col.collection_path]['views'] = {}
             doc_cache_key = CollectionCache.generate_cache_key(
                 doc.pod_path, '')
             invalid_keys = []
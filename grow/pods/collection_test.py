@@ -3,6 +3,7 @@ from . import locales
 from . import pods
 from . import storage
 from grow.testing import testing
+import mock
 import unittest
 
 
@@ -61,6 +62,47 @@ class CollectionsTestCase(unittest.TestCase):
         self.assertEqual(
             expected_sorted, [col.basename for col in collection_objs])
 
+    def test_docs_views(self):
+        pod = testing.create_pod()
+        pod.write_yaml('/podspec.yaml', {})
+        pod.write_yaml('/content/col/_blueprint.yaml', {})
+        pod.write_yaml('/content/col/a.yaml', {'$order': 2})
+        pod.write_yaml('/content/col/b.yaml', {'$order': 1})
+        pod.write_yaml('/content/col/c.yaml', {'$order': 3})
+        col = pod.get_collection('col')
+        docs = col.docs()
+        self.assertEqual(
+            ['b', 'a', 'c'], [doc.base for doc in docs])
+        self.assertEqual(
+            ['c', 'a', 'b'], [doc.base for doc in col.docs(reverse=True)])
+
+        # Views are sorted once and shared by every call.
+        with mock.patch.object(
+                collection.Collection, '_list_docs') as list_docs:
+            self.assertEqual(
+                ['b', 'a', 'c'], [doc.base for doc in col.docs()])
+            self.assertFalse(list_docs.called)
+
+        # Each call gets its own list, whether or not it injects.
+        self.assertIsNot(docs, col.docs())
+        self.assertIsInstance(col.docs(inject=True), list)
+        self.assertIsInstance(col.docs(inject=True, reverse=True), list)
+        docs.reverse()
+        self.assertEqual(
+            ['b', 'a', 'c'], [doc.base for doc in col.docs()])
+        self.assertEqual('a', col.docs()[0].next().base)
+        positions = col.get_positions()
+        self.assertIs(positions, col.get_positions())
+        self.assertEqual(1, positions.index(col.get_doc('/content/col/a.yaml')))
+
+        # Views are invalidated when documents change.
+        pod.write_yaml('/content/col/b.yaml', {'$order': 4})
+        self.assertEqual(
+            ['a', 'c', 'b'], [doc.base for doc in col.docs()])
+        pod.write_yaml('/content/col/d.yaml', {'$order': 0})
+        self.assertEqual(
+            ['d', 'a', 'c', 'b'], [doc.base for doc in col.docs()])
+
     def test_title(self):
         pod = testing.create_pod()
         pod.write_yaml('/podspec.yaml', {})
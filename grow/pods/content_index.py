@@ -0,0 +1,178 @@
+"""Index of the collections and documents in the content directory of a pod.
+
+The content directory is walked once to find the collections (directories
+containing a blueprint) and the files owned by each collection, which is the
+collection of the closest directory above the file that has a blueprint.
+Listing collections and documents, and checking whether content files
+exist, are then lookups in the index rather than walks of the filesystem.
+
+The index is updated when files are written or deleted through the pod, and
+by the development server when files change. Adding or removing a blueprint
+changes the owners of many files, so the index is rebuilt.
+"""
+
+import os
+import threading
+from . import messages
+
+CONTENT_PATH = '/content'
+BLUEPRINT_PATH = '_blueprint.yaml'
+
+
+def is_doc_path(pod_path):
+    """Returns whether a content file may be a document."""
+    slug, ext = os.path.splitext(os.path.basename(pod_path))
+    return not slug.startswith('_') and ext in messages.extensions_to_formats
+
+
+class ContentIndex(object):
+    """Collections and document paths of a pod, built in one walk."""
+
+    def __init__(self, pod):
+        self.pod = pod
+        self._lock = threading.RLock()
+        self._files = None
+        self._collections = None
+        self._collections_to_paths = None
+        # Incremented whenever files are added or removed, so that views of
+        # the listed documents can tell when they are stale.
+        self.version = 0
+
+    @staticmethod
+    def is_content_path(pod_path):
+        return pod_path.startswith(CONTENT_PATH + '/')
+
+    def _walk(self):
+        """Returns the content files and the collections, in walk order."""
+        root = self.pod.abs_path('/').rstrip(os.sep)
+        try:
+            walk = self.pod.walk(CONTENT_PATH + '/')
+        except NotImplementedError:
+            paths = ['{}/{}'.format(CONTENT_PATH, path.lstrip('/'))
+                     for path in self.pod.list_dir(CONTENT_PATH + '/')]
+            collections = [os.path.dirname(pod_path) for pod_path in paths
+                           if os.path.basename(pod_path) == BLUEPRINT_PATH]
+            return paths, collections
+        paths = []
+        collections = []
+        # Directories are ordered as they are listed in their parents.
+        dirs_to_order = {}
+        for abs_dir, dirnames, filenames in walk:
+            dir_path = abs_dir[len(root):].replace(os.sep, '/').rstrip('/')
+            for dirname in dirnames:
+                dirs_to_order['{}/{}'.format(dir_path, dirname)] = \
+                    len(dirs_to_order)
+            if BLUEPRINT_PATH in filenames:
+                collections.append(dir_path)
+            for filename in filenames:
+                paths.append('{}/{}'.format(dir_path, filename))
+        collections.sort(key=lambda dir_path: dirs_to_order.get(dir_path, -1))
+        return paths, collections
+
+    def _build(self):
+        self._files = set()
+        self._collections = []
+        self._collections_to_paths = {}
+        if not self.pod.file_exists(CONTENT_PATH + '/'):
+            return
+        paths, collections = self._walk()
+        # Collections are found before the files they own.
+        for collection_pod_path in collections:
+            self._add_collection(collection_pod_path)
+        for pod_path in paths:
+            self._add_file(pod_path)
+
+    def _ensure_built(self):
+        if self._files is None:
+            self._build()
+
+    def _add_collection(self, collection_pod_path):
+        if (self.is_content_path(collection_pod_path)
+                and collection_pod_path not in self._collections_to_paths):
+            self._collections.append(collection_pod_path)
+            self._collections_to_paths[collection_pod_path] = []
+
+    def _add_file(self, pod_path):
+        if pod_path in self._files:
+            return
+        self._files.add(pod_path)
+        if not is_doc_path(pod_path):
+            return
+        owner = self._get_owner(pod_path)
+        if owner is not None:
+            self._collections_to_paths[owner].append(pod_path)
+
+    def _get_owner(self, pod_path):
+        dir_path = os.path.dirname(pod_path)
+        while self.is_content_path(dir_path):
+            if dir_path in self._collections_to_paths:
+                return dir_path
+            dir_path = os.path.dirname(dir_path)
+        return None
+
+    def add(self, pod_path):
+        """Adds a file that has been created."""
+        with self._lock:
+            if self._files is None or not self.is_content_path(pod_path):
+                return
+            if os.path.basename(pod_path) == BLUEPRINT_PATH:
+                if os.path.dirname(pod_path) not in self._collections_to_paths:
+                    self.reset()
+                return
+            if pod_path not in self._files:
+                self.version += 1
+                self._add_file(pod_path)
+
+    def remove(self, pod_path):
+        """Removes a file that has been deleted."""
+        with self._lock:
+            if self._files is None or not self.is_content_path(pod_path):
+                return
+            if os.path.basename(pod_path) == BLUEPRINT_PATH:
+                self.reset()
+                return
+            if pod_path not in self._files:
+                return
+            self._files.discard(pod_path)
+            self.version += 1
+            owner = self._get_owner(pod_path)
+            if owner is not None and pod_path in self._collections_to_paths[owner]:
+                self._collections_to_paths[owner].remove(pod_path)
+
+    def file_exists(self, pod_path):
+        """Returns whether a file exists, using the index for content files."""
+        if not self.is_content_path(pod_path):
+            return self.pod.file_exists(pod_path)
+        with self._lock:
+            self._ensure_built()
+            return pod_path in self._files
+
+    def get_owner(self, pod_path):
+        """Returns the pod path of the collection owning a file."""
+        with self._lock:
+            self._ensure_built()
+            return self._get_owner(pod_path)
+
+    def list_collection_paths(self):
+        """Returns the pod paths of the collections."""
+        with self._lock:
+            self._ensure_built()
+            return list(self._collections)
+
+    def list_doc_paths(self, collection_pod_path, recursive=True):
+        """Returns the pod paths of the documents owned by a collection."""
+        collection_pod_path = collection_pod_path.rstrip('/')
+        with self._lock:
+            self._ensure_built()
+            paths = self._collections_to_paths.get(collection_pod_path, [])
+            if recursive:
+                return list(paths)
+            return [pod_path for pod_path in paths
+                    if os.path.dirname(pod_path) == collection_pod_path]
+
+    def reset(self):
+        with self._lock:
+            self.version += 1
+            self._files = None
+            self._collections = None
+            self._collections_to_paths = None
@@ -0,0 +1,88 @@
+from . import content_index
+from grow.pods import pods
+from grow.pods import storage
+import mock
+import shutil
+import tempfile
+import unittest
+
+
+class ContentIndexTest(unittest.TestCase):
+
+    def setUp(self):
+        self.dir_path = tempfile.mkdtemp()
+        self.pod = pods.Pod(self.dir_path, storage=storage.FileStorage)
+        self.pod.write_file('/podspec.yaml', '')
+        self.pod.write_file('/content/pages/_blueprint.yaml', '$path: /{base}/')
+        self.pod.write_file('/content/pages/about.yaml', '')
+        self.pod.write_file('/content/pages/about@de.yaml', '')
+        self.pod.write_file('/content/pages/_partial.yaml', '')
+        self.pod.write_file('/content/pages/image.png', '')
+        self.pod.write_file('/content/pages/sub/team.md', '')
+        self.pod.write_file('/content/pages/posts/_blueprint.yaml', '')
+        self.pod.write_file('/content/pages/posts/first.md', '')
+
+    def tearDown(self):
+        shutil.rmtree(self.dir_path)
+
+    def test_index(self):
+        index = content_index.ContentIndex(self.pod)
+        self.assertEqual(
+            ['/content/pages', '/content/pages/posts'],
+            index.list_collection_paths())
+        self.assertItemsEqual([
+            '/content/pages/about.yaml',
+            '/content/pages/about@de.yaml',
+            '/content/pages/sub/team.md',
+        ], index.list_doc_paths('/content/pages/'))
+        self.assertItemsEqual(
+            ['/content/pages/about.yaml', '/content/pages/about@de.yaml'],
+            index.list_doc_paths('/content/pages', recursive=False))
+        self.assertEqual(
+            ['/content/pages/posts/first.md'],
+            index.list_doc_paths('/content/pages/posts'))
+        self.assertEqual(
+            '/content/pages', index.get_owner('/content/pages/sub/team.md'))
+        self.assertTrue(index.file_exists('/content/pages/image.png'))
+        self.assertFalse(index.file_exists('/content/pages/about@fr.yaml'))
+
+        # Lookups do not touch the filesystem once the index is built.
+        with mock.patch.object(self.pod, 'file_exists') as file_exists:
+            index.file_exists('/content/pages/about@fr.yaml')
+            index.list_doc_paths('/content/pages')
+            self.assertFalse(file_exists.called)
+
+        index.add('/content/pages/contact.yaml')
+        self.assertIn(
+            '/content/pages/contact.yaml',
+            index.list_doc_paths('/content/pages'))
+        index.remove('/content/pages/about@de.yaml')
+        self.assertFalse(index.file_exists('/content/pages/about@de.yaml'))
+        self.assertNotIn(
+            '/content/pages/about@de.yaml',
+            index.list_doc_paths('/content/pages'))
+
+        # Blueprints change the owners of documents.
+        self.pod.write_file('/content/pages/sub/_blueprint.yaml', '')
+        index.add('/content/pages/sub/_blueprint.yaml')
+        self.assertEqual(
+            '/content/pages/sub', index.get_owner('/content/pages/sub/team.md'))
+
+    def test_pod(self):
+        collection = self.pod.get_collection('pages')
+        self.assertEqual(
+            ['/content/pages', '/content/pages/posts'],
+            [col.pod_path for col in self.pod.list_collections()])
+        self.assertEqual(2, len(collection.list_docs(locale=None)))
+
+        # Files written through the pod are indexed.
+        self.pod.write_file('/content/pages/contact.yaml', '')
+        self.assertEqual(3, len(collection.list_docs(locale=None)))
+        self.pod.delete_file('/content/pages/contact.yaml')
+        self.assertEqual(2, len(collection.list_docs(locale=None)))
+        self.pod.write_file('/content/news/_blueprint.yaml', '')
+        self.assertEqual(3, len(self.pod.list_collections()))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,6 +1,13 @@
-"""Dependency graph for content references."""
+"""Dependency graph for content references.
 
+References to a collection, such as made by listing its documents, are
+recorded as the pod path of the collection's directory, and make the source
+a dependent of every file in the directory.
+"""
+
+import contextlib
 import os
+import threading
 
 class Error(Exception):
     pass
@@ -12,8 +19,26 @@ class BadFieldsError(Error, ValueError):
 
 class DependencyGraph(object):
     def __init__(self):
+        self._local = threading.local()
         self.reset()
 
+    @contextlib.contextmanager
+    def track(self, source):
+        """Records references added with `add_tracked` in the block as made
+        by the source, such as the document being rendered."""
+        previous = getattr(self._local, 'source', None)
+        self._local.source = source
+        try:
+            yield
+        finally:
+            self._local.source = previous
+
+    def add_tracked(self, reference):
+        """Add a reference made by the source being tracked, if any."""
+        source = getattr(self._local, 'source', None)
+        if source is not None:
+            self.add(source, reference)
+
     def add_all(self, path_to_dependencies):
         """Add all from a dict of paths to dependencies."""
 
@@ -62,13 +87,39 @@ class DependencyGraph(object):
         Gets dependents that rely upon the reference or a collection that
         contains the reference.
         """
-        return (self._dependents.get(reference, set())
-            | self._dependents.get(os.path.dirname(reference), set())
-            | set([reference]))
+        result = self._dependents.get(reference, set()) | set([reference])
+        # Collections list the documents of their subdirectories too.
+        dir_path = os.path.dirname(reference)
+        while dir_path not in ('', '/'):
+            result |= self._dependents.get(dir_path, set())
+            dir_path = os.path.dirname(dir_path)
+        return result
+
+    def get_all_dependents(self, reference):
+        """Gets the transitive dependents of the reference, including itself."""
+        result = set([reference])
+        pending = [reference]
+        while pending:
+            for source in self.get_dependents(pending.pop()):
+                if source not in result:
+                    result.add(source)
+                    pending.append(source)
+        return result
 
     def get_dependencies(self, source):
         return self._dependencies.get(source, set())
 
+    def get_all_dependencies(self, source):
+        """Gets the transitive dependencies of the source, including itself."""
+        result = set([source])
+        pending = [source]
+        while pending:
+            for reference in self.get_dependencies(pending.pop()):
+                if reference not in result:
+                    result.add(reference)
+                    pending.append(reference)
+        return result
+
     def reset(self):
         self._dependents = {}
         self._dependencies = {}
@@ -66,6 +66,24 @@ class DependencyGraphTestCase(unittest.TestCase):
             ]),
             graph.get_dependents('/content/collection/coll1.yaml'))
 
+    def test_get_dependents_nested_collection(self):
+        graph = dependency.DependencyGraph()
+        graph.add('/content/test.yaml', '/content/collection')
+        self.assertIn(
+            '/content/test.yaml',
+            graph.get_dependents('/content/collection/sub/coll1.yaml'))
+
+    def test_track(self):
+        graph = dependency.DependencyGraph()
+        graph.add_tracked('/content/collection')
+        with graph.track('/content/test.yaml'):
+            graph.add_tracked('/content/collection')
+            with graph.track(None):
+                graph.add_tracked('/content/other')
+        graph.add_tracked('/content/other')
+        self.assertEqual(
+            {'/content/test.yaml': ['/content/collection']}, graph.export())
+
     def test_get_dependents_self(self):
         graph = dependency.DependencyGraph()
         self.assertEqual(
@@ -81,6 +99,19 @@ class DependencyGraphTestCase(unittest.TestCase):
             set(['/content/test1.yaml', '/content/test2.yaml']),
             graph.get_dependencies('/content/test.yaml'))
 
+    def test_get_all_dependencies(self):
+        graph = dependency.DependencyGraph()
+        graph.add('/content/test.yaml', '/content/test1.yaml')
+        graph.add('/content/test1.yaml', '/content/test2.yaml')
+        graph.add('/content/test2.yaml', '/content/test.yaml')
+        self.assertEqual(
+            set(['/content/test.yaml', '/content/test1.yaml',
+                 '/content/test2.yaml']),
+            graph.get_all_dependencies('/content/test1.yaml'))
+        self.assertEqual(
+            set(['/content/test3.yaml']),
+            graph.get_all_dependencies('/content/test3.yaml'))
+
     def test_empty_dependents(self):
         graph = dependency.DependencyGraph()
         self.assertEqual(set(['/content/test1.yaml']), graph.get_dependents('/content/test1.yaml'))
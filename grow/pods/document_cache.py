@@ -5,26 +5,119 @@ Supports caching specific to the pod_path of a document.
 
 The contents of the cache should be raw and not internationalized as it will
 be shared between locales with the same pod_path.
+
+When created with a pod, the cache can be persisted between processes. Each
+persisted entry records the modification time and size of the document when
+it was cached and is discarded on load if the file has since changed.
+
+Besides the raw front matter, an entry holds the parsed yaml of front matter
+without custom constructors, keyed by the sha1 digest of the yaml, so that a
+later process does not parse unchanged documents again. Yaml using
+constructors, such as `!g.doc`, produces live objects and is parsed in each
+process, as is yaml whose values would not survive being stored as JSON.
+
+Parsed values, such as the parsed front matter shared by the locales of a
+document, are kept in memory and are dropped along with the entry of the
+document.
 """
 
+import json
+import time
+from . import file_index
+
+VERSION = 2
+
+
+def is_persistable(value):
+    """Returns whether a value is stored as JSON without changing."""
+    if value is None or isinstance(value, (basestring, bool, int, long)):
+        return True
+    if isinstance(value, float):
+        return value == value  # NaN is not equal to its JSON copy.
+    if isinstance(value, list):
+        return all(is_persistable(item) for item in value)
+    if isinstance(value, dict):
+        return all(isinstance(key, basestring) and is_persistable(item)
+                   for key, item in value.iteritems())
+    return False
+
+
+def _restore_strings(value):
+    """Returns a value loaded from JSON with ASCII strings as `str`.
+
+    Yaml parses ASCII strings as `str`, and the values loaded from JSON
+    should be the same as the values parsed from yaml.
+    """
+    if isinstance(value, unicode):
+        try:
+            return value.encode('ascii')
+        except UnicodeEncodeError:
+            return value
+    if isinstance(value, list):
+        return [_restore_strings(item) for item in value]
+    if isinstance(value, dict):
+        return dict((_restore_strings(key), _restore_strings(item))
+                    for key, item in value.iteritems())
+    return value
+
+
 class DocumentCache(object):
 
-    def __init__(self):
+    def __init__(self, pod=None):
+        self._pod = pod
         self.reset()
 
     def _ensure_exists(self, doc, value=None):
         if doc.pod_path not in self._cache:
             self._cache[doc.pod_path] = value or {}
+        self._ensure_stats(doc.pod_path)
         return doc.pod_path
 
+    def _ensure_stats(self, path):
+        if self._pod is None or path in self._stats:
+            return
+        stats = self._get_stats(path)
+        if stats is not None:
+            self._stats[path] = stats
+
+    def _get_stats(self, path):
+        try:
+            return [self._pod.file_modified(path), self._pod.file_size(path)]
+        except (IOError, OSError):
+            return None
+
+    def _verify(self, path):
+        """Moves a persisted entry into the cache if the file is unchanged."""
+        if path not in self._unverified:
+            return
+        stats, value = self._unverified.pop(path)
+        if self._get_stats(path) == stats:
+            self._cache[path] = _restore_strings(value)
+            self._stats[path] = stats
+
     def add(self, doc, value):
+        self._unverified.pop(doc.pod_path, None)
         self._cache[doc.pod_path] = value
+        self._ensure_stats(doc.pod_path)
 
     def add_all(self, path_to_cached):
         for path, value in path_to_cached.iteritems():
+            self._unverified.pop(path, None)
             self._cache[path] = value
 
+    def add_parsed(self, doc, key, value):
+        self._parsed.setdefault(doc.pod_path, {})[key] = value
+
+    def add_yaml(self, doc, digest, data):
+        """Caches the parsed yaml of a document, if it can be persisted."""
+        if not is_persistable(data):
+            return
+        self._verify(doc.pod_path)
+        path = self._ensure_exists(doc)
+        self._cache[path].setdefault('yaml', {})[digest] = data
+
     def add_property(self, doc, prop, value):
+        self._verify(doc.pod_path)
         path = self._ensure_exists(doc)
         self._cache[path][prop] = value
 
@@ -32,18 +125,66 @@ class DocumentCache(object):
         return self.remove_by_path(doc.pod_path)
 
     def remove_by_path(self, path):
+        self._stats.pop(path, None)
+        self._unverified.pop(path, None)
+        self._parsed.pop(path, None)
         return self._cache.pop(path, None)
 
     def export(self):
         return self._cache
 
     def get(self, doc):
+        self._verify(doc.pod_path)
         return self._cache.get(doc.pod_path, None)
 
+    def get_parsed(self, doc, key):
+        return self._parsed.get(doc.pod_path, {}).get(key)
+
+    def get_yaml(self, doc, digest):
+        """Returns the parsed yaml of a document with the given digest."""
+        value = self.get(doc)
+        if value is None:
+            return None
+        return value.get('yaml', {}).get(digest)
+
     def get_property(self, doc, prop):
+        self._verify(doc.pod_path)
         if doc.pod_path in self._cache:
             return self._cache[doc.pod_path].get(prop, None)
         return None
 
+    def load(self, content):
+        """Loads entries persisted by `to_string`, verified on first use."""
+        try:
+            data = json.loads(content)
+        except ValueError:
+            return
+        if data.get('version') != VERSION:
+            return
+        for path, (stats, value) in data.get('documents', {}).iteritems():
+            if path not in self._cache:
+                self._unverified[path] = (stats, value)
+
     def reset(self):
         self._cache = {}
+        self._parsed = {}
+        self._stats = {}
+        self._unverified = {}
+
+    def to_string(self):
+        """Serializes the entries of documents that have not changed."""
+        documents = {}
+        # Documents modified too recently may be modified again without
+        # changing their modification time.
+        racy_time = time.time() - file_index.RACY_SECONDS
+        for path, value in self._cache.iteritems():
+            stats = self._stats.get(path)
+            if stats is None or stats[0] > racy_time:
+                continue
+            documents[path] = (stats, value)
+        for path, (stats, value) in self._unverified.iteritems():
+            documents.setdefault(path, (stats, value))
+        return json.dumps({
+            'documents': documents,
+            'version': VERSION,
+        }, sort_keys=True)
@@ -1,7 +1,11 @@
 from . import document_cache
 from . import pods
 from . import storage
+from grow.common import utils
 from grow.testing import testing
+import json
+import mock
+import os
 import unittest
 
 
@@ -68,6 +72,75 @@ class DocumentCacheTestCase(unittest.TestCase):
         self.assertEqual(value, self.doc_cache.remove(doc))
         self.assertEqual(None, self.doc_cache.get(doc))
 
+    def test_to_string(self):
+        doc = self.pod.get_doc('/content/pages/intro.md')
+        doc_cache = document_cache.DocumentCache(pod=self.pod)
+        abs_path = self.pod.abs_path(doc.pod_path)
+        os.utime(abs_path, (0, 0))
+        doc_cache.add_property(doc, 'answer', 42)
+        content = doc_cache.to_string()
+
+        # Entries are reused while the document is unchanged.
+        doc_cache = document_cache.DocumentCache(pod=self.pod)
+        doc_cache.load(content)
+        self.assertEqual(42, doc_cache.get_property(doc, 'answer'))
+
+        # Entries are discarded once the document changes.
+        doc_cache = document_cache.DocumentCache(pod=self.pod)
+        doc_cache.load(content)
+        self.pod.write_file(doc.pod_path, 'changed')
+        self.assertEqual(None, doc_cache.get_property(doc, 'answer'))
+
+        # Recently modified documents are not persisted.
+        doc_cache.add_property(doc, 'answer', 42)
+        self.assertEqual({}, json.loads(doc_cache.to_string())['documents'])
+
+    def test_persisted_yaml(self):
+        pod = testing.create_pod()
+        pod.write_yaml('/podspec.yaml', {'localization': {
+            'locales': ['en', 'de'],
+        }})
+        pod.write_yaml('/content/pages/_blueprint.yaml', {
+            '$path': '/{base}/',
+            '$localization': {'path': '/{locale}/{base}/'},
+        })
+        pod.write_file('/content/pages/plain.yaml', '\n'.join([
+            '$title: Plain',
+            '$localization:',
+            '  locales: [de]',
+            'items: [1, 2.5, true, ~, "\xc3\xa9"]',
+        ]))
+        pod.write_file(
+            '/content/pages/tagged.yaml', '$title: !_ Tagged\n')
+        pod.write_file(
+            '/content/pages/dated.yaml', '$title: Dated\nday: 2017-01-01\n')
+        for pod_path in pod.list_dir('/content/pages/'):
+            os.utime(pod.abs_path('/content/pages/' + pod_path), (0, 0))
+        plain = pod.get_doc('/content/pages/plain.yaml', locale='de')
+        expected_fields = plain.fields.get('items')
+        self.assertEqual('/de/plain/', plain.url.path)
+        for pod_path in ['/content/pages/tagged.yaml',
+                         '/content/pages/dated.yaml']:
+            pod.get_doc(pod_path).url
+        pod.podcache.write_documents()
+
+        # Unchanged documents without yaml tags are not parsed again.
+        pod = pods.Pod(pod.root)
+        with mock.patch.object(utils, 'load_yaml',
+                               wraps=utils.load_yaml) as load_yaml:
+            plain = pod.get_doc('/content/pages/plain.yaml', locale='de')
+            self.assertEqual(['de'], [str(l) for l in plain.locales])
+            self.assertEqual('/de/plain/', plain.url.path)
+            self.assertEqual(expected_fields, plain.fields.get('items'))
+            self.assertIsInstance(plain.title, str)
+            self.assertFalse(load_yaml.called)
+            self.assertEqual(
+                '/tagged/', pod.get_doc('/content/pages/tagged.yaml').url.path)
+            self.assertEqual(1, load_yaml.call_count)
+            self.assertEqual(
+                '/dated/', pod.get_doc('/content/pages/dated.yaml').url.path)
+            self.assertEqual(2, load_yaml.call_count)
+
 
 if __name__ == '__main__':
     unittest.main()
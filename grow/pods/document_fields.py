@@ -2,14 +2,35 @@
 Document fields for accessing the meta fields parsed from the document.
 """
 
-from boltons import iterutils
+import collections
 import re
+from boltons import iterutils
 
 
 ENV_KEY_REGEX = re.compile('(.*)@env\.([^@]+)$')
 LOCALIZED_KEY_REGEX = re.compile('(.*)@([^@]+)$')
 
 
+
+def _match_tag(tag, value):
+    """Returns whether a value matches the regex of a key tag, in full."""
+    # Compiled patterns are kept in the bounded cache of `re`.
+    return re.match(r'^{}$'.format(tag), value) is not None
+
+
+def _parse_key(key):
+    """Returns the env and locale tags of a key, either of which may be None."""
+    if key.endswith('@'):
+        key = key[:-1]
+    env_match = ENV_KEY_REGEX.match(key)
+    if env_match:
+        return env_match.group(2), None
+    match = LOCALIZED_KEY_REGEX.match(key)
+    if match:
+        return None, match.group(2)
+    return None, None
+
+
 class DocumentFields(object):
 
     def __contains__(self, item):
@@ -19,7 +40,11 @@ class DocumentFields(object):
         return self._data[key]
 
     def __init__(self, data, locale_identifier=None, env_name=None):
-        self._data = DocumentFields.untag(data, locale_identifier, env_name)
+        if isinstance(data, TaggedFields):
+            self._data = data.untag(locale_identifier, env_name)
+        else:
+            self._data = DocumentFields.untag(
+                data, locale_identifier, env_name)
 
     def __len__(self):
         return len(self._data)
@@ -45,8 +70,7 @@ class DocumentFields(object):
             env_match = ENV_KEY_REGEX.match(key)
             if env_match:
                 untagged_key, env_name_from_key = env_match.groups()
-                env_regex = r'^{}$'.format(env_name_from_key)
-                if not env_name or not re.match(env_regex, env_name):
+                if not env_name or not _match_tag(env_name_from_key, env_name):
                     return False
                 updated_localized_paths.add((path, untagged_key.rstrip('@')))
                 return untagged_key, value
@@ -56,8 +80,7 @@ class DocumentFields(object):
                 updated_localized_paths.add((path, key))
                 return key, value
             untagged_key, locale_from_key = match.groups()
-            locale_regex = r'^{}$'.format(locale_from_key)
-            if not locale or not re.match(locale_regex, locale):
+            if not locale or not _match_tag(locale_from_key, locale):
                 return False
             updated_localized_paths.add((path, untagged_key.rstrip('@')))
             return untagged_key, value
@@ -88,3 +111,53 @@ class DocumentFields(object):
 
     def update(self, updated):
         self._data.update(updated)
+
+
+class TaggedFields(object):
+    """Tagged fields, untagged for any number of locales and environments.
+
+    The env and locale tags of the keys are collected once. Untagging only
+    depends on which of those tags match, so locales and environments that
+    match the same tags are untagged once and share the result. Each gets
+    its own copy of the top level fields, which documents update when
+    injected, but nested values are shared and must not be modified; the
+    `deeptrans` filter returns translated copies instead.
+    """
+
+    def __init__(self, data):
+        self.data = data
+        env_tags = set()
+        locale_tags = set()
+        pending = [data]
+        while pending:
+            value = pending.pop()
+            if isinstance(value, collections.Mapping):
+                for key, sub_value in value.iteritems():
+                    if isinstance(key, basestring):
+                        env_tag, locale_tag = _parse_key(key)
+                        if env_tag is not None:
+                            env_tags.add(env_tag)
+                        if locale_tag is not None:
+                            locale_tags.add(locale_tag)
+                    pending.append(sub_value)
+            elif isinstance(value, (list, tuple, set)):
+                pending.extend(value)
+        self._env_tags = sorted(env_tags)
+        self._locale_tags = sorted(locale_tags)
+        self._matches_to_untagged = {}
+
+    def untag(self, locale=None, env_name=None):
+        """Returns a copy of the fields untagged for a locale and env."""
+        matches = (
+            tuple(tag for tag in self._env_tags
+                  if env_name and _match_tag(tag, env_name)),
+            tuple(tag for tag in self._locale_tags
+                  if locale and _match_tag(tag, locale)),
+        )
+        untagged = self._matches_to_untagged.get(matches)
+        if untagged is None:
+            untagged = DocumentFields.untag(self.data, locale, env_name)
+            self._matches_to_untagged[matches] = untagged
+        if isinstance(untagged, dict):
+            return dict(untagged)
+        return untagged
@@ -498,5 +498,31 @@ class DocumentFieldsTestCase(unittest.TestCase):
         }, untag(fields, locale='de', env_name='prod'))
 
 
+    def test_tagged_fields(self):
+        tagged_fields = document_fields.TaggedFields({
+            'title@': 'value-none',
+            'title@de': 'value-de',
+            'nested': [{
+                'foo@fr|it': 'value-fr-it',
+                'foo@env.prod': 'value-prod',
+            }],
+        })
+        untag = document_fields.DocumentFields.untag
+        for locale in (None, 'de', 'fr', 'it', 'ja'):
+            for env_name in (None, 'prod'):
+                self.assertDictEqual(
+                    untag(tagged_fields.data, locale, env_name),
+                    tagged_fields.untag(locale, env_name))
+
+        # Locales matching the same tags are untagged once and share nested
+        # values, but each gets its own copy of the top level fields.
+        en_fields = tagged_fields.untag('en')
+        self.assertIs(en_fields['nested'], tagged_fields.untag('ja')['nested'])
+        en_fields['title'] = 'changed'
+        self.assertEqual('value-none', tagged_fields.untag('ja')['title'])
+
+        doc_fields = document_fields.DocumentFields(tagged_fields, 'de')
+        self.assertEqual('value-de', doc_fields['title'])
+
 if __name__ == '__main__':
     unittest.main()
@@ -3,22 +3,37 @@ Parsing and manipulation of front matter elements of a document.
 """
 
 import collections
+import hashlib
 import re
 import yaml
 from grow.common import utils
+from . import document_fields
 
 BOUNDARY_REGEX = re.compile(r'^-{3,}\s*$', re.MULTILINE)
+# Yaml constructors whose values depend on the locale of the document.
+LOCALIZED_CONSTRUCTOR_REGEX = re.compile(r'!g\.(doc|static|url)\b')
+# Yaml tags, such as the constructors of grow, whose values are not plain data.
+TAG_REGEX = re.compile(r'(?:^|[\s:,\[{-])!')
 CONVERT_MESSAGE = """Document contains too many parts: {},
     Please run `grow convert --type content_locale_split` to help update files."""
 
 
-def _update_deep(orig_dict, new_dict):
+def _merge_deep(orig_dict, new_dict):
+    """Returns orig_dict updated deeply with new_dict, modifying neither."""
+    merged = dict(orig_dict)
     for k in new_dict:
-        if (k in orig_dict and isinstance(orig_dict[k], dict)
+        if (k in merged and isinstance(merged[k], dict)
                 and isinstance(new_dict[k], collections.Mapping)):
-            _update_deep(orig_dict[k], new_dict[k])
+            merged[k] = _merge_deep(merged[k], new_dict[k])
         else:
-            orig_dict[k] = new_dict[k]
+            merged[k] = new_dict[k]
+    return merged
+
+
+def _get_digest(content):
+    if isinstance(content, unicode):
+        content = content.encode('utf-8')
+    return hashlib.sha1(content).hexdigest()
 
 
 class Error(Exception):
@@ -37,7 +52,10 @@ class DocumentFrontMatter(object):
     def __init__(self, doc, raw_front_matter=None):
         self._doc = doc
         self.data = {}
+        self.tagged_fields = document_fields.TaggedFields(self.data)
         self._raw_front_matter = None
+        self.digest = None
+        self.has_tags = False
         self._load_front_matter(raw_front_matter)
 
     @staticmethod
@@ -57,15 +75,19 @@ class DocumentFrontMatter(object):
         """
         Documents with localization need to base the front-matter off the base
         document to extend or overwrite the base fields.
+
+        The parsed front matter is shared by the documents of every locale with
+        the same pod path, unless it uses constructors that depend on the
+        locale, and must not be modified.
         """
+        raw_yamls = []
         # Load base locales from the raw yaml to prevent shared variables.
         for locale_path in reversed(self._doc.locale_paths[1:]):
             if self._doc.pod.file_exists(locale_path):
                 locale_doc = self._doc.pod.get_doc(locale_path)
                 raw_locale_front_matter = locale_doc.format.front_matter.export()
                 if raw_locale_front_matter:
-                    _update_deep(self.data, self._load_yaml(
-                        raw_locale_front_matter))
+                    raw_yamls.append(raw_locale_front_matter)
 
         if raw_front_matter:
             # There should be no boundary separators in the front-matter.
@@ -79,9 +101,44 @@ class DocumentFrontMatter(object):
                 self._doc.raw_content)
 
         if self._raw_front_matter:
-            _update_deep(self.data, self._load_yaml(self._raw_front_matter))
+            raw_yamls.append(self._raw_front_matter)
+        self.digest = _get_digest('\n'.join(raw_yamls))
+        self.has_tags = any(TAG_REGEX.search(raw_yaml) for raw_yaml in raw_yamls)
+        if not raw_yamls:
+            return
+
+        locale = None
+        if any(LOCALIZED_CONSTRUCTOR_REGEX.search(raw_yaml)
+               for raw_yaml in raw_yamls):
+            locale = str(self._doc._locale_kwarg)
+        key = ('front_matter', tuple(raw_yamls), locale)
+        document_cache = self._doc.pod.podcache.document_cache
+        tagged_fields = document_cache.get_parsed(self._doc, key)
+        if tagged_fields is None:
+            data = {}
+            for raw_yaml in raw_yamls:
+                data = _merge_deep(data, self._load_yaml(raw_yaml))
+            tagged_fields = document_fields.TaggedFields(data)
+            document_cache.add_parsed(self._doc, key, tagged_fields)
+        if self.data:
+            tagged_fields = document_fields.TaggedFields(
+                _merge_deep(self.data, tagged_fields.data))
+        self.tagged_fields = tagged_fields
+        self.data = tagged_fields.data
 
     def _load_yaml(self, raw_yaml):
+        """Parses yaml, reusing yaml without tags parsed by earlier processes."""
+        if TAG_REGEX.search(raw_yaml):
+            return self._parse_yaml(raw_yaml)
+        document_cache = self._doc.pod.podcache.document_cache
+        digest = _get_digest(raw_yaml)
+        data = document_cache.get_yaml(self._doc, digest)
+        if data is None:
+            data = self._parse_yaml(raw_yaml)
+            document_cache.add_yaml(self._doc, digest, data)
+        return data
+
+    def _parse_yaml(self, raw_yaml):
         try:
             return utils.load_yaml(
                 raw_yaml, doc=self._doc, pod=self._doc.pod)
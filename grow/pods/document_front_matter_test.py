@@ -161,5 +161,28 @@ class DocumentFrontmatterTestCase(unittest.TestCase):
         }, data['foobar'])
 
 
+    def test_shared_between_locales(self):
+        """Front matter is parsed once for the locales of a document."""
+        doc = self.pod.get_doc('/content/localized/localized.yaml')
+        front_matter = doc.format.front_matter
+        for locale in ('de', 'fr'):
+            localized_doc = self.pod.get_doc(
+                '/content/localized/localized.yaml', locale=locale)
+            localized_front_matter = localized_doc.format.front_matter
+            self.assertIsNot(front_matter, localized_front_matter)
+            self.assertIs(front_matter.data, localized_front_matter.data)
+            self.assertIs(
+                front_matter.tagged_fields,
+                localized_front_matter.tagged_fields)
+
+        # Front matter using localized constructors is parsed for each locale.
+        self.pod.write_file(
+            '/content/localized/url.yaml',
+            'url: !g.url /content/pages/home.yaml\n')
+        de_doc = self.pod.get_doc('/content/localized/url.yaml', locale='de')
+        fr_doc = self.pod.get_doc('/content/localized/url.yaml', locale='fr')
+        self.assertIsNot(
+            de_doc.format.front_matter.data, fr_doc.format.front_matter.data)
+
 if __name__ == '__main__':
     unittest.main()
@@ -1,8 +1,10 @@
+from . import document_cache as document_cache_lib
 from . import document_fields
 from . import document_format
 from . import footnotes
 from . import locales
 from . import messages
+from . import pagination
 from . import urls
 from grow.common import utils
 import datetime
@@ -14,6 +16,10 @@ import re
 
 PATH_LOCALE_REGEX = re.compile(r'@([^-_]+)([-_]?)([^\.]*)(\.[^\.]+)$')
 
+# Fields that the locales and serving paths of documents are built from.
+SERVING_FIELDS = ('$category', '$localization', '$parent', '$path', '$slug',
+                  '$title')
+
 
 class Error(Exception):
     pass
@@ -167,7 +173,7 @@ class Document(object):
 
     @property
     def category(self):
-        return self.fields.get('$category')
+        return self._serving_fields.get('$category')
 
     @property
     def content(self):
@@ -198,11 +204,44 @@ class Document(object):
 
     @utils.cached_property
     def fields(self):
-        locale_identifier = str(self._locale_kwarg or self.default_locale)
         return document_fields.DocumentFields(
-            self.format.front_matter.data, locale_identifier,
+            self.format.front_matter.tagged_fields, self._fields_locale,
             env_name=self.pod.env.name)
 
+    @property
+    def _fields_locale(self):
+        return str(self._locale_kwarg or self.default_locale)
+
+    @utils.cached_property
+    def _serving_fields(self):
+        """The fields that the locales and serving paths are built from.
+
+        They are persisted with the document cache, keyed by the env, the
+        locale and the digest of the front matter, so that routing unchanged
+        documents in a later process does not untag all of their fields.
+        Front matter using yaml tags may depend on other files, and its
+        fields are not persisted.
+        """
+        front_matter = self.format.front_matter
+        if front_matter.has_tags:
+            return self._get_serving_fields()
+        document_cache = self.pod.podcache.document_cache
+        key = '{}:{}:{}'.format(
+            self.pod.env.name, self._fields_locale, front_matter.digest)
+        persisted = document_cache.get_property(self, 'serving_fields') or {}
+        fields = persisted.get(key)
+        if fields is None:
+            fields = self._get_serving_fields()
+            if document_cache_lib.is_persistable(fields):
+                persisted = dict(persisted)
+                persisted[key] = fields
+                document_cache.add_property(self, 'serving_fields', persisted)
+        return fields
+
+    def _get_serving_fields(self):
+        return dict((name, self.fields[name]) for name in SERVING_FIELDS
+                    if name in self.fields)
+
     @utils.cached_property
     def footnotes(self):
         # Configure the footnotes based on the doc or podspec settings.
@@ -246,9 +285,10 @@ class Document(object):
     @utils.cached_property
     def locales(self):
         # Use $localization:locales if present, else use collection's locales.
-        localized = '$localization' in self.fields
+        fields = self._serving_fields
+        localized = '$localization' in fields
         if localized:
-            localization = self.fields['$localization']
+            localization = fields['$localization']
             # Disable localization with $localization:~.
             if localization is None:
                 return []
@@ -264,24 +304,25 @@ class Document(object):
     @property
     @utils.memoize
     def parent(self):
-        if '$parent' not in self.fields:
+        if '$parent' not in self._serving_fields:
             return None
-        parent_pod_path = self.fields['$parent']
+        parent_pod_path = self._serving_fields['$parent']
         return self.collection.get_doc(parent_pod_path, locale=self.locale)
 
     @property
     @utils.memoize
     def path_format(self):
         val = None
+        fields = self._serving_fields
         if (self.locale
                 and self.locale != self.default_locale):
-            if ('$localization' in self.fields
-                    and 'path' in self.fields['$localization']):
-                val = self.fields['$localization']['path']
+            if ('$localization' in fields
+                    and 'path' in fields['$localization']):
+                val = fields['$localization']['path']
             elif self.collection.localization:
                 val = self.collection.localization.get('path')
         if val is None:
-            return self.fields.get('$path', self.collection.path_format)
+            return fields.get('$path', self.collection.path_format)
         return val
 
     @property  # Cached in document format.
@@ -290,9 +331,11 @@ class Document(object):
 
     @property
     def slug(self):
-        if '$slug' in self.fields:
-            return self.fields['$slug']
-        return utils.slugify(self.title) if self.title is not None else None
+        fields = self._serving_fields
+        if '$slug' in fields:
+            return fields['$slug']
+        title = fields.get('$title')
+        return utils.slugify(title) if title is not None else None
 
     @property
     def sitemap(self):
@@ -335,6 +378,7 @@ class Document(object):
         """Injects without updating the copy on the filesystem."""
         if fields != utils.SENTINEL:
             self.fields.update(fields)
+            self.__dict__.pop('_serving_fields', None)
         if body != utils.SENTINEL:
             self.format.body = body
         self.pod.logger.info('Injected -> {}'.format(self.pod_path))
@@ -394,27 +438,19 @@ class Document(object):
 
     def next(self, docs=None):
         if docs is None:
-            docs = self.collection.list_docs()
-        for i, doc in enumerate(docs):
-            if type(doc) != self.__class__:
-                raise ValueError('Usage: {{doc.next(<docs>)}}.')
-            if doc == self:
-                n = i + 1
-                if n == len(docs):
-                    return None
-                return docs[i + 1]
+            positions = self.collection.get_positions()
+        else:
+            positions = pagination.get_positions(
+                docs, doc_class=self.__class__)
+        return positions.get_neighbor(self, 1)
 
     def prev(self, docs=None):
         if docs is None:
-            docs = self.collection.list_docs()
-        for i, doc in enumerate(docs):
-            if type(doc) != self.__class__:
-                raise ValueError('Usage: {{doc.prev(<docs>)}}.')
-            if doc == self:
-                n = i - 1
-                if n < 0:
-                    return None
-                return docs[i - 1]
+            positions = self.collection.get_positions()
+        else:
+            positions = pagination.get_positions(
+                docs, doc_class=self.__class__)
+        return positions.get_neighbor(self, -1)
 
     def titles(self, title_name=None):
         if title_name is None:
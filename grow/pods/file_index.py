@@ -0,0 +1,85 @@
+"""Index of the modification times, sizes and hashes of files in a pod.
+
+Files are only hashed again when their modification time or size changed
+since the index was exported, so that an index persisted between builds
+makes checking a large pod for changes cheap.
+"""
+
+import hashlib
+import os
+import time
+
+# Directories that are never walked.
+IGNORED_DIRS = ('node_modules',)
+
+# Files modified this close to a scan may be modified again without changing
+# their modification time, so they are hashed again by the next scan.
+RACY_SECONDS = 2
+
+
+class FileIndex(object):
+    """Modification time, size and sha-1 hash of files in a pod."""
+
+    def __init__(self, pod, files=None, ignored_dirs=None):
+        self.pod = pod
+        self._old_files = files or {}
+        self._files = {}
+        self._ignored_dirs = set(
+            os.path.abspath(path) for path in ignored_dirs or ())
+
+    def _hash_file(self, pod_path):
+        sha = hashlib.sha1()
+        with self.pod.open_file(pod_path, 'rb') as fp:
+            for chunk in iter(lambda: fp.read(65536), b''):
+                sha.update(chunk)
+        return sha.hexdigest()
+
+    def _stat(self, pod_path, scan_time):
+        modified = self.pod.file_modified(pod_path)
+        size = self.pod.file_size(pod_path)
+        old = self._old_files.get(pod_path)
+        if old and old[0] == modified and old[1] == size:
+            self._files[pod_path] = old
+        else:
+            if modified > scan_time - RACY_SECONDS:
+                modified = None
+            self._files[pod_path] = [modified, size, self._hash_file(pod_path)]
+        return self._files[pod_path]
+
+    def export(self):
+        """Returns the files that have been indexed, for persisting."""
+        return self._files
+
+    def get_sha(self, pod_path):
+        """Returns the hash of a file, or None if it does not exist."""
+        if pod_path not in self._files:
+            if not self.pod.file_exists(pod_path):
+                return None
+            self._stat(pod_path, time.time())
+        return self._files[pod_path][2]
+
+    def scan(self, pod_path='/'):
+        """Indexes the files in a directory, returning their pod paths.
+
+        Hidden files and directories, `IGNORED_DIRS` and the ignored
+        directories given to the index are skipped.
+        """
+        pod_paths = []
+        scan_time = time.time()
+        root = self.pod.abs_path('/').rstrip(os.sep)
+        if not self.pod.file_exists(pod_path):
+            return pod_paths
+        for dirpath, dirnames, filenames in self.pod.walk(pod_path):
+            dirnames[:] = [
+                dirname for dirname in dirnames
+                if not dirname.startswith('.')
+                and dirname not in IGNORED_DIRS
+                and os.path.abspath(os.path.join(dirpath, dirname))
+                not in self._ignored_dirs]
+            for filename in filenames:
+                if filename.startswith('.'):
+                    continue
+                path = os.path.join(dirpath, filename)[len(root):]
+                self._stat(path, scan_time)
+                pod_paths.append(path)
+        return pod_paths
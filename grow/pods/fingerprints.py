@@ -0,0 +1,102 @@
+"""Cache of the fingerprints of static files.
+
+A fingerprint is the md5 hash of a static file, used in the serving paths of
+fingerprinted static files. Fingerprints are cached along with the
+modification time and size of the file, and a file is only hashed again when
+either changes. The cache is shared by all static controllers of a pod and
+persisted in the podcache.
+"""
+
+import Queue
+import hashlib
+import threading
+import time
+from . import file_index
+
+# Number of threads hashing files when fingerprints are prefetched.
+POOL_SIZE = 8
+
+
+class FingerprintCache(object):
+    """Md5 hashes of static files, keyed by modification time and size."""
+
+    def __init__(self, pod, fingerprints=None):
+        self.pod = pod
+        self._fingerprints = dict(fingerprints or {})
+        self._lock = threading.Lock()
+
+    def _hash_file(self, pod_path):
+        md5 = hashlib.md5()
+        with self.pod.open_file(pod_path, 'rb') as fp:
+            for chunk in iter(lambda: fp.read(65536), b''):
+                md5.update(chunk)
+        return md5.hexdigest()
+
+    def export(self):
+        """Returns the cached fingerprints, for persisting."""
+        # Files modified this recently may be modified again without changing
+        # their modification time, so they are hashed again by later builds.
+        racy_time = time.time() - file_index.RACY_SECONDS
+        fingerprints = {}
+        with self._lock:
+            for pod_path, (modified, size, fingerprint) in \
+                    self._fingerprints.iteritems():
+                if modified is not None and modified > racy_time:
+                    modified = None
+                fingerprints[pod_path] = [modified, size, fingerprint]
+        return fingerprints
+
+    def _is_cached(self, pod_path, modified, size):
+        with self._lock:
+            cached = self._fingerprints.get(pod_path)
+        if cached and cached[0] == modified and cached[1] == size:
+            return cached[2]
+        return None
+
+    def get(self, pod_path):
+        """Returns the fingerprint of a file, hashing it if it changed."""
+        modified = self.pod.file_modified(pod_path)
+        size = self.pod.file_size(pod_path)
+        fingerprint = self._is_cached(pod_path, modified, size)
+        if fingerprint is not None:
+            return fingerprint
+        fingerprint = self._hash_file(pod_path)
+        with self._lock:
+            self._fingerprints[pod_path] = [modified, size, fingerprint]
+        return fingerprint
+
+    def invalidate(self, pod_path):
+        """Removes the fingerprint of a file that has changed."""
+        with self._lock:
+            self._fingerprints.pop(pod_path, None)
+
+    def prefetch(self, pod_paths):
+        """Fingerprints changed files in parallel, so later calls are cached.
+
+        Files are checked for changes by the same threads that hash them, and
+        each file is only checked once.
+        """
+        queue = Queue.Queue()
+        for pod_path in pod_paths:
+            queue.put(pod_path)
+
+        def _work():
+            while True:
+                try:
+                    pod_path = queue.get_nowait()
+                except Queue.Empty:
+                    return
+                self.get(pod_path)
+
+        threads = [threading.Thread(target=_work)
+                   for _ in range(min(POOL_SIZE, queue.qsize()) - 1)]
+        for thread in threads:
+            thread.daemon = True
+            thread.start()
+        _work()
+        for thread in threads:
+            thread.join()
+
+    def reset(self):
+        with self._lock:
+            self._fingerprints = {}
@@ -0,0 +1,81 @@
+from . import fingerprints
+from . import file_index
+from grow.pods import pods
+from grow.pods import storage
+import hashlib
+import mock
+import os
+import shutil
+import tempfile
+import time
+import unittest
+
+
+class FingerprintCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.dir_path = tempfile.mkdtemp()
+        self.pod = pods.Pod(self.dir_path, storage=storage.FileStorage)
+        self.pod.write_file('/static/foo.txt', 'foo')
+        self.pod.write_file('/static/bar.txt', 'bar')
+        # Backdate the files so that they are not modified too recently to
+        # be persisted.
+        old = time.time() - 10 * file_index.RACY_SECONDS
+        for pod_path in ('/static/foo.txt', '/static/bar.txt'):
+            os.utime(self.pod.abs_path(pod_path), (old, old))
+
+    def tearDown(self):
+        shutil.rmtree(self.dir_path)
+
+    def test_get(self):
+        cache = fingerprints.FingerprintCache(self.pod)
+        with mock.patch.object(
+                cache, '_hash_file', wraps=cache._hash_file) as hash_file:
+            self.assertEqual(
+                hashlib.md5('foo').hexdigest(), cache.get('/static/foo.txt'))
+            cache.get('/static/foo.txt')
+            self.assertEqual(1, hash_file.call_count)
+
+            # Changed files are hashed again.
+            self.pod.write_file('/static/foo.txt', 'changed')
+            self.assertEqual(hashlib.md5('changed').hexdigest(),
+                             cache.get('/static/foo.txt'))
+            self.assertEqual(2, hash_file.call_count)
+
+        # Recently modified files are not trusted by later processes.
+        exported = cache.export()
+        self.assertIsNone(exported['/static/foo.txt'][0])
+        cache = fingerprints.FingerprintCache(self.pod, exported)
+        with mock.patch.object(
+                cache, '_hash_file', wraps=cache._hash_file) as hash_file:
+            cache.get('/static/foo.txt')
+            self.assertEqual(1, hash_file.call_count)
+
+    def test_prefetch(self):
+        cache = fingerprints.FingerprintCache(self.pod)
+        with mock.patch.object(
+                self.pod, 'file_size', wraps=self.pod.file_size) as file_size:
+            cache.prefetch(['/static/foo.txt', '/static/bar.txt'])
+            # Each file is checked once.
+            self.assertEqual(2, file_size.call_count)
+        with mock.patch.object(cache, '_hash_file') as hash_file:
+            self.assertEqual(
+                hashlib.md5('bar').hexdigest(), cache.get('/static/bar.txt'))
+            self.assertFalse(hash_file.called)
+
+    def test_podcache(self):
+        self.pod.podcache.fingerprint_cache.get('/static/foo.txt')
+        self.pod.podcache.write()
+        pod = pods.Pod(self.dir_path, storage=storage.FileStorage)
+        cache = pod.podcache.fingerprint_cache
+        with mock.patch.object(cache, '_hash_file') as hash_file:
+            self.assertEqual(
+                hashlib.md5('foo').hexdigest(), cache.get('/static/foo.txt'))
+            self.assertFalse(hash_file.called)
+        pod.podcache.reset(force=True)
+        self.assertFalse(
+            pod.file_exists(pod.podcache.FILE_FINGERPRINTS))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,136 @@
+"""Build manifest used for incremental builds.
+
+The manifest records the modification time, size and sha-1 hash of every
+input file in the pod, along with the output path each route produced and
+the input files the route depended upon. On the next build, only the routes
+whose inputs changed are rendered again.
+
+The inputs of a route are known for documents (including the documents,
+templates, data files and static files they depend upon, according to the
+dependency graph, every document of the collections they list, and the
+translations of their locale) and for static files.
+Any other change -- such as to the podspec, or when files or routes are added
+or removed -- causes every route to be rendered again.
+"""
+
+import json
+from grow.common import config
+from protorpc import protojson
+from . import file_index
+
+VERSION = 1
+
+
+class _Unchanged(object):
+
+    def __repr__(self):
+        return '<Unchanged>'
+
+
+# Yielded in place of the content of an output that was not rendered again
+# because none of its inputs changed since the previous build.
+UNCHANGED = _Unchanged()
+
+
+class BuildManifest(object):
+    """Inputs and outputs of the previous build of a pod.
+
+    A manifest is only valid alongside the deployed index it was written
+    with, identified by `index_sha`, so that outputs which are not rendered
+    again are known to be present at the destination.
+    """
+
+    def __init__(self, pod, content=None, ignored_dirs=None, index_sha=None):
+        self.pod = pod
+        self._data = json.loads(content) if content else {}
+        self._index_sha = index_sha
+        self._ignored_dirs = ignored_dirs
+        self._key = None
+        self._changed = set()
+        self._files = {}
+        self._old_routes = {}
+        self._rebuild_all = True
+        self._routes = {}
+
+    def _get_key(self, suffix, append_slashes):
+        return {
+            'append_slashes': append_slashes,
+            'env': protojson.encode_message(self.pod.env.config),
+            'suffix': suffix,
+            'version': config.VERSION,
+        }
+
+    def start(self, paths, suffix=None, append_slashes=False):
+        """Scans the input files and determines which routes are stale."""
+        self._key = self._get_key(suffix, append_slashes)
+        valid = (self._data.get('version') == VERSION
+                 and self._data.get('key') == self._key
+                 and self._index_sha is not None
+                 and self._data.get('index') == self._index_sha)
+        old_files = self._data.get('files', {}) if valid else {}
+        self._old_routes = self._data.get('routes', {}) if valid else {}
+        index = file_index.FileIndex(
+            self.pod, old_files, ignored_dirs=self._ignored_dirs)
+        index.scan()
+        self._files = index.export()
+        self._routes = {}
+        self._changed = set()
+        changed_paths = [
+            pod_path for pod_path, stats in self._files.iteritems()
+            if pod_path not in old_files
+            or old_files[pod_path][2] != stats[2]]
+        self._rebuild_all = (
+            not valid
+            or set(old_files) != set(self._files)
+            or set(paths) != set(self._old_routes))
+        if self._rebuild_all:
+            return
+        covered = set()
+        for route in self._old_routes.itervalues():
+            covered.update(route['inputs'] or ())
+        for pod_path in changed_paths:
+            if pod_path not in covered:
+                self._rebuild_all = True
+                return
+            self._changed.add(pod_path)
+
+    @property
+    def rebuild_all(self):
+        return self._rebuild_all
+
+    def is_stale(self, path):
+        """Returns whether a route must be rendered again."""
+        if self._rebuild_all:
+            return True
+        inputs = self._old_routes[path]['inputs']
+        if inputs is None:
+            return True
+        return any(pod_path in self._changed for pod_path in inputs)
+
+    def reuse(self, path):
+        """Keeps the previous record of a route, returning its output path."""
+        self._routes[path] = self._old_routes[path]
+        return self._routes[path]['output']
+
+    def record(self, path, output_path, inputs):
+        """Records the output path and inputs of a rendered route.
+
+        `inputs` is None when the inputs of the route are not known, in which
+        case the route is rendered again on every build.
+        """
+        if inputs is not None:
+            inputs = sorted(inputs)
+        self._routes[path] = {
+            'inputs': inputs,
+            'output': output_path,
+        }
+
+    def to_string(self, index_sha):
+        """Serializes the manifest of the build deployed with an index."""
+        return json.dumps({
+            'files': self._files,
+            'index': index_sha,
+            'key': self._key,
+            'routes': self._routes,
+            'version': VERSION,
+        }, sort_keys=True)
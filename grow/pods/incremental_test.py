@@ -0,0 +1,159 @@
+from . import incremental
+from grow.pods import pods
+from grow.pods import storage
+import os
+import shutil
+import tempfile
+import unittest
+
+
+class BuildManifestTest(unittest.TestCase):
+
+    def setUp(self):
+        self.dir_path = tempfile.mkdtemp()
+        self.pod = pods.Pod(self.dir_path, storage=storage.FileStorage)
+        self.pod.write_yaml('/podspec.yaml', {
+            'static_dirs': [{
+                'static_dir': '/source/',
+                'serve_at': '/static/',
+            }],
+        })
+        self.pod.write_yaml('/content/pages/_blueprint.yaml', {
+            '$path': '/{base}/',
+            '$view': '/views/base.html',
+        })
+        self.pod.write_file('/content/pages/foo.yaml', '$title: Foo\n')
+        self.pod.write_file(
+            '/content/pages/bar.yaml',
+            '$title: Bar\nfoo: !g.doc /content/pages/foo.yaml\n')
+        self.pod.write_file(
+            '/content/pages/baz.yaml',
+            '$title: Baz\n$view: /views/baz.html\n')
+        self.pod.write_file(
+            '/views/base.html',
+            '{{doc.title}}{% if doc.foo %} {{doc.foo.title}}{% endif %}')
+        self.pod.write_file(
+            '/views/baz.html', '{% include "/views/partial.html" %}')
+        self.pod.write_file(
+            '/views/partial.html', '{{doc.title}}{{g.yaml("/data/baz.yaml").x}}')
+        self.pod.write_file('/data/baz.yaml', 'x: 1')
+        self.pod.write_file('/source/file.txt', 'file')
+        self.pod.write_file('/build/ignored.txt', 'ignored')
+
+    def tearDown(self):
+        shutil.rmtree(self.dir_path)
+
+    def _build(self, content=None):
+        pod = pods.Pod(self.dir_path, storage=storage.FileStorage)
+        build_dir = os.path.join(self.dir_path, 'build')
+        manifest = incremental.BuildManifest(
+            pod, content, ignored_dirs=[build_dir], index_sha='index')
+        results = dict(pod.export_iter(manifest=manifest))
+        rendered = set(path for path, content in results.iteritems()
+                       if content is not incremental.UNCHANGED)
+        return rendered, results, manifest.to_string('index')
+
+    def test_incremental(self):
+        rendered, results, content = self._build()
+        self.assertEqual(set(results), rendered)
+        self.assertEqual('Bar Foo', results['/bar/'])
+
+        # Nothing changed.
+        rendered, _, content = self._build(content)
+        self.assertEqual(set(), rendered)
+
+        # Edits to a document rebuild the document and its dependents.
+        self.pod.write_file('/content/pages/foo.yaml', '$title: Foo2\n')
+        rendered, results, content = self._build(content)
+        self.assertEqual(set(['/foo/', '/bar/']), rendered)
+        self.assertEqual('Bar Foo2', results['/bar/'])
+
+        # Edits to a static file only rebuild the static file.
+        self.pod.write_file('/source/file.txt', 'changed')
+        rendered, results, content = self._build(content)
+        self.assertEqual(set(['/static/file.txt']), rendered)
+        self.assertEqual('changed', results['/static/file.txt'])
+
+        # Files in ignored directories are not inputs.
+        self.pod.write_file('/build/ignored.txt', 'changed')
+        rendered, _, content = self._build(content)
+        self.assertEqual(set(), rendered)
+
+        # Edits to templates rebuild the documents using them.
+        self.pod.write_file(
+            '/views/partial.html',
+            'changed {{doc.title}}{{g.yaml("/data/baz.yaml").x}}')
+        rendered, results, content = self._build(content)
+        self.assertEqual(set(['/baz/']), rendered)
+        self.assertEqual('changed Baz1', results['/baz/'])
+
+        # Edits to data files rebuild the documents using them.
+        self.pod.write_file('/data/baz.yaml', 'x: 2')
+        rendered, results, content = self._build(content)
+        self.assertEqual(set(['/baz/']), rendered)
+        self.assertEqual('changed Baz2', results['/baz/'])
+
+        # Edits to other files rebuild everything.
+        self.pod.write_file('/translations/messages.pot', '')
+        rendered, results, content = self._build(content)
+        self.assertEqual(set(results), rendered)
+        self.pod.write_file('/translations/messages.pot', 'changed')
+        rendered, results, content = self._build(content)
+        self.assertEqual(set(results), rendered)
+
+        # Added files rebuild everything.
+        self.pod.write_file('/content/pages/qux.yaml', '$title: Qux\n')
+        rendered, results, content = self._build(content)
+        self.assertEqual(set(results), rendered)
+        self.assertIn('/qux/', results)
+
+    def test_listing(self):
+        self.pod.write_yaml('/content/lists/_blueprint.yaml', {
+            '$path': '/lists/{base}/',
+            '$view': '/views/list.html',
+        })
+        self.pod.write_file('/content/lists/all.yaml', '')
+        self.pod.write_file(
+            '/content/lists/nav.yaml', '$view: /views/nav.html\n')
+        self.pod.write_file('/views/list.html', ' '.join([
+            '{% for page in g.collection("pages").docs() %}',
+            '{{page.title}}{% endfor %}',
+        ]))
+        self.pod.write_file('/views/nav.html', ' '.join([
+            '{% for page, _ in g.nav("pages").iteritems() %}',
+            '{{page.title}}{% endfor %}',
+        ]))
+        _, results, content = self._build()
+        self.assertIn('Foo', results['/lists/all/'])
+
+        # Edits to a listed document rebuild the pages listing it.
+        self.pod.write_file('/content/pages/foo.yaml', '$title: Foo2\n')
+        rendered, results, content = self._build(content)
+        self.assertEqual(
+            set(['/foo/', '/bar/', '/lists/all/', '/lists/nav/']), rendered)
+        self.assertIn('Foo2', results['/lists/all/'])
+        self.assertIn('Foo2', results['/lists/nav/'])
+
+    def test_invalid(self):
+        _, _, content = self._build()
+        pod = pods.Pod(self.dir_path, storage=storage.FileStorage)
+        shutil.rmtree(os.path.join(self.dir_path, 'build'))
+
+        # Manifests written alongside a different index are ignored.
+        manifest = incremental.BuildManifest(pod, content, index_sha='other')
+        manifest.start(['/foo/', '/bar/', '/baz/', '/static/file.txt'])
+        self.assertTrue(manifest.rebuild_all)
+
+        manifest = incremental.BuildManifest(pod, content, index_sha='index')
+        manifest.start(['/foo/', '/bar/', '/baz/', '/static/file.txt'])
+        self.assertFalse(manifest.rebuild_all)
+
+        # Manifests for other export options are ignored.
+        manifest = incremental.BuildManifest(pod, content, index_sha='index')
+        manifest.start(['/foo/', '/bar/', '/baz/', '/static/file.txt'],
+                       suffix='index.html', append_slashes=True)
+        self.assertTrue(manifest.rebuild_all)
+
+
+if __name__ == '__main__':
+    unittest.main()
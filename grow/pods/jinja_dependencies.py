@@ -0,0 +1,39 @@
+"""Tracking of the templates loaded while rendering."""
+
+import contextlib
+import threading
+import jinja2
+
+
+class TrackingEnvironment(jinja2.Environment):
+    """Jinja environment that records the templates it loads.
+
+    Every template resolved through the loader is recorded, including those
+    loaded by `{% include %}`, `{% import %}` and `{% extends %}`, even when
+    the compiled template comes from the environment's cache.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super(TrackingEnvironment, self).__init__(*args, **kwargs)
+        self._local = threading.local()
+
+    @contextlib.contextmanager
+    def track_templates(self):
+        """Yields the set of pod paths of the templates loaded in the block."""
+        previous = getattr(self._local, 'pod_paths', None)
+        pod_paths = set()
+        self._local.pod_paths = pod_paths
+        try:
+            yield pod_paths
+        finally:
+            self._local.pod_paths = previous
+            if previous is not None:
+                previous.update(pod_paths)
+
+    def _load_template(self, name, globals):
+        template = super(TrackingEnvironment, self)._load_template(
+            name, globals)
+        pod_paths = getattr(self._local, 'pod_paths', None)
+        if pod_paths is not None:
+            pod_paths.add('/{}'.format(name.lstrip('/')))
+        return template
@@ -0,0 +1,190 @@
+"""Cache of the files listed in the directories of a pod.
+
+Directories are walked once, pruning hidden directories and the paths
+ignored by `.growignore` files while walking, and the listing is cached until
+a file beneath the directory changes. A listing of a subdirectory is taken
+from the cached listing of a parent directory where there is one.
+
+`.growignore` files use a subset of the `.gitignore` syntax: blank lines and
+lines starting with `#` are skipped, `!` negates a pattern, a trailing `/`
+only matches directories, patterns containing a `/` are relative to the
+directory of the `.growignore` file and other patterns match file and
+directory names at any depth. `*` and `?` do not match `/`, while `**`
+does. Ignore files apply to their own directory and beneath it, including
+those in the parents of a listed directory.
+"""
+
+import os
+import re
+import threading
+
+IGNORE_FILE = '.growignore'
+
+
+def translate(pattern):
+    """Returns a regex for a glob pattern, where only `**` matches `/`."""
+    i = 0
+    regex = []
+    while i < len(pattern):
+        char = pattern[i]
+        if pattern.startswith('**/', i):
+            regex.append('(?:.*/)?')
+            i += 3
+            continue
+        if pattern.startswith('**', i):
+            regex.append('.*')
+            i += 2
+            continue
+        if char == '*':
+            regex.append('[^/]*')
+        elif char == '?':
+            regex.append('[^/]')
+        elif char == '[' and ']' in pattern[i + 2:]:
+            end = pattern.index(']', i + 2)
+            group = pattern[i + 1:end]
+            if group.startswith('!'):
+                group = '^' + group[1:]
+            regex.append('[{}]'.format(group.replace('\\', '\\\\')))
+            i = end
+        else:
+            regex.append(re.escape(char))
+        i += 1
+    return ''.join(regex)
+
+
+class IgnoreRules(object):
+    """Patterns read from `.growignore` files, applied in order."""
+
+    def __init__(self):
+        self._rules = []
+
+    def add(self, dir_path, content):
+        """Adds the patterns of the ignore file in a directory."""
+        for line in content.splitlines():
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            negate = line.startswith('!')
+            if negate:
+                line = line[1:]
+            dir_only = line.endswith('/')
+            line = line.rstrip('/')
+            if not line:
+                continue
+            if '/' in line:
+                regex = translate(line.lstrip('/'))
+            else:
+                regex = '(?:.*/)?' + translate(line)
+            self._rules.append(
+                (dir_path, re.compile(regex + '$'), negate, dir_only))
+
+    def is_ignored(self, pod_path, is_dir=False):
+        ignored = False
+        for dir_path, regex, negate, dir_only in self._rules:
+            if dir_only and not is_dir:
+                continue
+            if not pod_path.startswith(dir_path):
+                continue
+            if regex.match(pod_path[len(dir_path):]):
+                ignored = not negate
+        return ignored
+
+
+class ListingCache(object):
+    """Files in directories of a pod, cached by directory."""
+
+    def __init__(self, pod):
+        self.pod = pod
+        self._dirs_to_paths = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _normalize_dir(pod_path):
+        return '/{}/'.format(pod_path.strip('/')).replace('//', '/')
+
+    def _read_ignore_rules(self, rules, dir_path):
+        pod_path = dir_path + IGNORE_FILE
+        if self.pod.file_exists(pod_path):
+            rules.add(dir_path, self.pod.read_file(pod_path))
+
+    def _walk(self, dir_path):
+        rules = IgnoreRules()
+        parts = [part for part in dir_path.split('/') if part]
+        for i in range(len(parts)):
+            self._read_ignore_rules(
+                rules, '/' + ''.join(part + '/' for part in parts[:i]))
+        if not self.pod.file_exists(dir_path):
+            return []
+        try:
+            walk = self.pod.walk(dir_path)
+        except NotImplementedError:
+            return self._filter(dir_path, rules)
+        paths = []
+        root = self.pod.abs_path('/').rstrip(os.sep)
+        for abs_dir, dirnames, filenames in walk:
+            current = abs_dir[len(root):].replace(os.sep, '/').rstrip('/') + '/'
+            if IGNORE_FILE in filenames:
+                self._read_ignore_rules(rules, current)
+            dirnames[:] = sorted(
+                dirname for dirname in dirnames
+                if not dirname.startswith('.')
+                and not rules.is_ignored(current + dirname, is_dir=True))
+            for filename in filenames:
+                pod_path = current + filename
+                if filename.startswith('.') or rules.is_ignored(pod_path):
+                    continue
+                paths.append(pod_path)
+        return sorted(paths)
+
+    def _filter(self, dir_path, rules):
+        """Lists storages that cannot be walked, filtering every path."""
+        paths = []
+        for path in self.pod.list_dir(dir_path):
+            pod_path = dir_path + path.lstrip('/')
+            if os.path.basename(pod_path) == IGNORE_FILE:
+                rules.add(os.path.dirname(pod_path) + '/',
+                          self.pod.read_file(pod_path))
+        for path in self.pod.list_dir(dir_path):
+            pod_path = dir_path + path.lstrip('/')
+            parts = pod_path[len(dir_path):].split('/')
+            if any(part.startswith('.') for part in parts):
+                continue
+            parents = [dir_path + '/'.join(parts[:i + 1])
+                       for i in range(len(parts) - 1)]
+            if any(rules.is_ignored(parent, is_dir=True)
+                   for parent in parents):
+                continue
+            if not rules.is_ignored(pod_path):
+                paths.append(pod_path)
+        return sorted(paths)
+
+    def list(self, pod_path):
+        """Returns the pod paths of the files beneath a directory."""
+        dir_path = self._normalize_dir(pod_path)
+        with self._lock:
+            paths = self._dirs_to_paths.get(dir_path)
+            if paths is None:
+                for cached_dir, cached_paths in self._dirs_to_paths.iteritems():
+                    if dir_path.startswith(cached_dir):
+                        paths = [path for path in cached_paths
+                                 if path.startswith(dir_path)]
+                        break
+        if paths is None:
+            paths = self._walk(dir_path)
+            with self._lock:
+                self._dirs_to_paths[dir_path] = paths
+        return list(paths)
+
+    def invalidate(self, pod_path):
+        """Forgets the listings of the directories containing a file."""
+        with self._lock:
+            if os.path.basename(pod_path) == IGNORE_FILE:
+                self._dirs_to_paths = {}
+                return
+            for dir_path in self._dirs_to_paths.keys():
+                if pod_path.startswith(dir_path):
+                    del self._dirs_to_paths[dir_path]
+
+    def reset(self):
+        with self._lock:
+            self._dirs_to_paths = {}
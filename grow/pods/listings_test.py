@@ -0,0 +1,105 @@
+from . import listings
+from grow.pods import pods
+from grow.pods import storage
+import mock
+import shutil
+import tempfile
+import unittest
+
+
+class ListingCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.dir_path = tempfile.mkdtemp()
+        self.pod = pods.Pod(self.dir_path, storage=storage.FileStorage)
+        for pod_path in ('/static/file.txt',
+                         '/static/.hidden.txt',
+                         '/static/.git/config',
+                         '/static/css/main.css',
+                         '/static/css/main.css.map',
+                         '/static/node_modules/lib/index.js',
+                         '/static/intl/de/file.txt'):
+            self.pod.write_file(pod_path, '')
+
+    def tearDown(self):
+        shutil.rmtree(self.dir_path)
+
+    def test_ignore_rules(self):
+        rules = listings.IgnoreRules()
+        rules.add('/static/', '\n'.join([
+            '# Comment',
+            '*.map',
+            'build/',
+            '/vendor/**/*.js',
+            '!/vendor/keep/*.js',
+        ]))
+        self.assertTrue(rules.is_ignored('/static/css/main.css.map'))
+        self.assertFalse(rules.is_ignored('/static/css/main.css'))
+        self.assertTrue(rules.is_ignored('/static/a/build', is_dir=True))
+        self.assertFalse(rules.is_ignored('/static/a/build'))
+        self.assertTrue(rules.is_ignored('/static/vendor/lib/a/b.js'))
+        self.assertTrue(rules.is_ignored('/static/vendor/b.js'))
+        self.assertFalse(rules.is_ignored('/static/vendor/keep/b.js'))
+        self.assertFalse(rules.is_ignored('/static/lib/vendor/b.js'))
+        self.assertFalse(rules.is_ignored('/other/main.css.map'))
+
+    def test_list(self):
+        cache = listings.ListingCache(self.pod)
+        self.assertEqual([
+            '/static/css/main.css',
+            '/static/css/main.css.map',
+            '/static/file.txt',
+            '/static/intl/de/file.txt',
+            '/static/node_modules/lib/index.js',
+        ], cache.list('/static/'))
+
+        # Ignore files are read from the listed directory and its parents.
+        self.pod.write_file('/.growignore', 'node_modules/\n')
+        self.pod.write_file('/static/css/.growignore', '*.map\n')
+        cache.invalidate('/static/css/.growignore')
+        self.assertEqual([
+            '/static/css/main.css',
+            '/static/file.txt',
+            '/static/intl/de/file.txt',
+        ], cache.list('/static'))
+        self.assertEqual([], cache.list('/static/node_modules/'))
+
+        # Subdirectories are listed from the cached parent directory.
+        with mock.patch.object(cache, '_walk') as walk:
+            self.assertEqual(
+                ['/static/intl/de/file.txt'], cache.list('/static/intl/'))
+            self.assertFalse(walk.called)
+
+        self.pod.write_file('/static/new.txt', '')
+        cache.invalidate('/static/new.txt')
+        self.assertIn('/static/new.txt', cache.list('/static/'))
+
+    def test_list_statics(self):
+        self.pod.write_file('/podspec.yaml', '\n'.join([
+            'static_dirs:',
+            '- static_dir: /static/',
+            '  serve_at: /app/static/',
+        ]))
+        self.pod.write_file('/static/.growignore', 'node_modules/\n')
+        self.assertEqual([
+            '/app/static/css/main.css',
+            '/app/static/css/main.css.map',
+            '/app/static/file.txt',
+            '/app/static/intl/de/file.txt',
+        ], [static_file.url.path
+            for static_file in self.pod.list_statics('/static/')])
+
+        self.pod.write_file('/static/removed.txt', '')
+        self.pod.on_file_changed('/static/removed.txt')
+        self.assertIn('/static/removed.txt', [
+            static_file.pod_path
+            for static_file in self.pod.list_statics('/static/')])
+        self.pod.delete_file('/static/removed.txt')
+        self.pod.on_file_deleted('/static/removed.txt')
+        self.assertNotIn('/static/removed.txt', [
+            static_file.pod_path
+            for static_file in self.pod.list_statics('/static/')])
+
+
+if __name__ == '__main__':
+    unittest.main()
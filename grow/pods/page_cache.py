@@ -0,0 +1,92 @@
+"""In-memory cache of the pages rendered by the development server.
+
+Pages are cached by serving path along with the pod paths of their inputs,
+and are dropped when one of those inputs, or a file they transitively depend
+on, changes. Concurrent requests for a page that is not cached wait for a
+single render rather than each rendering the page.
+"""
+
+import collections
+import hashlib
+import threading
+
+Page = collections.namedtuple('Page', ['content', 'headers', 'etag', 'inputs'])
+
+
+def create_etag(content):
+    """Returns a strong entity tag for content."""
+    if isinstance(content, unicode):
+        content = content.encode('utf-8')
+    return hashlib.sha1(content).hexdigest()
+
+
+class PageCache(object):
+    """Rendered pages of a pod, keyed by serving path."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pages = {}
+        self._inputs_to_paths = collections.defaultdict(set)
+        self._pending = {}
+        # Incremented whenever pages are invalidated, so that pages rendered
+        # from inputs that changed during the render are not cached.
+        self._generation = 0
+
+    def get(self, path):
+        with self._lock:
+            return self._pages.get(path)
+
+    def get_or_render(self, path, render):
+        """Returns the cached page of a path, or renders and caches it.
+
+        `render` returns (content, headers, inputs) and is only called by one
+        thread at a time for a path. Pages with `None` inputs are not cached.
+        """
+        while True:
+            with self._lock:
+                page = self._pages.get(path)
+                if page is not None:
+                    return page
+                event = self._pending.get(path)
+                if event is None:
+                    event = threading.Event()
+                    self._pending[path] = event
+                    generation = self._generation
+                    break
+            # Another request is rendering the page.
+            event.wait()
+
+        page = None
+        try:
+            content, headers, inputs = render()
+            page = Page(content, headers, create_etag(content), inputs)
+        finally:
+            with self._lock:
+                del self._pending[path]
+                if (page is not None and page.inputs is not None
+                        and generation == self._generation):
+                    self._pages[path] = page
+                    for pod_path in page.inputs:
+                        self._inputs_to_paths[pod_path].add(path)
+            event.set()
+        return page
+
+    def invalidate(self, pod_paths):
+        """Drops the pages built from any of the given pod paths."""
+        with self._lock:
+            self._generation += 1
+            for pod_path in pod_paths:
+                for path in self._inputs_to_paths.pop(pod_path, ()):
+                    page = self._pages.pop(path, None)
+                    if page is None:
+                        continue
+                    for input_path in page.inputs:
+                        paths = self._inputs_to_paths.get(input_path)
+                        if paths is not None:
+                            paths.discard(path)
+
+    def reset(self):
+        with self._lock:
+            self._generation += 1
+            self._pages = {}
+            self._inputs_to_paths = collections.defaultdict(set)
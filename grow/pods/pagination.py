@@ -0,0 +1,173 @@
+"""Positions of documents in lists, and pagination of document lists.
+
+Looking up the neighbours of a document used to scan the list of documents,
+which made rendering a link to the next and previous documents on every page
+of a collection quadratic in the size of the collection. The positions of the
+documents in a list are indexed once instead, and shared by every lookup in
+the same list.
+"""
+
+import itertools
+import operator
+
+# Format of the serving paths of the pages after the first.
+PAGE_PATH_FORMAT = '{base}page/{number}/'
+
+# Number of lists of documents whose positions are kept.
+MAX_CACHED_POSITIONS = 16
+
+_ids_to_positions = {}
+
+
+class Positions(object):
+    """Index of the documents in a list."""
+
+    def __init__(self, docs, doc_class=None):
+        # A copy, so that changes to the list do not corrupt the index.
+        self.docs = tuple(docs)
+        self._root_paths_to_indexes = {}
+        for i, doc in enumerate(self.docs):
+            if doc_class is not None and type(doc) != doc_class:
+                raise ValueError(
+                    'Usage: {{doc.next(<docs>)}} or {{doc.prev(<docs>)}}.')
+            # Documents are equal when their root pod paths are equal, and the
+            # first equal document is the one found.
+            self._root_paths_to_indexes.setdefault(doc.root_pod_path, i)
+
+    def indexes(self, docs):
+        """Returns whether the documents are the ones that were indexed."""
+        return (len(docs) == len(self.docs)
+                and all(itertools.imap(operator.is_, docs, self.docs)))
+
+    def index(self, doc):
+        """Returns the position of a document, or None if it is not listed."""
+        return self._root_paths_to_indexes.get(doc.root_pod_path)
+
+    def get_neighbor(self, doc, offset):
+        """Returns the document `offset` positions away from a document."""
+        i = self.index(doc)
+        if i is None:
+            return None
+        i += offset
+        if i < 0 or i >= len(self.docs):
+            return None
+        return self.docs[i]
+
+
+def get_positions(docs, doc_class=None):
+    """Returns the positions of a list of documents, reusing earlier indexes.
+
+    The indexes of the most recently used lists are kept, and are reused only
+    while a list holds the same documents, compared by identity, as when it
+    was indexed. Lists changed in place are indexed again.
+
+    Indexes are keyed by the id of the list, so that templates calling
+    `doc.next(docs)` for each document of the same list share one index
+    without hashing the list on every call. An id may be reused by a new list
+    once the old one is freed; that is intended, as the identity check of the
+    documents then indexes the new list again.
+    """
+    if not hasattr(docs, '__getitem__'):
+        return Positions(docs, doc_class=doc_class)
+    positions = _ids_to_positions.get(id(docs))
+    if positions is None or not positions.indexes(docs):
+        positions = Positions(docs, doc_class=doc_class)
+        if len(_ids_to_positions) >= MAX_CACHED_POSITIONS:
+            _ids_to_positions.clear()
+        _ids_to_positions[id(docs)] = positions
+    return positions
+
+
+class Page(object):
+    """A page of documents."""
+
+    def __init__(self, number, docs, paginator):
+        self.number = number
+        self.docs = docs
+        self._paginator = paginator
+
+    def __iter__(self):
+        return iter(self.docs)
+
+    def __len__(self):
+        return len(self.docs)
+
+    def __repr__(self):
+        return '<Page({} of {})>'.format(self.number, self.num_pages)
+
+    @property
+    def num_pages(self):
+        return len(self._paginator)
+
+    @property
+    def has_next(self):
+        return self.number < self.num_pages
+
+    @property
+    def has_prev(self):
+        return self.number > 1
+
+    @property
+    def next(self):
+        return self._paginator.get_page(self.number + 1)
+
+    @property
+    def prev(self):
+        return self._paginator.get_page(self.number - 1)
+
+    @property
+    def path(self):
+        """The serving path of the page, if the paginator has a base path."""
+        return self._paginator.get_path(self.number)
+
+
+class Paginator(object):
+    """Documents split into numbered pages, starting at 1."""
+
+    def __init__(self, docs, per_page, base_path=None):
+        if per_page < 1:
+            raise ValueError('per_page must be at least 1, found: {}'.format(
+                per_page))
+        self.docs = list(docs)
+        self.per_page = per_page
+        self.base_path = base_path
+        self._pages = [
+            Page(i / per_page + 1, self.docs[i:i + per_page], self)
+            for i in range(0, len(self.docs), per_page)]
+
+    def __getitem__(self, i):
+        return self._pages[i]
+
+    def __iter__(self):
+        return iter(self._pages)
+
+    def __len__(self):
+        return len(self._pages)
+
+    def get_page(self, number):
+        """Returns a page by number, or None if there is no such page."""
+        if 1 <= number <= len(self._pages):
+            return self._pages[number - 1]
+        return None
+
+    def get_page_of(self, doc):
+        """Returns the page listing a document."""
+        i = get_positions(self.docs).index(doc)
+        if i is None:
+            return None
+        return self._pages[i / self.per_page]
+
+    def get_path(self, number):
+        """Returns the serving path of a page, as `<base>page/<number>/`."""
+        if self.base_path is None:
+            return None
+        base = self.base_path if self.base_path.endswith('/') \
+            else self.base_path + '/'
+        if number == 1:
+            return base
+        return PAGE_PATH_FORMAT.format(base=base, number=number)
+
+
+def paginate(docs, per_page, base_path=None):
+    """Splits documents into pages of `per_page` documents."""
+    return Paginator(docs, per_page, base_path=base_path)
@@ -0,0 +1,77 @@
+from . import pagination
+from grow.testing import testing
+import unittest
+
+
+class PaginationTest(unittest.TestCase):
+
+    def setUp(self):
+        self.pod = testing.create_pod()
+        self.pod.write_yaml('/podspec.yaml', {})
+        self.pod.write_yaml('/content/col/_blueprint.yaml', {
+            '$path': '/{base}/',
+        })
+        for i in range(5):
+            self.pod.write_yaml(
+                '/content/col/doc{}.yaml'.format(i), {'$order': i})
+        self.docs = self.pod.get_collection('col').docs()
+
+    def test_next_prev(self):
+        first, second, last = self.docs[0], self.docs[1], self.docs[-1]
+        self.assertEqual(second, first.next(self.docs))
+        self.assertEqual(first, second.prev(self.docs))
+        self.assertIsNone(first.prev(self.docs))
+        self.assertIsNone(last.next(self.docs))
+        self.assertIsNone(first.next([last]))
+        self.assertRaises(ValueError, first.next, [1, 2, 3])
+
+        # Positions are indexed once for each list.
+        positions = pagination.get_positions(self.docs)
+        self.assertIs(positions, pagination.get_positions(self.docs))
+        self.assertEqual(4, positions.index(last))
+
+        # Positions are rebuilt once the list is changed in place.
+        docs = list(self.docs)
+        docs[0], docs[1] = docs[1], docs[0]
+        self.assertEqual(first, second.next(docs))
+        self.assertEqual(self.docs[2], first.next(docs))
+        docs.reverse()
+        self.assertEqual(second, first.next(docs))
+        self.assertEqual(second, first.next())
+        self.assertIsNone(first.prev())
+
+    def test_paginate(self):
+        paginator = pagination.paginate(self.docs, 2, base_path='/col')
+        self.assertEqual(3, len(paginator))
+        self.assertEqual([2, 2, 1], [len(page) for page in paginator])
+        self.assertEqual(
+            ['/col/', '/col/page/2/', '/col/page/3/'],
+            [page.path for page in paginator])
+        page = paginator.get_page(2)
+        self.assertTrue(page.has_next)
+        self.assertTrue(page.has_prev)
+        self.assertEqual(3, page.next.number)
+        self.assertIsNone(paginator.get_page(3).next)
+        self.assertEqual(page, paginator.get_page_of(self.docs[3]))
+        self.assertIsNone(pagination.paginate(self.docs, 2).get_page(1).path)
+        self.assertRaises(ValueError, pagination.paginate, self.docs, 0)
+
+    def test_paginate_tag(self):
+        self.pod.write_file('/views/base.html', ' '.join([
+            '{% set docs = g.collection("col").docs() %}',
+            '{% set pages = g.paginate(docs, 2, "/col/") %}',
+            '{% for page in pages %}{{page.path}}:{{page|length}}{% endfor %}',
+        ]))
+        self.pod.write_yaml('/content/pages/_blueprint.yaml', {
+            '$path': '/{base}/',
+            '$view': '/views/base.html',
+        })
+        self.pod.write_yaml('/content/pages/index.yaml', {})
+        controller, params = self.pod.match('/index/')
+        self.assertEqual(
+            '/col/:2/col/page/2/:2/col/page/3/:1',
+            controller.render(params).strip())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,9 +1,16 @@
 """Caching for pod meta information."""
 
+import json
 from . import collection_cache
+from . import content_index
 from . import document_cache
 from . import dependency
+from . import file_index
+from . import fingerprints
+from . import listings
 from . import object_cache
+from . import page_cache
+from . import render_cache
 
 
 class Error(Exception):
@@ -22,16 +29,28 @@ class PodCache(object):
     KEY_DEPENDENCIES = 'dependencies'
     KEY_GLOBAL = '__global__'
     KEY_OBJECTS = 'objects'
+    FILE_DOCUMENTS = '/.grow/cache/documents.json'
+    FILE_FILES = '/.grow/cache/files.json'
+    FILE_FINGERPRINTS = '/.grow/cache/fingerprints.json'
 
     def __init__(self, yaml, pod):
         self._pod = pod
 
         self._collection_cache = collection_cache.CollectionCache()
-        self._document_cache = document_cache.DocumentCache()
+        self._document_cache = document_cache.DocumentCache(pod=pod)
+        if pod and pod.file_exists(self.FILE_DOCUMENTS):
+            self._document_cache.load(pod.read_file(self.FILE_DOCUMENTS))
 
         self._dependency_graph = dependency.DependencyGraph()
         self._dependency_graph.add_all(yaml.get(self.KEY_DEPENDENCIES, {}))
 
+        self._file_index = None
+        self._fingerprint_cache = None
+        self._content_index = content_index.ContentIndex(pod)
+        self._listing_cache = listings.ListingCache(pod)
+        self._page_cache = page_cache.PageCache()
+        self._render_cache = render_cache.RenderCache(pod)
+
         self._object_caches = {}
         self.create_object_cache(
             self.KEY_GLOBAL, write_to_file=False, can_reset=True)
@@ -60,6 +79,54 @@ class PodCache(object):
         """Global object cache."""
         return self.get_object_cache(self.KEY_GLOBAL)
 
+    @property
+    def file_index(self):
+        """Hashes of files in the pod, persisted across builds."""
+        if self._file_index is None:
+            files = None
+            if self._pod.file_exists(self.FILE_FILES):
+                try:
+                    files = json.loads(self._pod.read_file(self.FILE_FILES))
+                except ValueError:
+                    files = None
+            self._file_index = file_index.FileIndex(self._pod, files)
+        return self._file_index
+
+    @property
+    def fingerprint_cache(self):
+        """Fingerprints of static files, persisted across builds."""
+        if self._fingerprint_cache is None:
+            values = None
+            if self._pod.file_exists(self.FILE_FINGERPRINTS):
+                try:
+                    values = json.loads(
+                        self._pod.read_file(self.FILE_FINGERPRINTS))
+                except ValueError:
+                    values = None
+            self._fingerprint_cache = fingerprints.FingerprintCache(
+                self._pod, values)
+        return self._fingerprint_cache
+
+    @property
+    def content_index(self):
+        """Collections and documents in the content directory."""
+        return self._content_index
+
+    @property
+    def listing_cache(self):
+        """Files in the directories of the pod, cached until they change."""
+        return self._listing_cache
+
+    @property
+    def page_cache(self):
+        """Pages rendered by the development server."""
+        return self._page_cache
+
+    @property
+    def render_cache(self):
+        """Cache for rendered pages, persisted across builds."""
+        return self._render_cache
+
     def create_object_cache(self, key, write_to_file=False, can_reset=False, values=None):
         """Create a named object cache."""
         self._object_caches[key] = {
@@ -88,12 +155,26 @@ class PodCache(object):
         self._collection_cache.reset()
         self._dependency_graph.reset()
         self._document_cache.reset()
+        self._content_index.reset()
+        self._listing_cache.reset()
+        self._page_cache.reset()
 
         # Only reset the object caches if permitted.
         for meta in self._object_caches.itervalues():
             if meta['can_reset'] or force:
                 meta['cache'].reset()
 
+        if force and self._pod:
+            self._file_index = None
+            if self._pod.file_exists(self.FILE_FILES):
+                self._pod.delete_file(self.FILE_FILES)
+            self._fingerprint_cache = None
+            if self._pod.file_exists(self.FILE_FINGERPRINTS):
+                self._pod.delete_file(self.FILE_FINGERPRINTS)
+            self._render_cache.clear()
+            if self._pod.file_exists(self.FILE_DOCUMENTS):
+                self._pod.delete_file(self.FILE_DOCUMENTS)
+
     def write(self):
         """Persist the cache information to a yaml file."""
         yaml = {}
@@ -111,3 +192,24 @@ class PodCache(object):
                 }
 
         self._pod.write_yaml('/{}'.format(self._pod.FILE_PODCACHE), yaml)
+        self.write_documents()
+        self.write_file_index()
+        self.write_fingerprints()
+
+    def write_file_index(self):
+        """Persist the hashes of the files used by the last build."""
+        if self._file_index is not None:
+            self._pod.write_file(
+                self.FILE_FILES, json.dumps(self._file_index.export()))
+
+    def write_fingerprints(self):
+        """Persist the fingerprints of static files."""
+        if self._fingerprint_cache is not None:
+            self._pod.write_file(
+                self.FILE_FINGERPRINTS,
+                json.dumps(self._fingerprint_cache.export()))
+
+    def write_documents(self):
+        """Persist the raw document cache for use by later processes."""
+        self._pod.write_file(
+            self.FILE_DOCUMENTS, self._document_cache.to_string())
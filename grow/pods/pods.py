@@ -6,6 +6,7 @@ import logging
 import os
 import sys
 import time
+import traceback
 import progressbar
 import yaml
 import jinja2
@@ -19,6 +20,9 @@ from . import catalog_holder
 from . import collection
 from . import document_fields
 from . import env as environment
+from . import errors
+from . import incremental
+from . import jinja_dependencies
 from . import locales
 from . import messages
 from . import podcache
@@ -27,6 +31,14 @@ from . import routes
 from . import static
 from . import storage
 from . import tags
+if utils.is_appengine():
+    multiprocessing = None
+else:
+    import multiprocessing
+
+
+# Pod loaded once per worker process by `_init_export_worker`.
+_worker_pod = None
 
 
 class Error(Exception):
@@ -42,6 +54,8 @@ class PodDoesNotExistError(Error, IOError):
 
 class Pod(object):
     DEFAULT_EXTENSIONS_DIR_NAME = 'extensions'
+    FEATURE_PAGE_CACHE = 'page_cache'
+    FEATURE_RENDER_CACHE = 'render_cache'
     FEATURE_UI = 'ui'
     FILE_PODCACHE = '.podcache.yaml'
     FILE_PODSPEC = 'podspec.yaml'
@@ -62,7 +76,8 @@ class Pod(object):
         self.catalogs = catalog_holder.Catalogs(pod=self)
         self.routes = routes.Routes(pod=self)
         self._podcache = None
-        self._disabled = set()
+        self._disabled = set(
+            [self.FEATURE_PAGE_CACHE, self.FEATURE_RENDER_CACHE])
 
         # Ensure preprocessors are loaded when pod is initialized.
         # Preprocessors may modify the environment in ways that are required by
@@ -202,54 +217,228 @@ class Pod(object):
 
     def delete_file(self, pod_path):
         path = self._normalize_path(pod_path)
-        return self.storage.delete(path)
+        result = self.storage.delete(path)
+        if self._podcache:
+            self._podcache.content_index.remove('/' + pod_path.lstrip('/'))
+        return result
 
     def disable(self, feature):
         self._disabled.add(feature)
 
-    def dump(self, suffix='index.html', append_slashes=True):
-        output = self.export(suffix=suffix, append_slashes=append_slashes)
+    def dump(self, suffix='index.html', append_slashes=True, workers=None):
+        return dict(self.dump_iter(
+            suffix=suffix, append_slashes=append_slashes, workers=workers))
+
+    def dump_iter(self, suffix='index.html', append_slashes=True,
+                  workers=None, manifest=None, static_content=False):
+        """Builds the pod, yielding (path, content) pairs as they render."""
+        for item in self.export_iter(
+                suffix=suffix, append_slashes=append_slashes, workers=workers,
+                manifest=manifest, static_content=static_content):
+            yield item
         if self.ui and not self.is_enabled(self.FEATURE_UI):
-            output.update(self.export_ui())
-        return output
+            for item in self.export_ui().iteritems():
+                yield item
 
-    def export(self, suffix=None, append_slashes=False):
+    def enable(self, feature):
+        self._disabled.discard(feature)
+
+    def export(self, suffix=None, append_slashes=False, workers=None):
         """Builds the pod, returning a mapping of paths to content."""
-        output = {}
+        return dict(self.export_iter(
+            suffix=suffix, append_slashes=append_slashes, workers=workers))
+
+    def export_iter(self, suffix=None, append_slashes=False, workers=None,
+                    manifest=None, static_content=False):
+        """Builds the pod, yielding (path, content) pairs as they render.
+
+        Consumers of the stream can write and discard each page as it is
+        yielded, so memory use does not grow with the size of the pod.
+
+        When `workers` is greater than one, the paths are partitioned across
+        a pool of processes that each load the pod once.
+
+        When an `incremental.BuildManifest` from the previous build is
+        provided, routes whose inputs have not changed are not rendered and
+        `incremental.UNCHANGED` is yielded in place of their content. The
+        manifest is updated with the routes rendered by this build.
+
+        When `static_content` is set, static routes yield a
+        `static.StaticContent` referencing the file on disk, with its hash
+        taken from the pod's persisted file index, instead of its bytes.
+
+        When the render cache feature is enabled, documents whose inputs are
+        unchanged since they were last rendered are read from the pod's
+        `render_cache.RenderCache` instead of being rendered again.
+        """
         routes = self.get_routes()
         paths = []
         for items in routes.get_locales_to_paths().values():
             paths += items
+        cache = None
+        if self.is_enabled(self.FEATURE_RENDER_CACHE):
+            cache = self.podcache.render_cache
+            cache.start(paths)
+        if manifest is not None:
+            manifest.start(paths, suffix=suffix, append_slashes=append_slashes)
+            stale_paths = []
+            for path in paths:
+                if manifest.is_stale(path):
+                    stale_paths.append(path)
+                else:
+                    yield manifest.reuse(path), incremental.UNCHANGED
+            if len(stale_paths) < len(paths):
+                self.logger.info('Skipping {} unchanged routes.'.format(
+                    len(paths) - len(stale_paths)))
+            paths = stale_paths
+        if cache is not None:
+            uncached_paths = []
+            for path in paths:
+                content = cache.get(path)
+                if content is None:
+                    uncached_paths.append(path)
+                    continue
+                output_path = self._get_output_path(
+                    path, messages.Kind.RENDERED, suffix, append_slashes)
+                if manifest is not None:
+                    manifest.record(path, output_path, cache.get_inputs(path))
+                yield output_path, content
+            if len(uncached_paths) < len(paths):
+                self.logger.info('Read {} routes from the render cache.'.format(
+                    len(paths) - len(uncached_paths)))
+            paths = uncached_paths
+        track_inputs = manifest is not None or cache is not None
+        static_content = static_content and not self.storage.is_cloud_storage
         text = 'Building: %(value)d/{} (in %(elapsed)s)'
         widgets = [progressbar.FormatLabel(text.format(len(paths)))]
         bar = progressbar.ProgressBar(widgets=widgets, maxval=len(paths))
         bar.start()
-        for path in paths:
-            output_path = path
-            controller, params = self.match(path)
-            # Append a suffix onto rendered routes only. This supports dumping
-            # paths that would serve at URLs that terminate in "/" or without
-            # an extension to an HTML file suitable for writing to a
-            # filesystem. Static routes and other routes that may export to
-            # paths without extensions should remain unmodified.
-            if suffix and controller.KIND == messages.Kind.RENDERED:
-                if (append_slashes
-                    and not output_path.endswith('/')
-                        and not os.path.splitext(output_path)[-1]):
-                    output_path = output_path.rstrip('/') + '/'
-                if append_slashes and output_path.endswith('/') and suffix:
-                    output_path += suffix
-            try:
-                output[output_path] = controller.render(params, inject=False)
-            except:
-                self.logger.error('Error building: {}'.format(controller))
-                raise
+        if workers and workers > 1 and multiprocessing is not None:
+            results = self._export_parallel(
+                paths, suffix, append_slashes, workers, track_inputs,
+                static_content)
+        else:
+            results = (self._export_path(
+                path, suffix, append_slashes, track_inputs, static_content)
+                for path in paths)
+        for path, output_path, content, inputs in results:
+            if isinstance(content, static.StaticContent):
+                content.sha = self.podcache.file_index.get_sha(
+                    content.pod_path)
+            if manifest is not None:
+                manifest.record(path, output_path, inputs)
+            if (cache is not None and inputs is not None
+                    and self.match(path)[0].KIND == messages.Kind.RENDERED):
+                cache.put(path, inputs, content)
+            yield output_path, content
             bar.update(bar.value + 1)
         error_controller = routes.match_error('/404.html')
         if error_controller:
-            output['/404.html'] = error_controller.render({})
+            yield '/404.html', error_controller.render({})
         bar.finish()
-        return output
+        if cache is not None:
+            cache.write()
+
+    def _export_path(self, path, suffix=None, append_slashes=False,
+                     track_inputs=False, static_content=False):
+        """Renders a single path.
+
+        Returns the path, the output path, the content and, when
+        `track_inputs` is set, the pod paths of the route's inputs.
+        """
+        controller, params = self.match(path)
+        output_path = self._get_output_path(
+            path, controller.KIND, suffix, append_slashes)
+        try:
+            if static_content and controller.KIND == messages.Kind.STATIC:
+                pod_path = controller.get_pod_path(dict(params))
+                content = static.StaticContent(
+                    pod_path, self.abs_path(pod_path))
+            else:
+                content = controller.render(params, inject=False)
+        except:
+            self.logger.error('Error building: {}'.format(controller))
+            raise
+        inputs = None
+        if track_inputs:
+            inputs = self.get_route_inputs(controller, params)
+        return path, output_path, content, inputs
+
+    def _get_output_path(self, path, kind, suffix=None, append_slashes=False):
+        output_path = path
+        # Append a suffix onto rendered routes only. This supports dumping
+        # paths that would serve at URLs that terminate in "/" or without
+        # an extension to an HTML file suitable for writing to a
+        # filesystem. Static routes and other routes that may export to
+        # paths without extensions should remain unmodified.
+        if suffix and kind == messages.Kind.RENDERED:
+            if (append_slashes
+                and not output_path.endswith('/')
+                    and not os.path.splitext(output_path)[-1]):
+                output_path = output_path.rstrip('/') + '/'
+            if append_slashes and output_path.endswith('/') and suffix:
+                output_path += suffix
+        return output_path
+
+    def get_route_inputs(self, controller, params):
+        """Returns the pod paths a route is built from, or None if unknown."""
+        if controller.KIND == messages.Kind.STATIC:
+            return [controller.get_pod_path(dict(params))]
+        if controller.KIND != messages.Kind.RENDERED or not controller.doc:
+            return None
+        doc = controller.doc
+        pod_paths = set(doc.locale_paths)
+        pod_paths.add(doc.localize_path(doc.pod_path, doc.locale))
+        if doc.locale:
+            mo_path = self.catalogs.find_mo_path(doc.locale)
+            if mo_path:
+                pod_paths.add(mo_path)
+        graph = self.podcache.dependency_graph
+        content_index = self.podcache.content_index
+        collection_paths = set(content_index.list_collection_paths())
+        pending = list(pod_paths)
+        while pending:
+            pod_path = pending.pop()
+            references = set(graph.get_dependencies(pod_path))
+            # Routes listing a collection depend on each of its documents.
+            if pod_path in collection_paths:
+                references.update(content_index.list_doc_paths(pod_path))
+            for reference in references - pod_paths:
+                pod_paths.add(reference)
+                pending.append(reference)
+        return [pod_path for pod_path in pod_paths
+                if pod_path not in collection_paths
+                and self.file_exists(pod_path)]
+
+    def _export_parallel(self, paths, suffix, append_slashes, workers,
+                         track_inputs=False, static_content=False):
+        """Renders paths in a process pool, yielding results as they finish."""
+        # Small chunks keep the progress bar moving and balance the load,
+        # while keeping paths of the same locale together for each worker.
+        chunk_size = max(1, min(100, len(paths) // (workers * 4) or 1))
+        chunks = [(paths[i:i + chunk_size], suffix, append_slashes,
+                   track_inputs, static_content)
+                  for i in range(0, len(paths), chunk_size)]
+        worker_pool = multiprocessing.Pool(
+            workers, initializer=_init_export_worker,
+            initargs=(self.root, self.storage, self.env, self._disabled))
+        try:
+            for results, error in worker_pool.imap_unordered(
+                    _export_worker, chunks):
+                for result in results:
+                    yield result
+                if error:
+                    controller, path, formatted_traceback = error
+                    self.logger.error('Error building: {}'.format(controller))
+                    text = 'Error building: {} ({})\n{}'
+                    exception = errors.BuildError(text.format(
+                        controller, path, formatted_traceback))
+                    exception.controller = controller
+                    raise exception
+            worker_pool.close()
+        finally:
+            worker_pool.terminate()
+            worker_pool.join()
 
     def export_ui(self):
         """Builds the grow ui tools, returning a mapping of paths to content."""
@@ -335,10 +524,10 @@ class Pod(object):
             text = 'No deployment named {}. Valid deployments: {}.'
             keys = ', '.join(destination_configs.keys())
             raise ValueError(text.format(nickname, keys))
-        deployment_params = destination_configs[nickname]
-        kind = deployment_params.pop('destination')
+        # Copied so that the cached podspec keeps the destination kind.
+        config = dict(destination_configs[nickname])
+        kind = config.pop('destination')
         try:
-            config = destination_configs[nickname]
             deployment = deployments.make_deployment(
                 kind, config, name=nickname)
         except TypeError:
@@ -386,7 +575,7 @@ class Pod(object):
         if self.env.cached:
             kwargs['bytecode_cache'] = self._get_bytecode_cache()
         kwargs['extensions'].extend(self.list_jinja_extensions())
-        env = jinja2.Environment(**kwargs)
+        env = jinja_dependencies.TrackingEnvironment(**kwargs)
         env.filters.update(tags.create_builtin_filters())
         get_gettext_func = self.catalogs.get_gettext_translations
         # pylint: disable=no-member
@@ -401,15 +590,9 @@ class Pod(object):
 
     def get_static(self, pod_path, locale=None):
         """Returns a StaticFile, given the static file's pod path."""
-        for route in self.routes.static_routing_map.iter_rules():
-            controller = route.endpoint
-            if controller.KIND == messages.Kind.STATIC:
-                serving_path = controller.match_pod_path(pod_path)
-                if serving_path:
-                    return static.StaticFile(pod_path, serving_path, locale=locale,
-                                             pod=self, controller=controller,
-                                             fingerprinted=controller.fingerprinted,
-                                             localization=controller.localization)
+        static_file = self.routes.get_static_file(pod_path, locale=locale)
+        if static_file is not None:
+            return static_file
         text = ('Either no file exists at "{}" or the "static_dirs" setting was '
                 'not configured for this path in {}.'.format(
                     pod_path, self.FILE_PODSPEC))
@@ -536,9 +719,12 @@ class Pod(object):
         return results
 
     def list_statics(self, pod_path, locale=None, include_hidden=False):
-        for path in self.list_dir(pod_path):
-            if include_hidden or not path.rsplit(os.sep, 1)[-1].startswith('.'):
-                yield self.get_static(pod_path + path, locale=locale)
+        if include_hidden:
+            paths = [pod_path + path for path in self.list_dir(pod_path)]
+        else:
+            paths = self.podcache.listing_cache.list(pod_path)
+        for path in paths:
+            yield self.get_static(path, locale=locale)
 
     def load(self):
         self.routes.routing_map
@@ -549,7 +735,13 @@ class Pod(object):
     def move_file_to(self, source_pod_path, destination_pod_path):
         source_path = self._normalize_path(source_pod_path)
         dest_path = self._normalize_path(destination_pod_path)
-        return self.storage.move_to(source_path, dest_path)
+        result = self.storage.move_to(source_path, dest_path)
+        if self._podcache:
+            self._podcache.content_index.remove(
+                '/' + source_pod_path.lstrip('/'))
+            self._podcache.content_index.add(
+                '/' + destination_pod_path.lstrip('/'))
+        return result
 
     def normalize_locale(self, locale, default=None):
         locale = locale or default or self.podspec.default_locale
@@ -561,6 +753,15 @@ class Pod(object):
 
     def on_file_changed(self, pod_path):
         """Handle when a single file has changed in the pod."""
+        content_version = self.podcache.content_index.version
+        self.podcache.content_index.add(pod_path)
+        self.podcache.listing_cache.invalidate(pod_path)
+        if content_version != self.podcache.content_index.version:
+            # New documents are not yet inputs of the pages listing them.
+            self.podcache.page_cache.reset()
+        else:
+            self.podcache.page_cache.invalidate(
+                self.podcache.dependency_graph.get_all_dependents(pod_path))
         if pod_path == '/{}'.format(self.FILE_PODSPEC):
             self.reset_yaml()
             self.podcache.reset()
@@ -569,17 +770,22 @@ class Pod(object):
                 and pod_path.startswith(collection.Collection.CONTENT_PATH)):
             doc = self.get_doc(pod_path)
             self.podcache.collection_cache.remove_collection(doc.collection)
+            self.podcache.page_cache.reset()
             self.routes.reset_cache(rebuild=True)
         elif pod_path.startswith(collection.Collection.CONTENT_PATH):
-            col = self.get_doc(pod_path).collection
             base_docs = []
             original_docs = []
             updated_docs = []
 
             for dep_path in self.podcache.dependency_graph.get_dependents(
                     pod_path):
-                base_docs.append(self.get_doc(dep_path))
-                original_docs += col.list_servable_document_locales(dep_path)
+                if not dep_path.startswith(collection.Collection.CONTENT_PATH):
+                    continue
+                # Dependents may list the collection from another collection.
+                dep_doc = self.get_doc(dep_path)
+                base_docs.append(dep_doc)
+                original_docs += \
+                    dep_doc.collection.list_servable_document_locales(dep_path)
 
             for doc in base_docs:
                 self.podcache.document_cache.remove(doc)
@@ -615,13 +821,50 @@ class Pod(object):
                         if removed_doc not in removed_docs:
                             removed_docs.append(removed_doc)
             if added_docs or removed_docs:
+                # Pages may link to or list the documents.
+                self.podcache.page_cache.reset()
                 self.routes.reconcile_documents(
                     remove_docs=removed_docs, add_docs=added_docs)
+        else:
+            # Templates and data files are recorded as dependencies of the
+            # documents (and data files) using them, so only those need to be
+            # invalidated.
+            self.podcache.fingerprint_cache.invalidate(pod_path)
+            self.routes.invalidate_static_file(pod_path)
+            graph = self.podcache.dependency_graph
+            for dep_path in graph.get_all_dependents(pod_path):
+                for func in (tags.csv, tags.json, tags.static_something,
+                             tags.yaml, utils.parse_yaml):
+                    func.invalidate_tag(dep_path, owner=self)
+                    func.invalidate_tag(dep_path.lstrip('/'), owner=self)
+                if dep_path == pod_path or not self.file_exists(dep_path):
+                    continue
+                if dep_path.startswith(collection.Collection.CONTENT_PATH):
+                    self.podcache.collection_cache.remove_by_path(dep_path)
+                    self.podcache.document_cache.remove_by_path(dep_path)
+
+    def on_file_deleted(self, pod_path):
+        """Handle when a single file has been deleted from the pod."""
+        self.podcache.content_index.remove(pod_path)
+        self.podcache.listing_cache.invalidate(pod_path)
+        self.podcache.page_cache.invalidate(
+            self.podcache.dependency_graph.get_all_dependents(pod_path))
+        self.podcache.fingerprint_cache.invalidate(pod_path)
+        self.routes.invalidate_static_file(pod_path)
 
     def open_file(self, pod_path, mode=None):
         path = self._normalize_path(pod_path)
         return self.storage.open(path, mode=mode)
 
+    def prefetch_fingerprints(self):
+        """Fingerprints the files of fingerprinted static directories."""
+        for route in self.routes:
+            controller = route.endpoint
+            if (isinstance(controller, static.StaticController)
+                    and controller.fingerprinted):
+                self.podcache.fingerprint_cache.prefetch(
+                    controller.list_source_paths())
+
     def preprocess(self, preprocessor_names=None, run_all=False, tags=None,
                    build=True, ratelimit=None):
         if not preprocessor_names:
@@ -650,7 +893,9 @@ class Pod(object):
         return json.load(fp)
 
     def read_yaml(self, path):
-        fields = utils.parse_yaml(self.read_file(path), pod=self)
+        fields = utils.parse_yaml(
+            self.read_file(path), pod=self,
+            pod_path='/{}'.format(path.lstrip('/')))
         untag = document_fields.DocumentFields.untag
         return untag(fields, env_name=self.env.name)
 
@@ -673,6 +918,8 @@ class Pod(object):
     def write_file(self, pod_path, content):
         path = self._normalize_path(pod_path)
         self.storage.write(path, content)
+        if self._podcache:
+            self._podcache.content_index.add('/' + pod_path.lstrip('/'))
 
     def write_yaml(self, path, content):
         self.podcache.collection_cache.remove_by_path(path)
@@ -689,3 +936,43 @@ class Pod(object):
         logger.propagate = False
         logger.addHandler(handler)
         return logger
+
+
+def _init_export_worker(root, storage_cls, env, disabled):
+    """Loads the pod once in each export worker process."""
+    global _worker_pod
+    _worker_pod = Pod(root, storage=storage_cls)
+    _worker_pod.set_env(env)
+    for feature in disabled:
+        _worker_pod.disable(feature)
+
+
+def _export_worker(args):
+    """Renders a chunk of paths in an export worker process.
+
+    Exceptions (and their tracebacks) are not reliably picklable, so the
+    failing controller, path and formatted traceback are returned as strings
+    alongside the results rendered before the failure.
+    """
+    paths, suffix, append_slashes, track_inputs, static_content = args
+    results = []
+    for path in paths:
+        try:
+            results.append(_worker_pod._export_path(
+                path, suffix=suffix, append_slashes=append_slashes,
+                track_inputs=track_inputs, static_content=static_content))
+        except Exception as e:
+            controller = getattr(e, 'controller', None)
+            if isinstance(e, errors.BuildError) and e.exception is not None:
+                # Report the frames of the original rendering error.
+                formatted_traceback = ''.join(traceback.format_exception(
+                    type(e.exception), e.exception, e.traceback))
+            else:
+                formatted_traceback = traceback.format_exc()
+            if controller is None:
+                try:
+                    controller, _ = _worker_pod.match(path)
+                except Exception:
+                    pass
+            return results, (str(controller), path, formatted_traceback)
+    return results, None
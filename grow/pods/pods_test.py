@@ -57,6 +57,34 @@ class PodTest(unittest.TestCase):
     def test_export(self):
         self.pod.export()
 
+    def test_export_workers(self):
+        serial = self.pod.export()
+        pod = pods.Pod(self.dir_path, storage=storage.FileStorage)
+        pod.env.fingerprint = self.pod.env.fingerprint
+        parallel = pod.export(workers=2)
+        self.assertEqual(serial, parallel)
+
+    def test_export_workers_error(self):
+        pod = testing.create_pod()
+        pod.write_yaml('/podspec.yaml', {})
+        pod.write_yaml('/content/pages/_blueprint.yaml', {
+            '$path': '/{base}/',
+            '$view': '/views/base.html',
+        })
+        pod.write_yaml('/content/pages/ok.yaml', {})
+        pod.write_yaml('/content/pages/broken.yaml', {})
+        pod.write_file(
+            '/views/base.html',
+            '{% if doc.base == "broken" %}{{1 / 0}}{% endif %}')
+        with self.assertRaises(pods.errors.BuildError) as context:
+            list(pod.export(workers=2))
+        message = str(context.exception)
+        self.assertIn('/content/pages/', message)
+        self.assertIn('/broken/', message)
+        self.assertIn('Traceback', message)
+        self.assertIn('ZeroDivisionError', message)
+        self.assertIn('/content/pages/', context.exception.controller)
+
     def test_dump(self):
         paths = [
             '/about/index.html',
@@ -233,6 +261,53 @@ class PodTest(unittest.TestCase):
         paths = pod.export().keys()
         self.assertItemsEqual(expected, paths)
 
+    def test_on_file_changed_data(self):
+        pod = testing.create_pod()
+        pod.write_yaml('/podspec.yaml', {
+            'localization': {
+                'default_locale': 'en',
+            },
+        })
+        pod.write_yaml('/content/pages/_blueprint.yaml', {
+            '$path': '/{base}/',
+            '$view': '/views/base.html',
+        })
+        pod.write_file(
+            '/content/pages/foo.yaml', 'data: !g.yaml /data/nested.yaml\n')
+        pod.write_file(
+            '/views/base.html',
+            '{{g.yaml("/data/tag.yaml").title}} {{doc.data.title}}')
+        pod.write_file('/data/tag.yaml', 'title: Tag')
+        pod.write_file('/data/data.yaml', 'title: Data')
+        pod.write_file(
+            '/data/nested.yaml', 'title: Nested\nnested: !g.yaml /data/data.yaml')
+
+        controller, params = pod.match('/foo/')
+        self.assertEqual('Tag Nested', controller.render(params))
+        graph = pod.podcache.dependency_graph
+        self.assertEqual(
+            set(['/data/data.yaml', '/data/nested.yaml', '/data/tag.yaml',
+                 '/views/base.html', '/content/pages/foo.yaml']),
+            graph.get_all_dependencies('/content/pages/foo.yaml'))
+
+        # Does not use the write_* so that the cache removal is skipped.
+        pod.storage.write(pod.abs_path('/data/tag.yaml'), 'title: Changed')
+        pod.on_file_changed('/data/tag.yaml')
+        controller, params = pod.match('/foo/')
+        self.assertEqual('Changed Nested', controller.render(params))
+
+        # Changes to nested data files invalidate the dependent documents.
+        pod.storage.write(
+            pod.abs_path('/data/nested.yaml'),
+            'title: Changed\nnested: !g.yaml /data/data.yaml')
+        pod.on_file_changed('/data/nested.yaml')
+        controller, params = pod.match('/foo/')
+        self.assertEqual('Changed Changed', controller.render(params))
+        self.assertEqual(
+            set(['/data/data.yaml', '/data/nested.yaml',
+                 '/content/pages/foo.yaml']),
+            graph.get_all_dependents('/data/data.yaml'))
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,172 @@
+"""Content-addressed cache of rendered pages, persisted across builds.
+
+Each rendered route is stored under the sha-1 hash of its content along with
+the pod paths of its inputs and a digest of the hashes of those inputs. A
+route is served from the cache on a later build when the digest of its inputs
+still matches, even if the output directory or deployment has changed.
+
+Changes that are not tracked as inputs of a route -- such as to the podspec,
+blueprints, extensions, the environment, the set of routes or the set of
+content files, which adds documents to the collections listed by routes --
+change the cache's global key, which invalidates every entry.
+"""
+
+import hashlib
+import json
+import os
+from grow.common import config
+from protorpc import protojson
+from . import file_index
+
+VERSION = 1
+
+# Size in bytes of the rendered content kept in the cache. The least recently
+# used entries are evicted when the cache grows larger.
+DEFAULT_MAX_SIZE = 500 * 1024 * 1024
+
+
+class RenderCache(object):
+    """Rendered content of routes, keyed by the hashes of their inputs."""
+
+    ROOT = '/.grow/cache/render'
+
+    def __init__(self, pod, max_size=DEFAULT_MAX_SIZE):
+        self.pod = pod
+        self.max_size = max_size
+        self._global_key = None
+        self._index = None
+        self._data = None
+        self._entries = None
+        self._used = 0
+        self._index_path = '{}/index.json'.format(self.ROOT)
+
+    def _load(self):
+        if self._data is not None:
+            return
+        self._data = {}
+        if self.pod.file_exists(self._index_path):
+            try:
+                self._data = json.loads(self.pod.read_file(self._index_path))
+            except ValueError:
+                self.pod.logger.warning(
+                    'Ignoring invalid render cache: {}'.format(
+                        self._index_path))
+        if self._data.get('version') != VERSION:
+            self._data = {}
+        self._index = file_index.FileIndex(
+            self.pod, self._data.get('files'))
+        self._entries = dict(self._data.get('entries', {}))
+        self._used = max([entry['used'] for entry in self._entries.values()]
+                         or [0])
+
+    def _get_blob_path(self, sha):
+        return '{}/objects/{}/{}'.format(self.ROOT, sha[:2], sha)
+
+    def _get_digest(self, path, inputs):
+        sha = hashlib.sha1()
+        sha.update(self._global_key)
+        sha.update(path.encode('utf-8'))
+        for pod_path in sorted(inputs):
+            sha.update('\0{}\0{}'.format(
+                pod_path.encode('utf-8'), self._index.get_sha(pod_path)))
+        return sha.hexdigest()
+
+    def start(self, paths):
+        """Computes the global key of the cache for a build of `paths`."""
+        self._load()
+        sha = hashlib.sha1()
+        sha.update(json.dumps({
+            'disabled': sorted(self.pod._disabled - set([
+                self.pod.FEATURE_PAGE_CACHE,
+                self.pod.FEATURE_RENDER_CACHE,
+            ])),
+            'env': protojson.encode_message(self.pod.env.config),
+            'grow': config.VERSION,
+            'paths': sorted(paths),
+            'version': VERSION,
+        }, sort_keys=True))
+        content_paths = self._index.scan('/content/')
+        sha.update(json.dumps(sorted(content_paths)))
+        pod_paths = ['/{}'.format(self.pod.FILE_PODSPEC)]
+        pod_paths += self._index.scan('/extensions/')
+        pod_paths += [pod_path for pod_path in content_paths
+                      if os.path.basename(pod_path) == '_blueprint.yaml']
+        for pod_path in sorted(pod_paths):
+            sha.update('\0{}\0{}'.format(
+                pod_path.encode('utf-8'), self._index.get_sha(pod_path)))
+        self._global_key = sha.hexdigest()
+
+    def get(self, path):
+        """Returns the cached content of a route, or None if it is stale."""
+        entry = self._entries.get(path)
+        if entry is None or self._get_digest(path, entry['deps']) != entry['digest']:
+            return None
+        blob_path = self._get_blob_path(entry['sha'])
+        if not self.pod.file_exists(blob_path):
+            return None
+        self._used += 1
+        entry['used'] = self._used
+        return self.pod.read_file(blob_path)
+
+    def get_inputs(self, path):
+        """Returns the pod paths of the inputs of a cached route."""
+        return self._entries[path]['deps']
+
+    def put(self, path, inputs, content):
+        """Stores the content rendered for a route from `inputs`."""
+        if isinstance(content, unicode):
+            content = content.encode('utf-8')
+        sha = hashlib.sha1(content).hexdigest()
+        blob_path = self._get_blob_path(sha)
+        if not self.pod.file_exists(blob_path):
+            self.pod.write_file(blob_path, content)
+        self._used += 1
+        self._entries[path] = {
+            'deps': sorted(inputs),
+            'digest': self._get_digest(path, inputs),
+            'sha': sha,
+            'size': len(content),
+            'used': self._used,
+        }
+
+    def write(self):
+        """Evicts least recently used entries and persists the cache."""
+        if self._data is None:
+            return
+        old_shas = set(self._get_shas(self._data.get('entries', {})))
+        old_shas.update(self._get_shas(self._entries))
+        size = 0
+        entries = sorted(self._entries.iteritems(),
+                         key=lambda item: item[1]['used'], reverse=True)
+        self._entries = {}
+        for path, entry in entries:
+            size += entry['size']
+            if size > self.max_size:
+                break
+            self._entries[path] = entry
+        shas = set(self._get_shas(self._entries))
+        for sha in old_shas - shas:
+            blob_path = self._get_blob_path(sha)
+            if self.pod.file_exists(blob_path):
+                self.pod.delete_file(blob_path)
+        self._data = {
+            'entries': self._entries,
+            'files': self._index.export(),
+            'version': VERSION,
+        }
+        self.pod.write_file(
+            self._index_path, json.dumps(self._data, sort_keys=True))
+
+    def _get_shas(self, entries):
+        return [entry['sha'] for entry in entries.itervalues()]
+
+    def clear(self):
+        """Removes every entry from the cache."""
+        self._data = None
+        self._entries = None
+        if self.pod.file_exists(self._index_path):
+            self.pod.delete_file(self._index_path)
+        objects_path = '{}/objects/'.format(self.ROOT)
+        if self.pod.file_exists(objects_path):
+            for pod_path in self.pod.list_dir(objects_path):
+                self.pod.delete_file(objects_path + pod_path.lstrip('/'))
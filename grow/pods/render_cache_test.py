@@ -0,0 +1,139 @@
+from . import render_cache
+from grow.pods import pods
+from grow.pods import rendered
+from grow.pods import storage
+import mock
+import shutil
+import tempfile
+import unittest
+
+
+class RenderCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.dir_path = tempfile.mkdtemp()
+        self.pod = pods.Pod(self.dir_path, storage=storage.FileStorage)
+        self.pod.write_yaml('/podspec.yaml', {})
+        self.pod.write_yaml('/content/pages/_blueprint.yaml', {
+            '$path': '/{base}/',
+            '$view': '/views/base.html',
+        })
+        self.pod.write_file('/content/pages/foo.yaml', '$title: Foo\n')
+        self.pod.write_file(
+            '/content/pages/bar.yaml',
+            '$title: Bar\nfoo: !g.doc /content/pages/foo.yaml\n')
+        self.pod.write_file(
+            '/views/base.html',
+            '{{doc.title}}{% if doc.foo %} {{doc.foo.title}}{% endif %}')
+
+    def tearDown(self):
+        shutil.rmtree(self.dir_path)
+
+    def _export(self):
+        pod = pods.Pod(self.dir_path, storage=storage.FileStorage)
+        pod.enable(pod.FEATURE_RENDER_CACHE)
+        render = rendered.RenderedController.render
+        rendered_docs = []
+
+        def _render(controller, *args, **kwargs):
+            rendered_docs.append(controller.doc.pod_path)
+            return render(controller, *args, **kwargs)
+
+        with mock.patch.object(
+                rendered.RenderedController, 'render', new=_render):
+            results = pod.export()
+        return set(rendered_docs), results
+
+    def test_export(self):
+        rendered_docs, results = self._export()
+        self.assertEqual(
+            set(['/content/pages/foo.yaml', '/content/pages/bar.yaml']),
+            rendered_docs)
+        self.assertEqual('Bar Foo', results['/bar/'])
+
+        # Unchanged documents are read from the cache.
+        rendered_docs, results = self._export()
+        self.assertEqual(set(), rendered_docs)
+        self.assertEqual('Bar Foo', results['/bar/'])
+        self.assertEqual('Foo', results['/foo/'])
+
+        # Edits to a document render the document and its dependents.
+        self.pod.write_file('/content/pages/foo.yaml', '$title: Foo2\n')
+        rendered_docs, results = self._export()
+        self.assertEqual(
+            set(['/content/pages/foo.yaml', '/content/pages/bar.yaml']),
+            rendered_docs)
+        self.assertEqual('Bar Foo2', results['/bar/'])
+
+        # Edits to templates render the documents using them.
+        self.pod.write_file('/views/base.html', 'changed {{doc.title}}')
+        rendered_docs, results = self._export()
+        self.assertEqual(
+            set(['/content/pages/foo.yaml', '/content/pages/bar.yaml']),
+            rendered_docs)
+        self.assertEqual('changed Bar', results['/bar/'])
+
+        # Edits to blueprints invalidate the whole cache.
+        self.pod.write_yaml('/content/pages/_blueprint.yaml', {
+            '$path': '/{base}/',
+            '$view': '/views/base.html',
+            '$title': 'Default',
+        })
+        rendered_docs, _ = self._export()
+        self.assertEqual(
+            set(['/content/pages/foo.yaml', '/content/pages/bar.yaml']),
+            rendered_docs)
+
+        # Clearing the cache renders everything again.
+        pod = pods.Pod(self.dir_path, storage=storage.FileStorage)
+        pod.podcache.reset(force=True)
+        self.assertFalse(pod.file_exists(
+            '{}/index.json'.format(render_cache.RenderCache.ROOT)))
+        rendered_docs, _ = self._export()
+        self.assertEqual(
+            set(['/content/pages/foo.yaml', '/content/pages/bar.yaml']),
+            rendered_docs)
+
+    def test_listing(self):
+        self.pod.write_yaml('/content/lists/_blueprint.yaml', {
+            '$path': '/lists/{base}/',
+            '$view': '/views/list.html',
+        })
+        self.pod.write_file('/content/lists/all.yaml', '')
+        self.pod.write_file('/views/list.html', ' '.join([
+            '{% for page in g.collection("pages").docs() %}',
+            '{{page.title}}{% endfor %}',
+        ]))
+        _, results = self._export()
+        self.assertIn('Foo', results['/lists/all/'])
+
+        # Edits to a listed document render the pages listing it.
+        self.pod.write_file('/content/pages/foo.yaml', '$title: Foo2\n')
+        rendered_docs, results = self._export()
+        self.assertIn('/content/lists/all.yaml', rendered_docs)
+        self.assertIn('Foo2', results['/lists/all/'])
+
+        # Added documents render the pages listing their collection.
+        self.pod.write_file(
+            '/content/pages/baz.yaml', '$title: Baz\n$hidden: true\n')
+        rendered_docs, results = self._export()
+        self.assertIn('/content/lists/all.yaml', rendered_docs)
+
+    def test_eviction(self):
+        self._export()
+        pod = pods.Pod(self.dir_path, storage=storage.FileStorage)
+        cache = render_cache.RenderCache(pod, max_size=len('Bar Foo'))
+        cache.start(['/foo/', '/bar/'])
+        self.assertEqual('Foo', cache.get('/foo/'))
+        cache.write()
+        cache = render_cache.RenderCache(pod)
+        cache.start(['/foo/', '/bar/'])
+        self.assertEqual('Foo', cache.get('/foo/'))
+        self.assertIsNone(cache.get('/bar/'))
+        self.assertEqual(
+            1, len(pod.list_dir('{}/objects/'.format(
+                render_cache.RenderCache.ROOT))))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -58,6 +58,17 @@ class RenderedController(controllers.BaseController):
             return []
         return [self.doc.get_serving_path()]
 
+    def can_inject(self):
+        """Returns whether rendering injects data that is not in the pod."""
+        doc = self.doc
+        if doc is None:
+            return False
+        for preprocessor in self.pod.list_preprocessors():
+            if preprocessor.can_inject(doc=doc):
+                return True
+        translator = self.pod.get_translator()
+        return bool(translator and translator.can_inject(doc))
+
     def render(self, params, inject=True):
         doc = self.doc
         preprocessor = None
@@ -69,30 +80,42 @@ class RenderedController(controllers.BaseController):
 
         local_tags = tags.create_builtin_tags(
             self.pod, doc, use_cache=self.pod.env.cached)
-        template = env.get_template(self.view.lstrip('/'))
-        # NOTE: This should be done using get_template(... globals=...) but
-        # it is not available included inside macros???
-        # See: https://github.com/pallets/jinja/issues/688
-        template.globals['g'] = local_tags
-
-        try:
-            kwargs = {
-                'doc': doc,
-                'env': self.pod.env,
-                'podspec': self.pod.podspec,
-            }
-            content = template.render(kwargs).lstrip()
-            if self.pod.is_enabled(self.pod.FEATURE_UI):
-                content = self._inject_ui(
-                    content, preprocessor, translator)
-            return content
-        except Exception as e:
-            text = 'Error building {}: {}'
-            exception = errors.BuildError(text.format(self, e))
-            exception.traceback = sys.exc_info()[2]
-            exception.controller = self
-            exception.exception = e
-            raise exception
+
+        # Record the view and every template it includes, imports or extends,
+        # and the collections listed while rendering, as dependencies of the
+        # document.
+        graph = self.pod.podcache.dependency_graph
+        with env.track_templates() as template_paths, \
+                graph.track(doc.pod_path if doc else None):
+            template = env.get_template(self.view.lstrip('/'))
+            # NOTE: This should be done using get_template(... globals=...)
+            # but it is not available included inside macros???
+            # See: https://github.com/pallets/jinja/issues/688
+            template.globals['g'] = local_tags
+
+            try:
+                kwargs = {
+                    'doc': doc,
+                    'env': self.pod.env,
+                    'podspec': self.pod.podspec,
+                }
+                content = template.render(kwargs).lstrip()
+                if self.pod.is_enabled(self.pod.FEATURE_UI):
+                    content = self._inject_ui(
+                        content, preprocessor, translator)
+            except Exception as e:
+                text = 'Error building {}: {}'
+                exception = errors.BuildError(text.format(self, e))
+                exception.traceback = sys.exc_info()[2]
+                exception.controller = self
+                exception.exception = e
+                raise exception
+
+        if doc:
+            for template_path in template_paths:
+                self.pod.podcache.dependency_graph.add(
+                    doc.pod_path, template_path)
+        return content
 
     def _inject_ui(self, content, preprocessor, translator):
         if not self.get_mimetype().endswith('html'):
@@ -51,6 +51,39 @@ class RenderedTest(unittest.TestCase):
         with self.assertRaises(errors.BuildError):
             controller.render(params)
 
+    def test_render_template_dependencies(self):
+        pod = testing.create_pod()
+        pod.write_yaml('/podspec.yaml', {})
+        pod.write_file(
+            '/views/base.html',
+            '{% extends "/views/layout.html" %}'
+            '{% block main %}{% include "/views/partial.html" %}{% endblock %}')
+        pod.write_file(
+            '/views/layout.html',
+            '{% import "/views/macros.html" as macros %}'
+            '{{macros.title(doc)}}{% block main %}{% endblock %}')
+        pod.write_file(
+            '/views/macros.html',
+            '{% macro title(doc) %}{{doc.title}}{% endmacro %}')
+        pod.write_file('/views/partial.html', 'partial')
+        fields = {
+            'path': '/{base}/',
+            'view': '/views/base.html',
+        }
+        pod.write_yaml('/content/collection/_blueprint.yaml', fields)
+        pod.write_file('/content/collection/test.yaml', '$title: Test')
+
+        # Renders twice to verify templates loaded from the cache are tracked.
+        for _ in range(2):
+            pod.podcache.dependency_graph.reset()
+            controller, params = pod.match('/test/')
+            self.assertEqual('Testpartial', controller.render(params))
+            self.assertEqual(
+                set(['/views/base.html', '/views/layout.html',
+                     '/views/macros.html', '/views/partial.html']),
+                pod.podcache.dependency_graph.get_dependencies(
+                    '/content/collection/test.yaml'))
+
     def test_custom_jinja_extensions(self):
         controller, params = self.pod.match('/')
         html = controller.render(params)
@@ -4,6 +4,7 @@ import collections
 # NOTE: exc imported directly, webob.exc doesn't work when frozen.
 from webob import exc as webob_exc
 from werkzeug import routing
+from werkzeug.urls import url_quote
 from grow.common import timer
 from grow.common import utils
 from . import locales
@@ -26,6 +27,15 @@ class GrowConverter(routing.PathConverter):
 
 
 class Routes(object):
+    """Routes of a pod.
+
+    Documents are served at exact paths, so their rules are kept in an index
+    of serving paths that is updated in place as documents are added and
+    removed. Only the static and sitemap rules, which may contain
+    parameters, are compiled into a werkzeug routing map. Static controllers
+    are also indexed by their source directories, so that static files are
+    resolved from pod paths without trying every rule.
+    """
     converters = {'grow': GrowConverter}
 
     def __init__(self, pod):
@@ -33,20 +43,30 @@ class Routes(object):
         self._paths_to_locales_to_docs = collections.defaultdict(dict)
         self._routing_map = None
         self._static_routing_map = None
-        self._routing_rules = []
+        self._static_index = None
+        self._pod_paths_to_static_files = {}
 
     def __iter__(self):
-        return self.routing_map.iter_rules()
+        for rule in self.routing_map.itervalues():
+            yield rule
+        for rule in self.static_routing_map.iter_rules():
+            yield rule
+
+    @staticmethod
+    def _get_key(path):
+        if isinstance(path, str):
+            return path.decode('utf-8', 'replace')
+        return path
 
     def _add_document(self, doc):
         rule, serving_path = self._create_rule_for_doc(doc)
         if not rule:
             return
-        self._routing_rules.append(rule)
+        self.routing_map[self._get_key(serving_path)] = rule
 
     def _build_routing_map(self, inject=False):
         new_paths_to_locales_to_docs = collections.defaultdict(dict)
-        self._routing_rules = []
+        routing_map = collections.OrderedDict()
         serving_paths_to_docs = {}
         duplicate_paths = collections.defaultdict(list)
 
@@ -58,23 +78,50 @@ class Routes(object):
                     duplicate_paths[serving_path].append(serving_paths_to_docs[serving_path])
                     duplicate_paths[serving_path].append(doc)
                 serving_paths_to_docs[serving_path] = doc
-                self._routing_rules.append(rule)
+                routing_map.setdefault(self._get_key(serving_path), rule)
                 new_paths_to_locales_to_docs[doc.pod_path][doc.locale] = doc
 
         # Static routes.
-        self._routing_rules += self._build_static_routing_map_and_return_rules()
+        self._build_static_routing_map()
 
-        self._recreate_routing_map()
+        self._routing_map = routing_map
         self._paths_to_locales_to_docs = new_paths_to_locales_to_docs
         if duplicate_paths:
             text = 'Found duplicate serving paths: {}'
             raise DuplicatePathsError(text.format(dict(duplicate_paths)))
         return self._routing_map
 
-    def _build_static_routing_map_and_return_rules(self):
+    def _build_static_routing_map(self):
         rules = self.list_static_routes()
         self._static_routing_map = routing.Map(rules, converters=Routes.converters)
-        return [rule.empty() for rule in rules]
+        self._static_index = static.StaticIndex(
+            [rule.endpoint for rule in rules
+             if rule.endpoint.KIND == messages.Kind.STATIC])
+        self._pod_paths_to_static_files = {}
+
+    def get_static_file(self, pod_path, locale=None):
+        """Returns the StaticFile of a pod path, or None if it is not routed."""
+        if self._static_index is None:
+            self._build_static_routing_map()
+        locale_key = str(locale) if locale is not None else None
+        locales_to_static_files = self._pod_paths_to_static_files.get(pod_path)
+        if locales_to_static_files is not None \
+                and locale_key in locales_to_static_files:
+            return locales_to_static_files[locale_key]
+        controller, serving_path = self._static_index.match(pod_path)
+        static_file = None
+        if controller is not None:
+            static_file = static.StaticFile(
+                pod_path, serving_path, locale=locale, pod=self.pod,
+                controller=controller, fingerprinted=controller.fingerprinted,
+                localization=controller.localization)
+        self._pod_paths_to_static_files.setdefault(
+            pod_path, {})[locale_key] = static_file
+        return static_file
+
+    def invalidate_static_file(self, pod_path):
+        """Forgets the static files resolved for a pod path."""
+        self._pod_paths_to_static_files.pop(pod_path, None)
 
     def _create_rule_for_doc(self, doc):
         if not doc.has_serving_path():
@@ -84,21 +131,11 @@ class Routes(object):
             view=doc.view, doc=doc, _pod=self.pod)
         return routing.Rule(serving_path, endpoint=controller), serving_path
 
-    def _recreate_routing_map(self):
-        rules = [rule.empty() for rule in self._routing_rules]
-        self._routing_map = routing.Map(rules, converters=Routes.converters)
-
     def _remove_document(self, doc):
         rule, serving_path = self._create_rule_for_doc(doc)
         if not rule:
             return
-
-        # The `.remove()` does not work correctly for rules.
-        old_rules = self._routing_rules
-        self._routing_rules = []
-        for rule in old_rules:
-            if rule.rule != serving_path:
-                self._routing_rules.append(rule)
+        self.routing_map.pop(self._get_key(serving_path), None)
 
     @property
     def podspec(self):
@@ -106,12 +143,10 @@ class Routes(object):
 
     def add_document(self, doc):
         self._add_document(doc)
-        self._recreate_routing_map()
 
     def add_documents(self, docs):
         for doc in docs:
             self._add_document(doc)
-        self._recreate_routing_map()
 
     def format_path(self, path):
         path = '' if path is None else path
@@ -211,7 +246,16 @@ class Routes(object):
         """
         if '/..' in path:
             raise webob_exc.HTTPBadRequest('Invalid path.')
-        urls = self.routing_map.bind_to_environ(env)
+        key = self._get_key(path)
+        rule = self.routing_map.get(key)
+        if rule is not None:
+            return rule.endpoint, {}
+        urls = self.static_routing_map.bind_to_environ(env)
+        # Mirror werkzeug's strict slashes for paths missing a trailing slash.
+        if not key.endswith('/') and key + '/' in self.routing_map:
+            quoted_path = url_quote(path, safe='/:|+')
+            raise routing.RequestRedirect(
+                urls.make_redirect_url(quoted_path + '/', urls.query_args))
         try:
             controller, params = urls.match(path)
             return controller, params
@@ -228,16 +272,13 @@ class Routes(object):
             self._remove_document(doc)
         for doc in add_docs if add_docs else []:
             self._add_document(doc)
-        self._recreate_routing_map()
 
     def remove_document(self, doc):
         self._remove_document(doc)
-        self._recreate_routing_map()
 
     def remove_documents(self, docs):
         for doc in docs:
             self._remove_document(doc)
-        self._recreate_routing_map()
 
     def reset_cache(self, rebuild=True, inject=False):
         if rebuild:
@@ -248,6 +289,7 @@ class Routes(object):
 
     @property
     def routing_map(self):
+        """Ordered mapping of document serving paths to their rules."""
         if self._routing_map is None:
             self._build_routing_map()
         return self._routing_map
@@ -255,7 +297,7 @@ class Routes(object):
     @property
     def static_routing_map(self):
         if self._static_routing_map is None:
-            self._build_static_routing_map_and_return_rules()
+            self._build_static_routing_map()
         return self._static_routing_map
 
     def to_message(self):
@@ -1,6 +1,7 @@
 from grow.pods import pods
 from grow.pods import storage
 from grow.testing import testing
+from werkzeug import routing
 import unittest
 import webob.exc
 
@@ -24,6 +25,11 @@ class RoutesTest(unittest.TestCase):
         with self.assertRaises(webob.exc.HTTPNotFound):
             self.pod.match('/dummy/')
 
+    def test_match_redirect(self):
+        with self.assertRaises(routing.RequestRedirect) as context:
+            self.pod.match('/about')
+        self.assertEqual('http://localhost/about/', context.exception.new_url)
+
     def test_add_remove_document(self):
         controller, params = self.pod.match('/about/')
         controller.render(params)
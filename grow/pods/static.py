@@ -3,8 +3,7 @@ from . import messages
 from grow.pods import locales
 from grow.pods import urls
 from datetime import datetime
-import fnmatch
-import hashlib
+import collections
 import mimetypes
 import os
 import re
@@ -18,11 +17,6 @@ mimetypes.add_type('image/svg+xml', '.svg')
 mimetypes.add_type('text/css', '.css')
 
 
-SKIP_PATTERNS = [
-    '**/.**',
-]
-
-
 class Error(Exception):
     pass
 
@@ -31,6 +25,35 @@ class BadStaticFileError(Error):
     pass
 
 
+class StaticContent(object):
+    """Reference to the content of a static file, read only when needed.
+
+    Exported in place of the bytes of static routes, so that large files are
+    hashed and deployed by streaming them from disk. `sha` is filled in from
+    the pod's file index, which is persisted between builds.
+    """
+
+    CHUNK_SIZE = 1024 * 1024
+
+    def __init__(self, pod_path, path, sha=None):
+        self.pod_path = pod_path
+        self.path = path
+        self.sha = sha
+
+    def __repr__(self):
+        return '<StaticContent({})>'.format(self.pod_path)
+
+    def iter_chunks(self):
+        """Yields the content of the file in chunks."""
+        with open(self.path, 'rb') as fp:
+            for chunk in iter(lambda: fp.read(self.CHUNK_SIZE), b''):
+                yield chunk
+
+    def read(self):
+        with open(self.path, 'rb') as fp:
+            return fp.read()
+
+
 class StaticFile(object):
 
     def __init__(self, pod_path, serving_path, locale=None, localization=None,
@@ -76,11 +99,7 @@ class StaticFile(object):
 
     @staticmethod
     def _create_fingerprint(pod, pod_path):
-        md5 = hashlib.md5()
-        with pod.open_file(pod_path, 'rb') as fp:
-            content = fp.read()
-            md5.update(content)
-        return md5.hexdigest()
+        return pod.podcache.fingerprint_cache.get(pod_path)
 
     @staticmethod
     def remove_fingerprint(path):
@@ -152,6 +171,20 @@ class StaticController(controllers.BaseController):
         self.localized = localized
         self.localization = localization
         self.fingerprinted = fingerprinted
+        self._tokens = re.findall('.?{([^}]+)}.?', self.path_format)
+        self._source_regex = None
+        self.source_prefix = None
+        if 'filename' in self._tokens:
+            source_regex = self.source_format.replace(
+                '{filename}', '(?P<filename>.*)')
+            source_regex = source_regex.replace('{locale}', '(?P<locale>[^/]*)')
+            source_regex = source_regex.replace('{fingerprint}', '(?P<fingerprint>[^/])')
+            source_regex = source_regex.replace('{root}', '(?P<root>[^/])')
+            self._source_regex = re.compile(source_regex)
+            # The literal directory that all matching pod paths start with.
+            literal = self.source_format.split('{', 1)[0]
+            if literal.startswith('/'):
+                self.source_prefix = literal[:literal.rfind('/') + 1]
 
     def __repr__(self):
         return '<Static(format=\'{}\')>'.format(self.source_format)
@@ -222,18 +255,12 @@ class StaticController(controllers.BaseController):
                 fingerprint = StaticFile._create_fingerprint(self.pod, pod_path)
                 return StaticFile.apply_fingerprint(self.path_format, fingerprint)
             return self.path_format
-        tokens = re.findall('.?{([^}]+)}.?', self.path_format)
-        if 'filename' in tokens:
-            source_regex = self.source_format.replace(
-                '{filename}', '(?P<filename>.*)')
-            source_regex = source_regex.replace('{locale}', '(?P<locale>[^/]*)')
-            source_regex = source_regex.replace('{fingerprint}', '(?P<fingerprint>[^/])')
-            source_regex = source_regex.replace('{root}', '(?P<root>[^/])')
-            match = re.match(source_regex, pod_path)
+        if self._source_regex is not None:
+            match = self._source_regex.match(pod_path)
             if match:
                 kwargs = match.groupdict()
                 kwargs['root'] = self.pod.podspec.root
-                if 'fingerprint' in tokens:
+                if 'fingerprint' in self._tokens:
                     fingerprint = StaticFile._create_fingerprint(self.pod, pod_path)
                     kwargs['fingerprint'] = fingerprint
                 if 'locale' in kwargs:
@@ -246,12 +273,28 @@ class StaticController(controllers.BaseController):
                     path = StaticFile.apply_fingerprint(path, fingerprint)
                 return path
 
+    def list_source_paths(self):
+        """Returns the pod paths of the files in the static directory."""
+        # NOTE: This should be updated to support globbing directories,
+        # and not simply strip all sub-paths beneath {locale}.
+        source = self.source_format.replace('{filename}', '')
+        source = re.sub('{locale}.*', '', source)
+        return self.pod.podcache.listing_cache.list(source)
+
     def list_concrete_paths(self):
         concrete_paths = set()
         tokens = re.findall('.?{([^}]+)}.?', self.path_format)
 
         source_regex = self.source_format.replace('{filename}', '(?P<filename>.*)')
-        source_regex = source_regex.replace('{locale}', '(?P<locale>[^/]*)')
+        source_regex = re.compile(
+            source_regex.replace('{locale}', '(?P<locale>[^/]*)'))
+        localized_source_regex = None
+        if not self.localized and self.localization:
+            localized_source_format = self.localization['static_dir']
+            localized_source_regex = localized_source_format.replace(
+                '{filename}', '(?P<filename>.*)')
+            localized_source_regex = re.compile(localized_source_regex.replace(
+                '{locale}', '(?P<locale>[^/]*)'))
 
         if '{' not in self.path_format:
             if self.fingerprinted:
@@ -262,35 +305,17 @@ class StaticController(controllers.BaseController):
                 concrete_paths.add(self.path_format)
 
         elif 'filename' in tokens:
-            # NOTE: This should be updated to support globbing directories,
-            # and not simply strip all sub-paths beneath {locale}.
-            source = self.source_format.replace('{filename}', '')[1:]
-            source = re.sub('{locale}.*', '', source)
-            source = source.rstrip('/')
-            paths = self.pod.list_dir(source)
-            paths = [('/' + source + path).replace(self.pod.root, '')
-                     for path in paths]
-
-            # Exclude paths matched by skip patterns.
-            for pattern in SKIP_PATTERNS:
-                # .gitignore-style treatment of paths without slashes.
-                if '/' not in pattern:
-                    pattern = '**{}**'.format(pattern)
-                for skip_paths in fnmatch.filter(paths, pattern):
-                    paths = [path for path in paths
-                             if path.replace(self.pod.root, '') not in skip_paths]
+            paths = self.list_source_paths()
+            if self.fingerprinted or 'fingerprint' in self.path_format:
+                self.pod.podcache.fingerprint_cache.prefetch(
+                    path for path in paths if source_regex.match(path))
 
             for pod_path in paths:
-                match = re.match(source_regex, pod_path)
+                match = source_regex.match(pod_path)
                 # Skip adding localized paths in subfolders of other rules.
-                if not self.localized and self.localization:
-                    localized_source_format = self.localization['static_dir']
-                    localized_source_regex = localized_source_format.replace(
-                        '{filename}', '(?P<filename>.*)')
-                    localized_source_regex = localized_source_regex.replace(
-                        '{locale}', '(?P<locale>[^/]*)')
-                    if re.match(localized_source_regex, pod_path):
-                        continue
+                if (localized_source_regex is not None
+                        and localized_source_regex.match(pod_path)):
+                    continue
                 if match:
                     kwargs = match.groupdict()
                     kwargs['root'] = self.pod.podspec.root
@@ -310,3 +335,42 @@ class StaticController(controllers.BaseController):
                     concrete_paths.add(matched_path)
 
         return list(concrete_paths)
+
+
+class StaticIndex(object):
+    """Static controllers indexed by the directories of their source files.
+
+    Controllers are looked up by each directory prefix of a pod path, so
+    resolving a pod path only tries the controllers whose static directory
+    contains it. Controllers without a literal source directory are always
+    tried. Candidates are tried in the order the controllers were given.
+    """
+
+    def __init__(self, controllers):
+        self._prefixes_to_controllers = collections.defaultdict(list)
+        self._unindexed = []
+        for order, controller in enumerate(controllers):
+            if controller.source_prefix is None:
+                self._unindexed.append((order, controller))
+            else:
+                self._prefixes_to_controllers[controller.source_prefix].append(
+                    (order, controller))
+
+    def iter_candidates(self, pod_path):
+        candidates = list(self._unindexed)
+        end = pod_path.find('/')
+        while end != -1:
+            candidates.extend(
+                self._prefixes_to_controllers.get(pod_path[:end + 1], ()))
+            end = pod_path.find('/', end + 1)
+        candidates.sort(key=lambda candidate: candidate[0])
+        for _, controller in candidates:
+            yield controller
+
+    def match(self, pod_path):
+        """Returns the first controller serving a pod path and its serving path."""
+        for controller in self.iter_candidates(pod_path):
+            serving_path = controller.match_pod_path(pod_path)
+            if serving_path:
+                return controller, serving_path
+        return None, None
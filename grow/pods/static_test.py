@@ -2,6 +2,7 @@ from . import static
 from grow.pods import pods
 from grow.pods import storage
 from grow.testing import testing
+import mock
 import unittest
 
 
@@ -41,6 +42,36 @@ class StaticTest(unittest.TestCase):
             '/root/static-fingerprint/{}/de_alias/fingerprinted.txt'.format(fingerprint),
             static.url.path)
 
+    def test_static_index(self):
+        self.pod.routes.static_routing_map
+        index = self.pod.routes._static_index
+        self.assertEqual(
+            ['/static/'],
+            [controller.source_prefix
+             for controller in index.iter_candidates('/static/test.txt')])
+        self.assertEqual(
+            [], list(index.iter_candidates('/content/pages/home.yaml')))
+        controller, serving_path = index.match('/public/file.txt')
+        self.assertEqual('/public/', controller.source_prefix)
+        self.assertEqual('/public/file.txt', serving_path)
+        self.assertEqual((None, None), index.match('/views/base.html'))
+
+        # Static files are resolved once for each pod path and locale.
+        with mock.patch.object(
+                static.StaticIndex, 'match',
+                wraps=index.match) as match:
+            self.pod.routes.invalidate_static_file('/static/test.txt')
+            static_file = self.pod.get_static('/static/test.txt')
+            self.assertIs(static_file, self.pod.get_static('/static/test.txt'))
+            self.pod.get_static('/static/test.txt', locale='de')
+            self.assertEqual(2, match.call_count)
+            self.pod.on_file_changed('/static/test.txt')
+            self.pod.get_static('/static/test.txt')
+            self.assertEqual(3, match.call_count)
+
+        with self.assertRaises(static.BadStaticFileError):
+            self.pod.get_static('/views/base.html')
+
     def test_apply_fingerprint(self):
         fingerprint = 'bc20b3c9007842b8e1f3c640b07f4e74'
         path = '/path-path/file.txt'
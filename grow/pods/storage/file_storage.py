@@ -52,9 +52,8 @@ class FileStorage(base_storage.BaseStorage):
     def JinjaLoader(path):
         return jinja2.FileSystemLoader(path)
 
-    @classmethod
-    def write(cls, path, content):
-        dirname = os.path.dirname(path)
+    @staticmethod
+    def _makedirs(dirname):
         try:
             os.makedirs(dirname)
         except OSError as e:
@@ -62,6 +61,10 @@ class FileStorage(base_storage.BaseStorage):
                 pass
             else:
                 raise
+
+    @classmethod
+    def write(cls, path, content):
+        cls._makedirs(os.path.dirname(path))
         fp = cls.open(path, mode='w')
         fp.write(content)
         fp.close()
@@ -87,6 +90,26 @@ class FileStorage(base_storage.BaseStorage):
             shutil.copyfile(path, target_path)
             shutil.copystat(path, target_path)
 
+    @classmethod
+    def copy_file(cls, path, target_path, link=False):
+        """Copies a file without reading it into memory.
+
+        With `link`, the target is hard linked to the file instead, falling
+        back to a copy when linking is not possible (such as across devices).
+        Any existing target is replaced rather than written through, so that
+        files hard linked by an earlier copy are never modified.
+        """
+        cls._makedirs(os.path.dirname(target_path))
+        if os.path.lexists(target_path):
+            os.remove(target_path)
+        if link:
+            try:
+                os.link(path, target_path)
+                return
+            except OSError:
+                pass
+        shutil.copyfile(path, target_path)
+
     @staticmethod
     def move_to(path, target_path):
         os.rename(path, target_path)
@@ -14,6 +14,7 @@ from grow.common import utils
 from grow.pods import locales as locales_lib
 from grow.pods import urls
 from . import collection as collection_lib
+from . import pagination
 
 
 SLUG_REGEX = re.compile(r'[^A-Za-z0-9-._~]+')
@@ -180,14 +181,17 @@ def _deep_gettext(ctx, fields):
                 new_dct[key] = val
         return new_dct
     elif isinstance(fields, (list, set)):
-        for i, val in enumerate(fields):
+        # Fields may be shared between locales, so they are translated into
+        # a new container instead of in place.
+        new_items = []
+        for val in fields:
             if isinstance(val, (dict, list, set)):
-                fields[i] = _deep_gettext(ctx, val)
+                new_items.append(_deep_gettext(ctx, val))
             elif isinstance(val, basestring):
-                fields[i] = _gettext_alias(ctx, val)
+                new_items.append(_gettext_alias(ctx, val))
             else:
-                fields[i] = val
-        return fields
+                new_items.append(val)
+        return type(fields)(new_items)
 
 
 def _gettext_alias(__context, *args, **kwargs):
@@ -222,6 +226,11 @@ def date(datetime_obj=None, _pod=None, **kwargs):
     return datetime_obj
 
 
+def paginate(docs, per_page=10, base_path=None, _pod=None, **kwargs):
+    """Splits docs into pages, served at `<base_path>page/<number>/`."""
+    return pagination.paginate(docs, per_page, base_path=base_path)
+
+
 @utils.memoize_tag
 def locales(codes, _pod=None):
     """Parses locales from the given locale codes."""
@@ -280,22 +289,55 @@ def create_builtin_tags(pod, doc, use_cache=False):
             return included_docs
         return _wrapper
 
+    def _wrap_data_dependency(func):
+        def _wrapper(path, *args, **kwargs):
+            if doc:
+                pod.podcache.dependency_graph.add(
+                    doc.pod_path, '/{}'.format(path.lstrip('/')))
+            return func(path, *args, _pod=pod, use_cache=use_cache, **kwargs)
+        return _wrapper
+
+    def _wrap_collection_dependency(func):
+        # Memoized results skip listing the collection, which is where
+        # the listing is otherwise recorded.
+        def _wrapper(collection, *args, **kwargs):
+            if doc:
+                pod.podcache.dependency_graph.add(
+                    doc.pod_path, '{}/{}'.format(
+                        collection_lib.Collection.CONTENT_PATH,
+                        collection.strip('/')))
+            return func(
+                collection, *args, _pod=pod, use_cache=use_cache, **kwargs)
+        return _wrapper
+
+    def _wrap_statics_dependency(func):
+        def _wrapper(*args, **kwargs):
+            static_files = func(
+                *args, _pod=pod, use_cache=use_cache, **kwargs)
+            if doc:
+                for static_file in static_files:
+                    pod.podcache.dependency_graph.add(
+                        doc.pod_path, static_file.pod_path)
+            return static_files
+        return _wrapper
+
     return {
         'categories': _wrap(categories),
         'collection': _wrap(collection),
         'collections': _wrap(collections),
-        'csv': _wrap(csv),
+        'csv': _wrap_data_dependency(csv),
         'date': _wrap(date),
         'doc': _wrap_dependency(get_doc),
         'docs': _wrap_dependency(docs),
-        'json': _wrap(json),
+        'json': _wrap_data_dependency(json),
         'locale': _wrap(locale),
         'locales': _wrap(locales),
-        'nav': _wrap(nav),
-        'static': _wrap(static_something),
-        'statics': _wrap(statics),
-        'url': _wrap(url),
-        'yaml': _wrap(yaml),
+        'nav': _wrap_collection_dependency(nav),
+        'paginate': _wrap(paginate),
+        'static': _wrap_data_dependency(static_something),
+        'statics': _wrap_statics_dependency(statics),
+        'url': _wrap_data_dependency(url),
+        'yaml': _wrap_data_dependency(yaml),
     }
 
 
@@ -39,6 +39,33 @@ class BuiltinsTestCase(unittest.TestCase):
         self.assertIn('key - value', html)
         self.assertIn('key2 - value2', html)
 
+    def test_deeptrans_locales(self):
+        self.pod.catalogs.compile()
+        self.pod.write_yaml('/content/deep/_blueprint.yaml', {
+            '$path': '/{base}/',
+            '$view': '/views/deep.html',
+            '$localization': {
+                'path': '/{locale}/{base}/',
+                'locales': ['de', 'fr'],
+            },
+        })
+        self.pod.write_yaml('/content/deep/deep.yaml', {
+            'items': [{'title': 'Hello World!'}],
+        })
+        self.pod.write_file(
+            '/views/deep.html',
+            '{% for item in doc.items|deeptrans %}{{item.title}}{% endfor %}')
+        self.pod.routes.reset_cache(rebuild=True)
+
+        def _render(path):
+            controller, params = self.pod.match(path)
+            return controller.render(params).strip()
+
+        # Translating the fields of one locale leaves the others unchanged.
+        self.assertEqual('Hallo Welt!', _render('/de_alias/deep/'))
+        self.assertEqual('Hello World!', _render('/deep/'))
+        self.assertEqual('Hello World!', _render('/fr/deep/'))
+
     def test_collections(self):
         collections = tags.collections(_pod=self.pod)
         self.assertEqual(4, len(collections))
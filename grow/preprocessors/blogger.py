@@ -132,7 +132,8 @@ class BloggerPreprocessor(base.BasePreprocessor):
             return
         fields, body, _ = self._parse_item(item)
         if doc.exists:
-            existing_data = doc.format.front_matter.data
+            # The parsed front matter is shared and updated below.
+            existing_data = dict(doc.format.front_matter.data)
         else:
             existing_data = {}
         fields = utils.format_existing_data(
@@ -25,6 +25,16 @@ class PodFileEventHandler(events.PatternMatchingEventHandler):
     def on_modified(self, event):
         self.handle(event)
 
+    def on_deleted(self, event):
+        pod_path = event.src_path[len(self.pod.root):]
+        self.pod.on_file_deleted(pod_path)
+
+    def on_moved(self, event):
+        pod_path = event.src_path[len(self.pod.root):]
+        self.pod.on_file_deleted(pod_path)
+        self.pod.on_file_changed(event.dest_path[len(self.pod.root):])
+        self.managed_observer.reschedule_children()
+
 
 class PreprocessorEventHandler(events.PatternMatchingEventHandler):
     num_runs = 0
@@ -19,6 +19,8 @@ from werkzeug import wsgi
 from ..common import sdk_utils
 from ..common import utils
 from ..pods import errors
+from ..pods import messages
+from ..pods import page_cache
 from ..pods import ui
 
 
@@ -60,10 +62,36 @@ def serve_console(pod, request, values):
     return response
 
 
+def render_page(pod, path, controller, params):
+    """Returns a rendered page, served from the pod's page cache if possible."""
+
+    def _render():
+        headers = controller.get_http_headers(params)
+        content = controller.render(params)
+        inputs = None
+        # Pages with injected data may change without their inputs changing.
+        if not controller.can_inject():
+            inputs = pod.get_route_inputs(controller, params)
+        return content, headers, inputs
+
+    # Pages are only cached while the pod is watched for changes.
+    if not pod.is_enabled(pod.FEATURE_PAGE_CACHE):
+        content, headers, _ = _render()
+        return page_cache.Page(
+            content, headers, page_cache.create_etag(content), None)
+    return pod.podcache.page_cache.get_or_render(path, _render)
+
+
 def serve_pod(pod, request, values):
     path = urllib.unquote(request.path)  # Support escaped paths.
     controller, params = pod.routes.match(path, request.environ)
     controller.validate(params)
+    if controller.KIND == messages.Kind.RENDERED:
+        page = render_page(pod, path, controller, params)
+        response = Response(body=page.content)
+        response.headers.update(page.headers)
+        response.etag = page.etag
+        return response
     headers = controller.get_http_headers(params)
     if 'X-AppEngine-BlobKey' in headers:
         return Response(headers=headers)
@@ -1,6 +1,9 @@
+from grow.pods import page_cache as page_cache_lib
 from grow.pods import pods
 from grow.server import main
 from grow.testing import testing
+import mock
+import threading
 import unittest
 import webapp2
 
@@ -62,6 +65,103 @@ class PodHandlerTestCase(unittest.TestCase):
         self.assertEqual(200, response.status_int)
         self.assertEqual('application/xml', response.headers['Content-Type'])
 
+    def test_page_cache(self):
+        dir_path = testing.create_test_pod_dir()
+        pod = pods.Pod(dir_path)
+        app = main.create_wsgi_app(pod)
+        page_cache = pod.podcache.page_cache
+
+        # Pages are not cached unless the feature is enabled.
+        request = webapp2.Request.blank('/about/')
+        request.get_response(app)
+        self.assertIsNone(page_cache.get('/about/'))
+        pod.enable(pod.FEATURE_PAGE_CACHE)
+
+        request = webapp2.Request.blank('/about/')
+        response = request.get_response(app)
+        self.assertEqual(200, response.status_int)
+        etag = response.headers['ETag']
+        self.assertIsNotNone(page_cache.get('/about/'))
+
+        # Cached pages are served without rendering them again.
+        controller, _ = pod.match('/about/')
+        with mock.patch.object(
+                type(controller), 'render', side_effect=AssertionError):
+            response = request.get_response(app)
+        self.assertEqual(200, response.status_int)
+        self.assertEqual(etag, response.headers['ETag'])
+
+        # Verify 304 for matching strong ETags.
+        request = webapp2.Request.blank(
+            '/about/', headers={'If-None-Match': etag})
+        response = request.get_response(app)
+        self.assertEqual(304, response.status_int)
+        self.assertEqual('', response.body)
+
+        # Pages are invalidated when their inputs change.
+        pod.on_file_changed('/views/base.html')
+        self.assertIsNone(page_cache.get('/about/'))
+
+    def test_page_cache_listing(self):
+        pod = testing.create_pod()
+        pod.enable(pod.FEATURE_PAGE_CACHE)
+        pod.write_yaml('/podspec.yaml', {})
+        pod.write_yaml('/content/pages/_blueprint.yaml', {
+            '$path': '/{base}/',
+            '$view': '/views/base.html',
+        })
+        pod.write_file('/content/pages/foo.yaml', '$title: Foo\n')
+        pod.write_yaml('/content/lists/_blueprint.yaml', {
+            '$path': '/lists/{base}/',
+            '$view': '/views/list.html',
+        })
+        pod.write_file('/content/lists/all.yaml', '')
+        pod.write_file('/views/base.html', '{{doc.title}}')
+        pod.write_file('/views/list.html', ' '.join([
+            '{% for page in g.collection("pages").docs() %}',
+            '{{page.title}}{% endfor %}',
+        ]))
+        app = main.create_wsgi_app(pod)
+        request = webapp2.Request.blank('/lists/all/')
+        self.assertEqual('Foo', request.get_response(app).body.strip())
+
+        # Pages listing a collection are invalidated when its documents
+        # change or are added.
+        pod.write_file('/content/pages/foo.yaml', '$title: Foo2\n')
+        pod.on_file_changed('/content/pages/foo.yaml')
+        self.assertEqual('Foo2', request.get_response(app).body.strip())
+        pod.write_file('/content/pages/bar.yaml', '$title: Bar\n')
+        pod.on_file_changed('/content/pages/bar.yaml')
+        self.assertIn('Bar', request.get_response(app).body)
+
+    def test_page_cache_coalesce(self):
+        cache = page_cache_lib.PageCache()
+        calls = []
+        started = threading.Event()
+        finish = threading.Event()
+
+        def render():
+            calls.append(1)
+            started.set()
+            finish.wait()
+            return 'content', {}, ['/views/base.html']
+
+        threads = [
+            threading.Thread(target=cache.get_or_render, args=('/', render))
+            for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        started.wait()
+        finish.set()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(1, len(calls))
+        page = cache.get('/')
+        self.assertEqual('content', page.content)
+
+        cache.invalidate(['/views/base.html'])
+        self.assertIsNone(cache.get('/'))
+
     def test_ui(self):
         dir_path = testing.create_test_pod_dir()
         pod = pods.Pod(dir_path)
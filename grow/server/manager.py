@@ -22,6 +22,9 @@ class CallbackHTTPServer(serving.ThreadedWSGIServer):
         host, port = self.server_address
         self.pod.env.port = port
         self.pod.load()
+        thread = threading.Thread(target=self.pod.prefetch_fingerprints)
+        thread.setDaemon(True)
+        thread.start()
         url = print_server_ready_message(self.pod, self.pod.env.host, port)
         if self.open_browser:
             start_browser_in_thread(url)
@@ -66,6 +69,12 @@ def start(pod, host=None, port=None, open_browser=False, debug=False,
         try:
             serving.run_simple(host, port, app, request_handler=handler, threaded=True)
             done = True
+        except KeyboardInterrupt:
+            # Reuse the raw front matter of unchanged documents and the
+            # fingerprints of static files the next time the server starts.
+            pod.podcache.write_documents()
+            pod.podcache.write_fingerprints()
+            raise
         except socket.error as e:
             if 'Errno 48' in str(e):
                 num_tries += 1
@@ -309,8 +309,12 @@ class Translator(object):
         stat = stats[doc.locale]
         return stat.url
 
+    def can_inject(self, doc):
+        """Returns whether the translator injects translations into a doc."""
+        return bool(self._inject and doc.locale)
+
     def inject(self, doc):
-        if not self._inject or not doc.locale:
+        if not self.can_inject(doc):
             return
         self.download(locales=[doc.locale], save_stats=False, inject=True)
         return self